@@ -0,0 +1,17 @@
+# -*- coding: utf-8 -*-
+# Author: Dylan Jones
+# Date:   2026-10-17
+
+"""Formatting of the job table of the `slurmio squeue` command."""
+
+import json
+from typing import Callable
+
+from slurmio import Squeue
+from slurmio.__main__ import SQUEUE_FIELDS, format_squeue
+from slurmio.slurm import _build
+
+
+def bench_format_squeue(run: Callable, squeue_payload: str) -> None:
+    jobs = list(_build(Squeue, json.loads(squeue_payload)["jobs"], SQUEUE_FIELDS))
+    run(format_squeue, jobs)
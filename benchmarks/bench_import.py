@@ -0,0 +1,26 @@
+# -*- coding: utf-8 -*-
+# Author: Dylan Jones
+# Date:   2026-10-17
+
+"""Import time of slurmio, which dominates the startup of the CLI."""
+
+import subprocess
+import sys
+from typing import Any
+
+
+def _python(code: str) -> None:
+    subprocess.run([sys.executable, "-c", code], check=True)
+
+
+def bench_import_baseline(benchmark: Any) -> None:
+    benchmark.pedantic(_python, args=("pass",), rounds=20, warmup_rounds=1)
+
+
+def bench_import_slurmio(benchmark: Any) -> None:
+    benchmark.pedantic(_python, args=("import slurmio",), rounds=20, warmup_rounds=1)
+
+
+def bench_import_cli(benchmark: Any) -> None:
+    code = "import slurmio.__main__"
+    benchmark.pedantic(_python, args=(code,), rounds=20, warmup_rounds=1)
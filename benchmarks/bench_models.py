@@ -0,0 +1,31 @@
+# -*- coding: utf-8 -*-
+# Author: Dylan Jones
+# Date:   2026-10-17
+
+"""Construction of the `Squeue` and `Sacct` models from decoded job records."""
+
+import json
+from typing import Any, Callable, Dict, List
+
+from slurmio import Sacct, Squeue
+from slurmio.__main__ import SQUEUE_FIELDS
+from slurmio.slurm import _build
+
+
+def _construct(model: type, jobs: List[Dict[str, Any]]) -> list:
+    return [model(**job) for job in jobs]
+
+
+def bench_squeue_models(run: Callable, squeue_payload: str) -> None:
+    jobs = json.loads(squeue_payload)["jobs"]
+    run(_construct, Squeue, jobs)
+
+
+def bench_sacct_models(run: Callable, sacct_payload: str) -> None:
+    jobs = json.loads(sacct_payload)["jobs"]
+    run(_construct, Sacct, jobs)
+
+
+def bench_squeue_projection(run: Callable, squeue_payload: str) -> None:
+    jobs = json.loads(squeue_payload)["jobs"]
+    run(lambda: list(_build(Squeue, jobs, SQUEUE_FIELDS)))
@@ -0,0 +1,22 @@
+# -*- coding: utf-8 -*-
+# Author: Dylan Jones
+# Date:   2026-10-17
+
+"""Decoding of the JSON output of squeue and sacct."""
+
+import json
+from typing import Callable
+
+from slurmio.backends import _load_jobs
+
+
+def bench_json_loads_squeue(run: Callable, squeue_payload: str) -> None:
+    run(json.loads, squeue_payload)
+
+
+def bench_json_loads_sacct(run: Callable, sacct_payload: str) -> None:
+    run(json.loads, sacct_payload)
+
+
+def bench_load_jobs_squeue(run: Callable, squeue_payload: str) -> None:
+    run(_load_jobs, squeue_payload)
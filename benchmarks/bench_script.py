@@ -0,0 +1,94 @@
+# -*- coding: utf-8 -*-
+# Author: Dylan Jones
+# Date:   2026-10-17
+
+"""Parsing and serialization of large slurm scripts."""
+
+from pathlib import Path
+from typing import Callable
+
+import pytest
+
+from slurmio import SlurmScript, SlurmTemplate, dump_many, load_many
+
+OPTIONS = {
+    "job_name": "bench",
+    "partition": "cpu",
+    "account": "account",
+    "time": "1-00:00:00",
+    "mem": "4G",
+    "nodes": "1",
+    "ntasks": "16",
+    "cpus_per_task": "2",
+    "output": "slurm-%j.out",
+    "mail_type": "END,FAIL",
+}
+
+
+def _script(lines: int) -> str:
+    script = SlurmScript(**OPTIONS)
+    for i in range(lines):
+        script.add_cmd(f"srun python run.py --index {i} --out data/{i}.h5", f"task {i}")
+    return script.dumps()
+
+
+@pytest.fixture
+def script_text(size: int) -> str:
+    """A slurm script with `size` command lines."""
+    return _script(size)
+
+
+def bench_script_loads(run: Callable, script_text: str) -> None:
+    run(SlurmScript().loads, script_text)
+
+
+def bench_script_dumps(run: Callable, script_text: str) -> None:
+    script = SlurmScript()
+    script.loads(script_text)
+    run(script.dumps)
+
+
+@pytest.fixture
+def script_tree(tmp_path: Path, size: int) -> Path:
+    """A directory tree of `size // 10` scripts with 50 command lines each."""
+    text = _script(50)
+    for i in range(size // 10):
+        directory = tmp_path / f"d{i // 1000}"
+        directory.mkdir(exist_ok=True)
+        (directory / f"{i}.slurm").write_text(text)
+    return tmp_path
+
+
+def bench_load_many(run: Callable, script_tree: Path) -> None:
+    run(load_many, script_tree)
+
+
+def bench_load_many_options(run: Callable, script_tree: Path) -> None:
+    run(lambda root: load_many(root, options_only=True), script_tree)
+
+
+def _sweep_script(i: int) -> str:
+    script = SlurmScript(**OPTIONS)
+    script.options.update(job_name=f"sweep-{i}", output=f"logs/{i}.out")
+    script.add_cmd(f"srun python run.py --seed {i} --out data/{i}.h5", "run")
+    return script.dumps()
+
+
+def bench_sweep_scripts(run: Callable, size: int) -> None:
+    run(lambda n: [_sweep_script(i) for i in range(n)], size)
+
+
+def bench_sweep_template(run: Callable, size: int) -> None:
+    script = SlurmScript(**OPTIONS)
+    script.options.update(job_name="sweep-{{i}}", output="logs/{{i}}.out")
+    script.add_cmd("srun python run.py --seed {{i}} --out data/{{i}}.h5", "run")
+    template = SlurmTemplate(script)
+    run(lambda n: list(template.render_many({"i": i} for i in range(n))), size)
+
+
+def bench_dump_many_unchanged(run: Callable, tmp_path: Path, size: int) -> None:
+    text = _script(50)
+    files = {tmp_path / f"d{i // 1000}" / f"{i}.slurm": text for i in range(size // 10)}
+    manifest = tmp_path / "manifest.json"
+    dump_many(files, manifest=manifest)
+    run(lambda: dump_many(files, manifest=manifest))
@@ -0,0 +1,49 @@
+# -*- coding: utf-8 -*-
+# Author: Dylan Jones
+# Date:   2026-10-17
+
+"""Speedups of `slurmio.speedups` compared to the plain standard library path."""
+
+import json
+from typing import Any, Callable, Dict, List
+
+import pytest
+
+from slurmio import Squeue, speedups
+
+
+def _available(name: str) -> bool:
+    try:
+        speedups._get_loads(name)
+    except ImportError:
+        return False
+    return True
+
+
+DECODERS = [name for name in speedups.DECODERS if _available(name)]
+
+
+@pytest.fixture(params=DECODERS)
+def decoder(request: pytest.FixtureRequest) -> Callable:
+    return speedups._get_loads(request.param)
+
+
+def _build(jobs: List[Dict[str, Any]]) -> List[Squeue]:
+    return [Squeue(**job) for job in jobs]
+
+
+def _build_gc_paused(jobs: List[Dict[str, Any]]) -> List[Squeue]:
+    with speedups.gc_paused():
+        return [Squeue(**job) for job in jobs]
+
+
+def bench_decode(run: Callable, decoder: Callable, squeue_payload: str) -> None:
+    run(decoder, squeue_payload)
+
+
+def bench_build(run: Callable, squeue_payload: str) -> None:
+    run(_build, json.loads(squeue_payload)["jobs"])
+
+
+def bench_build_gc_paused(run: Callable, squeue_payload: str) -> None:
+    run(_build_gc_paused, json.loads(squeue_payload)["jobs"])
@@ -0,0 +1,67 @@
+# -*- coding: utf-8 -*-
+# Author: Dylan Jones
+# Date:   2026-10-17
+
+"""Shared fixtures of the benchmarks.
+
+The job records are generated by the simulated cluster of `slurmio.testing`, so
+they have the schema of the real squeue and sacct JSON output. The benchmarked
+queue sizes can be set with the `SLURMIO_BENCH_SIZES` environment variable, for
+example `SLURMIO_BENCH_SIZES=1000,10000`.
+"""
+
+import json
+import os
+from functools import lru_cache
+from typing import Any, Callable, Dict, List
+
+import pytest
+
+from slurmio.testing import FakeCluster
+
+SIZES = [
+    int(x)
+    for x in os.environ.get("SLURMIO_BENCH_SIZES", "1000,10000,100000").split(",")
+]
+
+
+@lru_cache(maxsize=None)
+def _records() -> Dict[str, List[Dict[str, Any]]]:
+    # Long durations keep the queue stable while the benchmarks run
+    cluster = FakeCluster(jobs=max(SIZES), pending=1e6, runtime=1e7, seed=0)
+    return {"squeue": cluster.squeue(), "sacct": cluster.sacct(all_users=True)}
+
+
+@lru_cache(maxsize=None)
+def _payload(command: str, size: int) -> str:
+    jobs = _records()[command][:size]
+    return json.dumps({"jobs": jobs, "errors": [], "warnings": []})
+
+
+@pytest.fixture(params=SIZES, ids=lambda size: f"{size // 1000}k")
+def size(request: pytest.FixtureRequest) -> int:
+    return request.param
+
+
+@pytest.fixture
+def squeue_payload(size: int) -> str:
+    """`squeue --json` output with `size` jobs."""
+    return _payload("squeue", size)
+
+
+@pytest.fixture
+def sacct_payload(size: int) -> str:
+    """`sacct --json` output with `size` jobs."""
+    return _payload("sacct", size)
+
+
+@pytest.fixture
+def run(benchmark: Any, size: int) -> Callable:
+    """Benchmark a function with a number of rounds adapted to the queue size."""
+    benchmark.extra_info["jobs"] = size
+    rounds = min(50, max(3, 200_000 // size))
+
+    def run(func: Callable, *args) -> Any:
+        return benchmark.pedantic(func, args=args, rounds=rounds, warmup_rounds=1)
+
+    return run
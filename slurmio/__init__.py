@@ -4,7 +4,29 @@
 
 """SLURM file handler and job manager."""
 
+from .arrays import ArrayJob, collapse_arrays
+from .backends import Backend, SubprocessBackend, get_backend, set_backend
+from .bulk import sbatch_many
+from .cache import SnapshotCache
+from .events import JobEvent, watch
+from .history import JobHistory
+from .journal import SubmissionJournal
 from .models import Options, Sacct, Squeue
 from .options import SlurmOptions
-from .script import SlurmCommand, SlurmScript
-from .slurm import SlurmJob, rm_slurm_files, sacct, sbatch, scancel, squeue
+from .script import SlurmCommand, SlurmScript, load_many
+from .slurm import (
+    SlurmJob,
+    SubmittedJob,
+    iter_sacct,
+    iter_squeue,
+    rm_slurm_files,
+    sacct,
+    sbatch,
+    scancel,
+    scancel_many,
+    squeue,
+)
+from .table import JobTable, sacct_table, squeue_table
+from .template import SlurmTemplate
+from .workflow import Workflow, WorkflowNode
+from .writer import WriteResult, dump_many
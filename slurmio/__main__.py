@@ -9,9 +9,24 @@ from typing import List
 import click
 
 import slurmio
+from slurmio import metrics
 from slurmio.models import Squeue
 from slurmio.utility import get_user, padstr
 
+# Fields of the `Squeue` model used by the CLI commands
+SQUEUE_FIELDS = [
+    "job_id",
+    "name",
+    "user_name",
+    "job_state",
+    "start_time",
+    "memory_per_node",
+    "partition",
+    "nodes",
+    "node_count",
+    "tasks",
+]
+
 
 class AliasedGroup(click.Group):
     def command(self, *args, **kwargs):
@@ -79,15 +94,37 @@ def format_squeue(jobs: List[Squeue], maxw: int = 20):
 
 
 @click.group(name="slurmio", cls=AliasedGroup)
-def cli():
-    pass
+@click.option(
+    "--profile", is_flag=True, help="Print the time spent per Slurm command and phase"
+)
+@click.pass_context
+def cli(ctx: click.Context, profile: bool):
+    if profile:
+        metrics.registry.reset()
+        ctx.call_on_close(lambda: click.echo(metrics.registry.report(), err=True))
 
 
 @cli.command(["squeue", "squ"])
 @click.option("--me", "-m", is_flag=True, help="Show only my jobs", default=False)
 @click.option("--user", "-u", help="Filter jobs by user", default=None)
-@click.option("--job_id", "-i", help="Filter jobs by job id", default=None)
-def squeue(me: bool, user: str, job_id: str):
+@click.option("--job_id", "-i", help="Filter jobs by job id(s)", default=None)
+@click.option("--states", "-t", help="Filter jobs by state(s)", default=None)
+@click.option("--partition", "-p", help="Filter jobs by partition(s)", default=None)
+@click.option("--name", "-n", help="Filter jobs by name(s)", default=None)
+@click.option("--account", "-A", help="Filter jobs by account(s)", default=None)
+@click.option("--qos", "-q", help="Filter jobs by quality of service", default=None)
+@click.option("--nodelist", "-w", help="Filter jobs by node(s)", default=None)
+def squeue(
+    me: bool,
+    user: str,
+    job_id: str,
+    states: str,
+    partition: str,
+    name: str,
+    account: str,
+    qos: str,
+    nodelist: str,
+):
     delim = " | "
     maxw = 20
     header_line = False
@@ -101,7 +138,17 @@ def squeue(me: bool, user: str, job_id: str):
         user = get_user()
 
     try:
-        jobs = slurmio.squeue(user=user, job_id=job_id)
+        jobs = slurmio.squeue(
+            user=user,
+            job_id=job_id,
+            states=states,
+            partition=partition,
+            name=name,
+            account=account,
+            qos=qos,
+            nodelist=nodelist,
+            fields=SQUEUE_FIELDS,
+        )
     except Exception as e:
         raise click.ClickException(str(e))
 
@@ -137,7 +184,7 @@ def squeue(me: bool, user: str, job_id: str):
 def showdirs():
     user = get_user()
     try:
-        jobs = slurmio.squeue(user=user)
+        jobs = slurmio.squeue(user=user, fields=["name", "current_working_directory"])
     except Exception as e:
         raise click.ClickException(str(e))
 
@@ -155,5 +202,102 @@ def showdirs():
         click.echo(header + click.style(cwd, fg="yellow"))
 
 
+@cli.command("clean")
+@click.argument("roots", nargs=-1)
+@click.option("--recursive", "-r", is_flag=True, help="Clean up subdirectories too")
+@click.option("--older-than", "-o", help="Minimal age of the files, e.g. 7d or 12h")
+@click.option("--min-size", help="Minimal size of the files, e.g. 10M")
+@click.option("--max-size", help="Maximal size of the files, e.g. 1G")
+@click.option("--min-id", type=int, help="Minimal job id")
+@click.option("--max-id", type=int, help="Maximal job id")
+@click.option("--states", "-t", help="Only files of jobs in these state(s)")
+@click.option("--archive", "-a", help="Archive the files to this tarball first")
+@click.option("--dry-run", "-n", is_flag=True, help="Only show what would be removed")
+@click.option("--workers", "-j", default=16, help="Number of parallel workers")
+def clean(
+    roots: List[str],
+    recursive: bool,
+    older_than: str,
+    min_size: str,
+    max_size: str,
+    min_id: int,
+    max_id: int,
+    states: str,
+    archive: str,
+    dry_run: bool,
+    workers: int,
+):
+    from slurmio.cleanup import cleanup
+
+    try:
+        result = cleanup(
+            list(roots) or ".",
+            recursive=recursive,
+            older_than=older_than,
+            min_size=min_size,
+            max_size=max_size,
+            min_id=min_id,
+            max_id=max_id,
+            states=states,
+            dry_run=dry_run,
+            archive=archive,
+            max_workers=workers,
+        )
+    except Exception as e:
+        raise click.ClickException(str(e))
+    for path, error in result.errors:
+        click.echo(click.style(f"{path}: {error}", fg="red"), err=True)
+    click.echo(str(result))
+
+
+@cli.command("logs")
+@click.argument("job_ids", nargs=-1)
+@click.option("--follow", "-f", is_flag=True, help="Follow the output as it grows")
+@click.option("--me", "-m", is_flag=True, help="Show only my jobs", default=False)
+@click.option("--user", "-u", help="Filter jobs by user", default=None)
+@click.option("--name", "-n", help="Filter jobs by name(s)", default=None)
+@click.option("--lines", "-l", help="Number of lines to show", default=10)
+@click.option("--stderr", "-e", is_flag=True, help="Show the error files instead")
+def logs(
+    job_ids: List[str],
+    follow: bool,
+    me: bool,
+    user: str,
+    name: str,
+    lines: int,
+    stderr: bool,
+):
+    from slurmio.logs import follow_jobs
+
+    if me:
+        if user:
+            raise click.BadOptionUsage(
+                "--me", "Cannot use --me and --user at the same time."
+            )
+        user = get_user()
+
+    colors = ["bright_blue", "green", "yellow", "magenta", "cyan", "red"]
+    styled = dict()
+    stream = follow_jobs(
+        lines=lines,
+        follow=follow,
+        stderr=stderr,
+        user=user,
+        job_id=list(job_ids) or None,
+        name=name,
+    )
+    try:
+        for key, line in stream:
+            prefix = styled.get(key)
+            if prefix is None:
+                color = colors[len(styled) % len(colors)]
+                prefix = styled[key] = click.style(f"[{key}]", fg=color)
+            click.echo(f"{prefix} {line}")
+    except KeyboardInterrupt:
+        pass
+    except Exception as e:
+        raise click.ClickException(str(e))
+
+
 if __name__ == "__main__":
     cli()
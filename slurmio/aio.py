@@ -0,0 +1,259 @@
+# -*- coding: utf-8 -*-
+# Author: Dylan Jones
+# Date:   2026-10-17
+
+"""Asyncio versions of the slurm commands.
+
+With the default `SubprocessBackend`, all commands run as child processes of the
+event loop via `asyncio.create_subprocess_exec` instead of blocking in
+`Popen.communicate()`. Cancelling a command kills its child process. Any other
+active backend (see `slurmio.set_backend`), for example the REST backend, is called
+in the default executor of the loop. The number of concurrently running commands
+is bounded by a semaphore, see `set_concurrency`.
+"""
+
+import asyncio
+import functools
+from pathlib import Path
+from subprocess import PIPE, SubprocessError
+from typing import Any, Callable, Dict, List, Mapping, Sequence, Union
+from weakref import WeakKeyDictionary
+
+from . import metrics
+from .backends import (
+    SubprocessBackend,
+    _load_jobs,
+    _parse_parsable,
+    _sacct_cmd,
+    _sbatch_args,
+    _squeue_cmd,
+    get_backend,
+)
+from .filters import Ids, Names, Time, _match_job_id
+from .models import Sacct, Squeue
+from .slurm import SubmittedJob, _build, _script_file
+from .speedups import gc_paused
+from .utility import which
+
+_concurrency: int = 64
+_semaphores: "WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]"
+_semaphores = WeakKeyDictionary()
+
+
+def set_concurrency(limit: int) -> None:
+    """Set the maximal number of concurrently running slurm commands per loop."""
+    global _concurrency
+    if limit < 1:
+        raise ValueError(f"Concurrency limit must be positive, got {limit}")
+    _concurrency = limit
+    _semaphores.clear()
+
+
+def _semaphore() -> asyncio.Semaphore:
+    loop = asyncio.get_running_loop()
+    semaphore = _semaphores.get(loop)
+    if semaphore is None:
+        semaphore = asyncio.Semaphore(_concurrency)
+        _semaphores[loop] = semaphore
+    return semaphore
+
+
+def _forks() -> bool:
+    """True if the commands are run as child processes of the event loop."""
+    return type(get_backend()) is SubprocessBackend
+
+
+async def _call(func: Callable, *args: Any, **kwargs: Any) -> Any:
+    """Call a blocking method of the active backend in the executor of the loop."""
+    async with _semaphore():
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            None, functools.partial(func, *args, **kwargs)
+        )
+
+
+async def _squeue_json(**filters: Any) -> List[Dict[str, Any]]:
+    if _forks():
+        return _load_jobs(await run(_squeue_cmd(**filters)))
+    return await _call(get_backend().squeue, **filters)
+
+
+async def _sacct_json(**filters: Any) -> List[Dict[str, Any]]:
+    if _forks():
+        return _load_jobs(await run(_sacct_cmd(**filters)))
+    return await _call(get_backend().sacct, **filters)
+
+
+async def run(cmd: List[str], stdin: str = None) -> str:
+    """Run a command and return the output or raise an exception if it fails.
+
+    Parameters
+    ----------
+    cmd : List[str]
+        The command to run as a list of strings.
+    stdin : str, optional
+        Data sent to the standard input of the command.
+
+    Returns
+    -------
+    str
+        The output of the command.
+
+    Raises
+    ------
+    Exception
+        If the command is not found.
+    SubprocessError
+        If the command fails.
+    """
+    async with _semaphore():
+        with metrics.phase("subprocess", cmd[0]) as rec:
+            try:
+                path = which(cmd[0])
+                if path is None:
+                    raise FileNotFoundError(cmd[0])
+                process = await asyncio.create_subprocess_exec(
+                    path,
+                    *cmd[1:],
+                    stdin=PIPE if stdin is not None else None,
+                    stdout=PIPE,
+                    stderr=PIPE,
+                )
+            except FileNotFoundError:
+                raise Exception("Command not found: " + " ".join(cmd))
+            data = stdin.encode("utf-8") if stdin is not None else None
+            try:
+                out, err = await process.communicate(data)
+            except asyncio.CancelledError:
+                if process.returncode is None:
+                    process.kill()
+                    await process.wait()
+                raise
+    if process.returncode:
+        raise SubprocessError(err.decode("utf-8"))
+    rec.bytes += len(out)
+    return out.decode("utf-8")
+
+
+async def squeue(
+    user: Names = None,
+    job_id: Ids = None,
+    states: Names = None,
+    partition: Names = None,
+    name: Names = None,
+    account: Names = None,
+    qos: Names = None,
+    nodelist: Names = None,
+    *,
+    fields: Sequence[str] = None,
+) -> List[Squeue]:
+    """Get a list of jobs from the squeue command (see `slurmio.squeue`)."""
+    filters = dict(
+        user=user,
+        job_id=job_id,
+        states=states,
+        partition=partition,
+        name=name,
+        account=account,
+        qos=qos,
+        nodelist=nodelist,
+    )
+    with metrics.call("squeue"):
+        jobs = await _squeue_json(**filters)
+        with metrics.phase("build"), gc_paused():
+            return list(_build(Squeue, jobs, fields))
+
+
+async def sacct(
+    user: Names = None,
+    job_id: Ids = None,
+    states: Names = None,
+    partition: Names = None,
+    name: Names = None,
+    account: Names = None,
+    qos: Names = None,
+    nodelist: Names = None,
+    start: Time = None,
+    end: Time = None,
+    all_users: bool = False,
+    *,
+    fields: Sequence[str] = None,
+) -> List[Sacct]:
+    """Get a list of jobs from the sacct command (see `slurmio.sacct`)."""
+    filters = dict(
+        user=user,
+        job_id=job_id,
+        states=states,
+        partition=partition,
+        name=name,
+        account=account,
+        qos=qos,
+        nodelist=nodelist,
+        start=start,
+        end=end,
+        all_users=all_users,
+    )
+    with metrics.call("sacct"):
+        jobs = await _sacct_json(**filters)
+        with metrics.phase("build"), gc_paused():
+            return list(_build(Sacct, jobs, fields))
+
+
+async def _wait_queued(
+    job_id: int, initial_delay: float = 0.05, max_delay: float = 2.0
+) -> Dict[str, Any]:
+    delay = initial_delay
+    while True:
+        await asyncio.sleep(delay)
+        jobs = await _squeue_json(job_id=job_id)
+        for job in jobs:
+            if _match_job_id(job, str(job_id)):
+                return job
+        delay = min(2 * delay, max_delay)
+
+
+async def sbatch(
+    file_or_script: Union[str, Path],
+    wait: bool = True,
+    timeout: float = None,
+    hold: bool = False,
+    dependency: Union[str, Ids] = None,
+    export: Union[str, Sequence[str], Mapping[str, str]] = None,
+    args: Sequence[str] = None,
+) -> Union[Squeue, SubmittedJob]:
+    """Submit a slurm job (see `slurmio.sbatch`).
+
+    Inline scripts are sent to sbatch via the standard input. If `wait` is True, the
+    queue is polled with exponential backoff until the job shows up.
+    """
+    with metrics.call("sbatch"):
+        options = _sbatch_args(hold, dependency, export, args)
+        file = _script_file(file_or_script)
+        if not _forks():
+            backend = get_backend()
+            if file is not None:
+                result = await _call(backend.sbatch, file=file, args=options)
+            else:
+                result = await _call(
+                    backend.sbatch, script=file_or_script, args=options
+                )
+            submitted = SubmittedJob(*result)
+        else:
+            cmd = ["sbatch", "--parsable"] + options
+            if file is not None:
+                stdout = await run(cmd + [str(file)])
+            else:
+                stdout = await run(cmd, stdin=file_or_script)
+            submitted = SubmittedJob(*_parse_parsable(stdout))
+        if not wait:
+            return submitted
+        job = await asyncio.wait_for(_wait_queued(submitted.job_id), timeout)
+        return Squeue(**job)
+
+
+async def scancel(job_id: Union[int, str]) -> str:
+    """Cancel a slurm job and return the output (see `slurmio.scancel`)."""
+    with metrics.call("scancel"):
+        if not _forks():
+            return await _call(get_backend().scancel, [str(job_id)])
+        return await run(["scancel", str(job_id)])
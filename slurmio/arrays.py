@@ -0,0 +1,161 @@
+# -*- coding: utf-8 -*-
+# Author: Dylan Jones
+# Date:   2026-10-17
+
+"""Collapse parameter sweeps of slurm scripts into job arrays."""
+
+import re
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Sequence, Tuple, Union
+
+from .script import SlurmCommand, SlurmScript
+from .slurm import Squeue, SubmittedJob
+
+# A shell word: unquoted characters, escaped characters or quoted strings
+RE_WORD = re.compile(r"""(?:[^\s"'\\]|\\.|"(?:[^"\\]|\\.)*"|'[^']*')+""")
+
+TASK_ID = "$SLURM_ARRAY_TASK_ID"
+
+
+@dataclass
+class ArrayJob:
+    """A job array replacing a group of slurm scripts.
+
+    Attributes
+    ----------
+    script : SlurmScript
+        The generated script with the `--array` option.
+    indices : List[int]
+        The index of the original script for each array task id.
+    params : List[Dict[str, str]]
+        The generated parameter table. Maps the parameter names used in the script
+        to the shell word of the original script for each array task id.
+    """
+
+    script: SlurmScript
+    indices: List[int] = field(default_factory=list)
+    params: List[Dict[str, str]] = field(default_factory=list)
+
+    def __len__(self) -> int:
+        return len(self.indices)
+
+    def original(self, task_id: Union[int, str]) -> int:
+        """Return the index of the original script of an array task."""
+        return self.indices[int(task_id)]
+
+    def sbatch(
+        self, wait: bool = True, timeout: float = None, **kwargs
+    ) -> Union[Squeue, SubmittedJob]:
+        """Submit the job array (see `slurmio.sbatch`)."""
+        return self.script.sbatch(wait=wait, timeout=timeout, **kwargs)
+
+
+def _split_words(cmd: str) -> Tuple[List[str], List[str]]:
+    """Split a command into shell words and the separators around them."""
+    words, seps = list(), list()
+    pos = 0
+    for match in RE_WORD.finditer(cmd):
+        seps.append(cmd[pos : match.start()])
+        words.append(match.group())
+        pos = match.end()
+    seps.append(cmd[pos:])
+    return words, seps
+
+
+def _group_key(
+    script: SlurmScript, ignore: Sequence[str], words: List[List[str]]
+) -> tuple:
+    options = tuple((k, v) for k, v in script.options.items() if k not in ignore)
+    skeleton = tuple((len(w), cmd.comment) for w, cmd in zip(words, script.commands))
+    return script.shell, options, skeleton
+
+
+def _build_array(
+    scripts: List[SlurmScript],
+    words: List[List[List[str]]],
+    indices: List[int],
+    throttle: int = None,
+) -> ArrayJob:
+    first = scripts[0]
+    n = len(scripts)
+    array = SlurmScript(shell=first.shell)
+    array.options.update(first.options)
+    array.options["array"] = f"0-{n - 1}" + (f"%{throttle}" if throttle else "")
+
+    params: List[Dict[str, str]] = [dict() for _ in range(n)]
+    num_params = 0
+    for i, cmd in enumerate(first.commands):
+        cmd_words, seps = _split_words(cmd.cmd)
+        declarations = list()
+        for j in range(len(cmd_words)):
+            values = [w[i][j] for w in words]
+            if all(v == values[0] for v in values):
+                continue
+            name = f"P{num_params}"
+            num_params += 1
+            for task, value in enumerate(values):
+                params[task][name] = value
+            # The parameter table is declared right before the command using it,
+            # so the words are expanded by the shell just like in the original
+            declarations.append(f"{name}=({' '.join(values)})")
+            cmd_words[j] = f'"${{{name}[{TASK_ID}]}}"'
+        for declaration in declarations:
+            array.commands.append(SlurmCommand(declaration))
+        line = "".join(s + w for s, w in zip(seps, cmd_words)) + seps[-1]
+        array.commands.append(SlurmCommand(line, cmd.comment))
+    return ArrayJob(array, list(indices), params)
+
+
+def collapse_arrays(
+    scripts: Iterable[SlurmScript],
+    max_size: int = 1000,
+    throttle: int = None,
+    ignore_options: Sequence[str] = (),
+) -> List[ArrayJob]:
+    """Collapse slurm scripts differing only in command-line words into job arrays.
+
+    Scripts with the same options, shell and command structure are grouped. The
+    shell words differing between the scripts of a group are replaced by a lookup
+    in a generated parameter table indexed by `$SLURM_ARRAY_TASK_ID`. Varying words
+    are taken literally, they should not contain unquoted glob patterns.
+
+    Parameters
+    ----------
+    scripts : Iterable[SlurmScript]
+        The scripts to collapse.
+    max_size : int, optional
+        The maximal number of tasks per array. Should not exceed the `MaxArraySize`
+        of the cluster. Defaults to 1000.
+    throttle : int, optional
+        The maximal number of simultaneously running tasks of each array.
+    ignore_options : Sequence[str], optional
+        Option keys that may differ between scripts of one array, for example
+        "job_name". The value of the first script of a group is used.
+
+    Returns
+    -------
+    List[ArrayJob]
+        The job arrays. Each keeps the mapping of array task ids to the indices of
+        the original scripts.
+    """
+    ignore = [k.replace("-", "_") for k in ignore_options]
+    groups: Dict[tuple, List[int]] = OrderedDict()
+    scripts = list(scripts)
+    words = list()
+    for index, script in enumerate(scripts):
+        if "array" in script.options:
+            raise ValueError(f"Script {index} already is a job array")
+        script_words = [_split_words(cmd.cmd)[0] for cmd in script.commands]
+        words.append(script_words)
+        key = _group_key(script, ignore, script_words)
+        groups.setdefault(key, list()).append(index)
+
+    arrays = list()
+    for indices in groups.values():
+        for start in range(0, len(indices), max_size):
+            chunk = indices[start : start + max_size]
+            group_scripts = [scripts[i] for i in chunk]
+            group_words = [words[i] for i in chunk]
+            arrays.append(_build_array(group_scripts, group_words, chunk, throttle))
+    return arrays
@@ -0,0 +1,309 @@
+# -*- coding: utf-8 -*-
+# Author: Dylan Jones
+# Date:   2026-10-17
+
+"""Transport backends used to talk to Slurm.
+
+All job management functions of slurmio (`squeue`, `sacct`, `sbatch`, `scancel`, ...)
+go through the active backend, see `get_backend` and `set_backend`. The default
+`SubprocessBackend` runs the Slurm command line tools. The `RestBackend` in
+`slurmio.rest` talks to slurmrestd over pooled HTTP connections instead.
+"""
+
+import os
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Mapping, Sequence, Tuple, Union
+
+from . import metrics
+from .filters import Ids, Names, Time, _join
+from .jsonstream import JSONArrayStream
+from .speedups import gc_paused, loads
+from .utility import iter_output, run
+
+Jobs = List[Dict[str, Any]]
+
+
+def _load_jobs(out: str) -> List[Dict[str, Any]]:
+    with metrics.phase("decode") as rec, gc_paused():
+        raw = loads(out)
+    errors = raw["errors"]
+    if errors:
+        raise Exception(errors)
+    rec.jobs += len(raw["jobs"])
+    return raw["jobs"]
+
+
+def _parse_parsable(stdout: str) -> Tuple[int, str]:
+    """Parse the output of `sbatch --parsable` to the job id and cluster name."""
+    job_id, _, cluster = stdout.strip().partition(";")
+    try:
+        return int(job_id), cluster or None
+    except ValueError:
+        raise Exception(f"Could not parse sbatch output: {stdout}")
+
+
+def _squeue_cmd(
+    user: Names = None,
+    job_id: Ids = None,
+    states: Names = None,
+    partition: Names = None,
+    name: Names = None,
+    account: Names = None,
+    qos: Names = None,
+    nodelist: Names = None,
+) -> List[str]:
+    cmd = ["squeue", "--json"]
+    for flag, value in (
+        ("--user", user),
+        ("--jobs", job_id),
+        ("--states", states),
+        ("--partition", partition),
+        ("--name", name),
+        ("--account", account),
+        ("--qos", qos),
+        ("--nodelist", nodelist),
+    ):
+        if value:
+            cmd.append(f"{flag}={_join(value)}")
+    return cmd
+
+
+def _sacct_cmd(
+    user: Names = None,
+    job_id: Ids = None,
+    states: Names = None,
+    partition: Names = None,
+    name: Names = None,
+    account: Names = None,
+    qos: Names = None,
+    nodelist: Names = None,
+    start: Time = None,
+    end: Time = None,
+    all_users: bool = False,
+) -> List[str]:
+    cmd = ["sacct", "--json"]
+    if all_users:
+        cmd.append("--allusers")
+    for flag, value in (
+        ("--user", user),
+        ("--jobs", job_id),
+        ("--state", states),
+        ("--partition", partition),
+        ("--name", name),
+        ("--account", account),
+        ("--qos", qos),
+        ("--nodelist", nodelist),
+    ):
+        if value:
+            cmd.append(f"{flag}={_join(value)}")
+    for flag, value in (("--starttime", start), ("--endtime", end)):
+        if value is not None:
+            if isinstance(value, datetime):
+                value = value.strftime("%Y-%m-%dT%H:%M:%S")
+            cmd.append(f"{flag}={value}")
+    return cmd
+
+
+def _sbatch_args(
+    hold: bool = False,
+    dependency: Union[str, Ids] = None,
+    export: Union[str, Sequence[str], Mapping[str, str]] = None,
+    args: Sequence[str] = None,
+) -> List[str]:
+    """Build the command line options of sbatch (without `--parsable`)."""
+    options = list()
+    if hold:
+        options.append("--hold")
+    if dependency:
+        if not isinstance(dependency, str) or dependency.isdigit():
+            # Plain job ids: start after all of them completed successfully
+            dependency = "afterok:" + _join(dependency).replace(",", ":")
+        options.append(f"--dependency={dependency}")
+    if export is not None:
+        if isinstance(export, Mapping):
+            export = ["ALL"] + [f"{k}={v}" for k, v in export.items()]
+        options.append(f"--export={_join(export)}")
+    if args:
+        options.extend(args)
+    return options
+
+
+def _chunk_joined(ids: Iterable[str], limit: int = 100_000) -> Iterator[List[str]]:
+    """Split ids into chunks whose comma-joined length stays below a limit.
+
+    Filters like `--jobs=a,b,...` are passed as a single argument, which Linux
+    limits to 128 KiB (MAX_ARG_STRLEN) independent of the total argument size.
+    """
+    chunk, size = list(), 0
+    for value in ids:
+        n = len(value) + 1
+        if chunk and size + n > limit:
+            yield chunk
+            chunk, size = list(), 0
+        chunk.append(value)
+        size += n
+    if chunk:
+        yield chunk
+
+
+def _chunk_args(args: Sequence[str], reserved: int = 0) -> Iterator[List[str]]:
+    """Split arguments into chunks fitting into the argument size limit of the OS."""
+    try:
+        arg_max = os.sysconf("SC_ARG_MAX")
+    except (ValueError, OSError, AttributeError):  # pragma: no cover
+        arg_max = 1 << 17
+    env_size = sum(len(k) + len(v) + 2 + 8 for k, v in os.environ.items())
+    # Keep a safety margin for the command itself and the argument pointers
+    limit = max(arg_max - env_size - reserved - 4096, 4096)
+    chunk, size = list(), 0
+    for arg in args:
+        n = len(arg.encode("utf-8")) + 1 + 8
+        if chunk and size + n > limit:
+            yield chunk
+            chunk, size = list(), 0
+        chunk.append(arg)
+        size += n
+    if chunk:
+        yield chunk
+
+
+class Backend(ABC):
+    """Interface of the transport used to talk to Slurm.
+
+    The query methods return the raw job records in the format of the squeue and
+    sacct JSON output, which are used to build the `Squeue` and `Sacct` models. The
+    filters accepted by `squeue` and `sacct` are the same as the ones of
+    `slurmio.squeue` and `slurmio.sacct`.
+    """
+
+    @abstractmethod
+    def squeue(self, **filters) -> Jobs:
+        """Return the raw job records of the queue."""
+
+    @abstractmethod
+    def sacct(self, **filters) -> Jobs:
+        """Return the raw job records of the accounting database."""
+
+    def iter_squeue(self, **filters) -> Iterator[Dict[str, Any]]:
+        """Iterate over the raw job records of the queue."""
+        return iter(self.squeue(**filters))
+
+    def iter_sacct(self, **filters) -> Iterator[Dict[str, Any]]:
+        """Iterate over the raw job records of the accounting database."""
+        return iter(self.sacct(**filters))
+
+    @abstractmethod
+    def sbatch(
+        self, script: str = None, file: Path = None, args: Sequence[str] = None
+    ) -> Tuple[int, str]:
+        """Submit a job script or script file, return the job id and cluster name.
+
+        `args` are additional sbatch command line options like `--hold`, which take
+        precedence over the #SBATCH options of the script.
+        """
+
+    @abstractmethod
+    def scancel(
+        self, job_ids: Sequence[str] = None, max_workers: int = 1, **filters
+    ) -> str:
+        """Cancel jobs by id and/or the native scancel filters of `scancel_many`."""
+
+
+def _iter_jobs(cmd: List[str]) -> Iterator[Dict[str, Any]]:
+    stream = JSONArrayStream(iter_output(cmd), "jobs")
+    checked = False
+    for job in stream:
+        if not checked:
+            if stream.values.get("errors"):
+                raise Exception(stream.values["errors"])
+            checked = True
+        yield job
+    if stream.values.get("errors"):
+        raise Exception(stream.values["errors"])
+
+
+# Native scancel flags of the filters of `Backend.scancel`
+SCANCEL_FLAGS = {
+    "job_name": "--name",
+    "state": "--state",
+    "partition": "--partition",
+    "user": "--user",
+    "account": "--account",
+    "qos": "--qos",
+}
+
+
+class SubprocessBackend(Backend):
+    """Backend running the Slurm command line tools as subprocesses.
+
+    Parameters
+    ----------
+    timeout : float, optional
+        Maximal time in seconds a command may run before it is killed. The default
+        is no timeout.
+    """
+
+    def __init__(self, timeout: float = None):
+        self.timeout = timeout
+
+    def squeue(self, **filters) -> Jobs:
+        return _load_jobs(run(_squeue_cmd(**filters), timeout=self.timeout))
+
+    def sacct(self, **filters) -> Jobs:
+        return _load_jobs(run(_sacct_cmd(**filters), timeout=self.timeout))
+
+    def iter_squeue(self, **filters) -> Iterator[Dict[str, Any]]:
+        return _iter_jobs(_squeue_cmd(**filters))
+
+    def iter_sacct(self, **filters) -> Iterator[Dict[str, Any]]:
+        return _iter_jobs(_sacct_cmd(**filters))
+
+    def sbatch(
+        self, script: str = None, file: Path = None, args: Sequence[str] = None
+    ) -> Tuple[int, str]:
+        cmd = ["sbatch", "--parsable"] + list(args or ())
+        if file is not None:
+            stdout = run(cmd + [str(file)], timeout=self.timeout)
+        else:
+            # The script is piped to sbatch directly, no shell is involved
+            stdout = run(cmd, input=script, timeout=self.timeout)
+        return _parse_parsable(stdout)
+
+    def scancel(
+        self, job_ids: Sequence[str] = None, max_workers: int = 1, **filters
+    ) -> str:
+        cmd = ["scancel"]
+        cmd += [f"{SCANCEL_FLAGS[k]}={v}" for k, v in filters.items() if v is not None]
+        if not job_ids:
+            return run(cmd, timeout=self.timeout)
+
+        def _run(chunk: List[str]) -> str:
+            return run(cmd + chunk, timeout=self.timeout)
+
+        # Pack the ids into as few calls as the argument size limit allows
+        reserved = sum(len(arg) + 9 for arg in cmd)
+        chunks = list(_chunk_args([str(x) for x in job_ids], reserved))
+        if max_workers > 1 and len(chunks) > 1:
+            with ThreadPoolExecutor(max_workers) as executor:
+                outputs = list(executor.map(_run, chunks))
+        else:
+            outputs = [_run(chunk) for chunk in chunks]
+        return "".join(outputs)
+
+
+_backend: Backend = SubprocessBackend()
+
+
+def get_backend() -> Backend:
+    """Return the active backend."""
+    return _backend
+
+
+def set_backend(backend: Backend) -> Backend:
+    """Set the active backend and return the previous one."""
+    global _backend
+    previous, _backend = _backend, backend
+    return previous
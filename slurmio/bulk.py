@@ -0,0 +1,165 @@
+# -*- coding: utf-8 -*-
+# Author: Dylan Jones
+# Date:   2026-10-17
+
+"""Concurrent bulk submission of slurm scripts."""
+
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from time import monotonic
+from typing import Deque, Iterable, Iterator, List, Union
+
+from .script import SlurmScript
+from .slurm import SubmittedJob, sbatch
+from .utility import RateLimiter
+
+Submittable = Union[SlurmScript, str, Path]
+
+
+@dataclass
+class SubmitResult:
+    """Result of submitting a single script of a bulk submission."""
+
+    index: int
+    script: Submittable
+    job: SubmittedJob = None
+    error: Exception = None
+    elapsed: float = 0.0
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+    @property
+    def job_id(self) -> int:
+        return self.job.job_id if self.job is not None else None
+
+
+@dataclass
+class SubmitStats:
+    """Throughput numbers of a bulk submission."""
+
+    submitted: int = 0
+    failed: int = 0
+    elapsed: float = 0.0
+    busy: float = 0.0
+
+    @property
+    def total(self) -> int:
+        return self.submitted + self.failed
+
+    @property
+    def rate(self) -> float:
+        """Number of handled scripts per second."""
+        return self.total / self.elapsed if self.elapsed else 0.0
+
+    @property
+    def latency(self) -> float:
+        """Mean time of a single sbatch call in seconds."""
+        return self.busy / self.total if self.total else 0.0
+
+    def __str__(self) -> str:
+        return (
+            f"{self.submitted} submitted, {self.failed} failed in "
+            f"{self.elapsed:.2f}s ({self.rate:.1f}/s, {1000 * self.latency:.1f}ms "
+            f"per sbatch call)"
+        )
+
+
+class BulkSubmission:
+    """Iterator over the results of a bulk submission in input order.
+
+    The scripts are submitted while iterating. At most `max_workers` sbatch calls
+    run at the same time and a bounded number of results is buffered, so the input
+    iterable is consumed lazily.
+    """
+
+    def __init__(
+        self,
+        scripts: Iterable[Submittable],
+        max_workers: int = 8,
+        rate: float = None,
+    ):
+        self._scripts = iter(scripts)
+        self._max_workers = max_workers
+        self._limiter = RateLimiter(rate) if rate else None
+        self._started: float = None
+        self.stats = SubmitStats()
+
+    def _submit(self, index: int, script: Submittable) -> SubmitResult:
+        if self._limiter is not None:
+            self._limiter.acquire()
+        t0 = monotonic()
+        try:
+            if isinstance(script, SlurmScript):
+                job = script.sbatch(wait=False)
+            else:
+                job = sbatch(script, wait=False)
+            result = SubmitResult(index, script, job=job)
+        except Exception as e:
+            result = SubmitResult(index, script, error=e)
+        result.elapsed = monotonic() - t0
+        return result
+
+    def __iter__(self) -> Iterator[SubmitResult]:
+        self._started = monotonic()
+        window = 2 * self._max_workers
+        futures: Deque[Future] = deque()
+        with ThreadPoolExecutor(self._max_workers) as executor:
+            index = 0
+            for script in self._scripts:
+                futures.append(executor.submit(self._submit, index, script))
+                index += 1
+                if len(futures) >= window:
+                    yield self._collect(futures.popleft())
+            while futures:
+                yield self._collect(futures.popleft())
+
+    def _collect(self, future: Future) -> SubmitResult:
+        result = future.result()
+        if result.ok:
+            self.stats.submitted += 1
+        else:
+            self.stats.failed += 1
+        self.stats.busy += result.elapsed
+        self.stats.elapsed = monotonic() - self._started
+        return result
+
+    def results(self) -> List[SubmitResult]:
+        """Submit all scripts and return the list of results."""
+        return list(self)
+
+
+def sbatch_many(
+    scripts: Iterable[Submittable], max_workers: int = 8, rate: float = None
+) -> BulkSubmission:
+    """Submit many slurm scripts concurrently.
+
+    Parameters
+    ----------
+    scripts : Iterable[SlurmScript or str or Path]
+        The scripts to submit. Can be `SlurmScript` objects, script files or the
+        content of slurm scripts.
+    max_workers : int, optional
+        Maximal number of concurrent sbatch calls. Defaults to 8.
+    rate : float, optional
+        Maximal number of submissions per second over all workers. Unlimited by
+        default.
+
+    Returns
+    -------
+    BulkSubmission
+        Iterator yielding a `SubmitResult` with the job id or the error for each
+        script in input order. Submission happens while iterating. The throughput
+        numbers are available via the `stats` attribute.
+
+    Examples
+    --------
+    >>> submission = sbatch_many(scripts, max_workers=16, rate=50)
+    >>> for result in submission:
+    ...     print(result.index, result.job_id, result.error)
+    >>> print(submission.stats)
+    """
+    return BulkSubmission(scripts, max_workers, rate)
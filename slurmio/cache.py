@@ -0,0 +1,95 @@
+# -*- coding: utf-8 -*-
+# Author: Dylan Jones
+# Date:   2026-10-17
+
+"""Time-to-live cache for full-queue snapshots shared across threads."""
+
+import threading
+from time import monotonic
+from typing import Any, Callable, Dict, List
+
+Jobs = List[Dict[str, Any]]
+
+
+class SnapshotCache:
+    """Cache a single snapshot of raw job records for a limited time.
+
+    All callers share one snapshot. If the snapshot is expired, the first caller
+    fetches a new one while all other callers wait for that in-flight fetch instead
+    of starting their own. This way N concurrent pollers cost one fetch per TTL
+    window.
+
+    Parameters
+    ----------
+    fetch : Callable[[], List[Dict[str, Any]]]
+        Function returning a fresh list of raw job records.
+    ttl : float, optional
+        Time in seconds a snapshot is considered valid. Defaults to 5 seconds.
+    """
+
+    def __init__(self, fetch: Callable[[], Jobs], ttl: float = 5.0):
+        self._fetch = fetch
+        self.ttl = ttl
+        self._cond = threading.Condition()
+        self._jobs: Jobs = None
+        self._timestamp: float = 0.0
+        self._fetching: bool = False
+        self._generation: int = 0
+        self._error: BaseException = None
+
+    @property
+    def age(self) -> float:
+        """Age of the current snapshot in seconds (infinite if there is none)."""
+        if self._jobs is None:
+            return float("inf")
+        return monotonic() - self._timestamp
+
+    def _fresh(self) -> bool:
+        return self._jobs is not None and self.age < self.ttl
+
+    def invalidate(self) -> None:
+        """Drop the current snapshot so the next call fetches a new one."""
+        with self._cond:
+            self._jobs = None
+            self._timestamp = 0.0
+
+    def get(self) -> Jobs:
+        """Return the cached snapshot, fetching a new one if it has expired.
+
+        Returns
+        -------
+        List[Dict[str, Any]]
+            The raw job records of the snapshot. The list is shared between callers
+            and must not be modified.
+        """
+        with self._cond:
+            if self._fresh():
+                return self._jobs
+            if self._fetching:
+                # Wait for the in-flight fetch and share its result
+                generation = self._generation
+                while self._generation == generation:
+                    self._cond.wait()
+                if self._error is not None:
+                    raise self._error
+                return self._jobs
+            self._fetching = True
+
+        try:
+            jobs = self._fetch()
+        except BaseException as e:
+            with self._cond:
+                self._error = e
+                self._fetching = False
+                self._generation += 1
+                self._cond.notify_all()
+            raise
+
+        with self._cond:
+            self._jobs = jobs
+            self._timestamp = monotonic()
+            self._error = None
+            self._fetching = False
+            self._generation += 1
+            self._cond.notify_all()
+        return jobs
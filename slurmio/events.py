@@ -0,0 +1,467 @@
+# -*- coding: utf-8 -*-
+# Author: Dylan Jones
+# Date:   2026-10-17
+
+"""Stream of job state changes derived from consecutive queue snapshots.
+
+A `QueuePoller` polls the queue in a background thread and diffs each snapshot
+against the previous one by job id. Jobs which dropped out of the queue are looked
+up with a single batched sacct query to get their final state. The poll interval
+adapts to the activity of the queue: it is reset to the minimum after a poll with
+state changes and grows while the queue is idle.
+
+All `watch` subscriptions with the same query filters share one poller.
+
+Examples
+--------
+>>> for event in slurmio.watch(job_id=[1234, 1235]):
+...     print(event.job_id, event.old_state, "->", event.new_state)
+1234 PENDING -> RUNNING
+1234 RUNNING -> COMPLETED
+1235 PENDING -> FAILED
+"""
+
+import asyncio
+import queue
+import threading
+from dataclasses import dataclass
+from time import monotonic
+from typing import Any, AsyncIterator, Dict, Iterator, List, Set, Tuple
+
+from .backends import _chunk_joined, get_backend
+from .filters import Ids, Names, _match_job_id, _sacct_state, _split, _squeue_state
+
+# States of jobs which will not change anymore
+FINAL_STATES = frozenset(
+    (
+        "BOOT_FAIL",
+        "CANCELLED",
+        "COMPLETED",
+        "DEADLINE",
+        "FAILED",
+        "NODE_FAIL",
+        "OUT_OF_MEMORY",
+        "PREEMPTED",
+        "TIMEOUT",
+        "UNKNOWN",
+    )
+)
+
+
+@dataclass(frozen=True)
+class JobEvent:
+    """A state change of a job.
+
+    Attributes
+    ----------
+    job_id : str
+        The id of the job.
+    old_state : str
+        The previous state of the job or None if the job is seen for the first time.
+    new_state : str
+        The new state of the job. "UNKNOWN" if the job left the queue and could not
+        be found in the accounting database.
+    snapshot : Dict[str, Any]
+        The raw squeue record of the job or the sacct record if the job has left the
+        queue. None if the job could not be found.
+    """
+
+    job_id: str
+    old_state: str
+    new_state: str
+    snapshot: Dict[str, Any] = None
+
+    @property
+    def started(self) -> bool:
+        return self.new_state == "RUNNING"
+
+    @property
+    def finished(self) -> bool:
+        return self.new_state in FINAL_STATES
+
+    @property
+    def failed(self) -> bool:
+        return self.finished and self.new_state != "COMPLETED"
+
+
+def _first(states: List[str]) -> str:
+    return states[0] if states else "UNKNOWN"
+
+
+class Watch:
+    """Subscription to the job events of a `QueuePoller`.
+
+    Iterate over the subscription (or use `async for`) to receive the events. If the
+    subscription is restricted to job ids, the iteration stops once all of them
+    reached a final state. Otherwise, it runs until `close` is called.
+    """
+
+    def __init__(
+        self,
+        poller: "QueuePoller",
+        job_ids: List[str] = None,
+        min_interval: float = None,
+        max_interval: float = None,
+    ):
+        self._poller = poller
+        self.job_ids = job_ids
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self._queue: "queue.Queue[Any]" = queue.Queue()
+        self._live: Dict[str, str] = dict()
+        self._seen: Set[str] = set()
+        self._started = False
+        self._closed = False
+        self._done = False
+        self._loop: asyncio.AbstractEventLoop = None
+        self._ready: asyncio.Event = None
+
+    def __enter__(self) -> "Watch":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    def close(self) -> None:
+        """Stop the subscription. The poller stops when no subscription is left."""
+        if not self._closed:
+            self._closed = True
+            self._poller.unsubscribe(self)
+            self._put(None)
+
+    def _in_scope(self, job_id: str, job: Dict[str, Any]) -> bool:
+        if self.job_ids is None:
+            return True
+        if job_id in self.job_ids:
+            return True
+        return job is not None and any(_match_job_id(job, i) for i in self.job_ids)
+
+    def _start(self, states: Dict[str, Tuple[str, Dict[str, Any]]]) -> None:
+        """Take the current states of the poller as baseline.
+
+        If the subscription is restricted to job ids, the current states of the jobs
+        are reported as events, otherwise only later changes are.
+        """
+        self._started = True
+        if self.job_ids is not None:
+            events = [
+                JobEvent(k, None, state, job) for k, (state, job) in states.items()
+            ]
+            self._deliver(events)
+            return
+        for job_id, (state, _) in states.items():
+            if state not in FINAL_STATES:
+                self._live[job_id] = state
+
+    def _mark_seen(self, job_id: str, job: Dict[str, Any]) -> None:
+        if self.job_ids is None:
+            return
+        for i in self.job_ids:
+            if i == job_id or (job is not None and _match_job_id(job, i)):
+                self._seen.add(i)
+
+    def _deliver(self, events: List[JobEvent]) -> None:
+        if self._closed or self._done:
+            return
+        for event in events:
+            if not self._in_scope(event.job_id, event.snapshot):
+                continue
+            if self._live.get(event.job_id) == event.new_state:
+                continue  # Already part of the baseline
+            self._mark_seen(event.job_id, event.snapshot)
+            if event.finished:
+                self._live.pop(event.job_id, None)
+            else:
+                self._live[event.job_id] = event.new_state
+            self._put(event)
+        if self.job_ids is not None and not self._live:
+            if len(self._seen) == len(self.job_ids):
+                self._done = True
+                self._poller.unsubscribe(self)
+                self._put(None)
+
+    def _fail(self, error: BaseException) -> None:
+        if not self._closed and not self._done:
+            self._put(error)
+
+    def _put(self, item: Any) -> None:
+        self._queue.put(item)
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._ready.set)
+
+    def _item(self, item: Any) -> JobEvent:
+        if item is None:
+            self._queue.put(None)  # Keep the subscription exhausted
+            raise StopIteration
+        if isinstance(item, BaseException):
+            raise item
+        return item
+
+    def __iter__(self) -> Iterator[JobEvent]:
+        return self
+
+    def __next__(self) -> JobEvent:
+        return self._item(self._queue.get())
+
+    def __aiter__(self) -> AsyncIterator[JobEvent]:
+        self._loop = asyncio.get_running_loop()
+        self._ready = asyncio.Event()
+        return self
+
+    async def __anext__(self) -> JobEvent:
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                self._ready.clear()
+                if self._queue.empty():
+                    await self._ready.wait()
+                continue
+            try:
+                return self._item(item)
+            except StopIteration:
+                raise StopAsyncIteration
+
+
+class QueuePoller:
+    """Background thread diffing consecutive queue snapshots.
+
+    Parameters
+    ----------
+    filters : Dict[str, Any]
+        The filters of the squeue queries (see `slurmio.squeue`).
+    min_interval : float, optional
+        Poll interval in seconds after state changes. Defaults to 1 second.
+    max_interval : float, optional
+        Maximal poll interval in seconds while the queue is idle. Defaults to 30.
+    factor : float, optional
+        Factor the poll interval grows with after each idle poll. Defaults to 1.5.
+    retries : int, optional
+        Number of polls a job which left the queue is looked up in the accounting
+        database before it is reported with the state "UNKNOWN". Defaults to 5.
+    """
+
+    def __init__(
+        self,
+        filters: Dict[str, Any] = None,
+        min_interval: float = 1.0,
+        max_interval: float = 30.0,
+        factor: float = 1.5,
+        retries: int = 5,
+    ):
+        self.filters = filters or dict()
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.factor = factor
+        self.retries = retries
+        self._cond = threading.Condition()
+        self._watches: List[Watch] = list()
+        self._states: Dict[str, Tuple[str, Dict[str, Any]]] = None
+        self._lookups: Dict[str, Tuple[str, int]] = dict()
+        self._thread: threading.Thread = None
+        self._interval = min_interval
+        self._next_poll = 0.0
+
+    def _bounds(self) -> Tuple[float, float]:
+        lo = [w.min_interval for w in self._watches if w.min_interval is not None]
+        hi = [w.max_interval for w in self._watches if w.max_interval is not None]
+        return min(lo, default=self.min_interval), min(hi, default=self.max_interval)
+
+    def subscribe(
+        self,
+        job_ids: List[str] = None,
+        min_interval: float = None,
+        max_interval: float = None,
+    ) -> Watch:
+        """Create a new subscription to the events of the poller."""
+        watch = Watch(self, job_ids, min_interval, max_interval)
+        with self._cond:
+            if self._states is not None:
+                watch._start(self._states)
+            self._watches.append(watch)
+            self._interval = self._bounds()[0]
+            self._next_poll = min(self._next_poll, monotonic())
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, daemon=True)
+                self._thread.start()
+            self._cond.notify_all()
+        return watch
+
+    def unsubscribe(self, watch: Watch) -> None:
+        with self._cond:
+            if watch in self._watches:
+                self._watches.remove(watch)
+            self._cond.notify_all()
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while self._watches:
+                    remaining = self._next_poll - monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                if not self._watches:
+                    # Forget the state, a later subscription starts from scratch
+                    self._thread = None
+                    self._states = None
+                    self._lookups.clear()
+                    return
+
+            try:
+                events = self.poll()
+                error = None
+            except Exception as e:
+                events, error = list(), e
+
+            with self._cond:
+                lo, hi = self._bounds()
+                if events:
+                    self._interval = lo
+                else:
+                    self._interval = min(max(self._interval * self.factor, lo), hi)
+                self._next_poll = monotonic() + self._interval
+                for watch in list(self._watches):
+                    if error is not None:
+                        watch._fail(error)
+                    elif not watch._started:
+                        watch._start(self._states)
+                        watch._deliver(events)
+                    else:
+                        watch._deliver(events)
+
+    def _wanted(self, current: Dict[str, Any]) -> Set[str]:
+        """Job ids requested by subscriptions, which are not in the queue."""
+        wanted = set()
+        with self._cond:
+            for watch in self._watches:
+                if watch.job_ids is None:
+                    continue
+                for job_id in watch.job_ids:
+                    if job_id in watch._seen:
+                        continue
+                    if not any(_match_job_id(job, job_id) for job in current.values()):
+                        wanted.add(job_id)
+        return wanted
+
+    def poll(self) -> List[JobEvent]:
+        """Fetch a new snapshot of the queue and return the state changes."""
+        jobs = get_backend().squeue(**self.filters)
+        current = {str(job["job_id"]): job for job in jobs}
+        previous = self._states
+        states = {k: (_first(_squeue_state(job)), job) for k, job in current.items()}
+
+        events = list()
+        if previous is not None:
+            for job_id, (state, job) in states.items():
+                old = previous.get(job_id)
+                old_state = old[0] if old is not None else None
+                if state != old_state:
+                    events.append(JobEvent(job_id, old_state, state, job))
+            for job_id, (state, _) in previous.items():
+                if job_id not in states and state not in FINAL_STATES:
+                    self._lookups.setdefault(job_id, (state, 0))
+        for job_id in self._wanted(current):
+            self._lookups.setdefault(job_id, (None, 0))
+        for job_id in list(self._lookups):
+            if job_id in current:
+                del self._lookups[job_id]  # Back in the queue, for example requeued
+        with self._cond:
+            self._states = states
+        if self._lookups:
+            events.extend(self._resolve())
+        return events
+
+    def _resolve(self) -> List[JobEvent]:
+        """Look up the final states of the jobs which left the queue with sacct."""
+        # The ids are given explicitly, so the jobs of other users are found too
+        records = list()
+        for chunk in _chunk_joined(list(self._lookups)):
+            records.extend(get_backend().sacct(job_id=chunk, all_users=True))
+        events = list()
+        for job_id, (old_state, attempts) in list(self._lookups.items()):
+            matches = [job for job in records if _match_job_id(job, job_id)]
+            finished = [
+                (str(job["job_id"]), _first(_sacct_state(job)), job) for job in matches
+            ]
+            if finished and all(state in FINAL_STATES for _, state, _ in finished):
+                del self._lookups[job_id]
+                for key, state, job in finished:
+                    old = old_state if key == job_id else None
+                    events.append(JobEvent(key, old, state, job))
+            elif attempts + 1 >= self.retries:
+                del self._lookups[job_id]
+                events.append(JobEvent(job_id, old_state, "UNKNOWN"))
+            else:
+                self._lookups[job_id] = (old_state, attempts + 1)
+        return events
+
+
+_lock = threading.Lock()
+_pollers: Dict[Tuple[Any, ...], QueuePoller] = dict()
+
+
+def _poller(filters: Dict[str, Any]) -> QueuePoller:
+    """Return the shared poller of the given squeue filters."""
+    key = tuple(
+        (k, tuple(_split(v))) for k, v in sorted(filters.items()) if v is not None
+    )
+    with _lock:
+        poller = _pollers.get(key)
+        if poller is None:
+            values = {k: v for k, v in filters.items() if v is not None}
+            poller = _pollers[key] = QueuePoller(values)
+        return poller
+
+
+def watch(
+    user: Names = None,
+    job_id: Ids = None,
+    partition: Names = None,
+    name: Names = None,
+    account: Names = None,
+    qos: Names = None,
+    min_interval: float = None,
+    max_interval: float = None,
+) -> Watch:
+    """Watch the state changes of jobs.
+
+    The returned subscription can be iterated with `for` or `async for` and yields
+    a `JobEvent` whenever a job is submitted, changes its state or finishes. All
+    subscriptions with the same `user`, `partition`, `name`, `account` and `qos`
+    filters share a single background poller.
+
+    Parameters
+    ----------
+    user : str or Sequence[str], optional
+        Only watch the jobs of these users.
+    job_id : int or str or Sequence[int or str], optional
+        Only watch these jobs. Their current states are reported first (with an
+        `old_state` of None) and the iteration stops when all of them are finished.
+        Jobs which are not in the queue anymore are looked up with sacct.
+    partition, name, account, qos : str or Sequence[str], optional
+        Only watch jobs matching these squeue filters.
+    min_interval : float, optional
+        Poll interval in seconds while states are changing. Defaults to 1 second.
+    max_interval : float, optional
+        Maximal poll interval in seconds while the queue is idle. Defaults to 30.
+
+    Returns
+    -------
+    Watch
+        The subscription. Call `close` (or use it as context manager) to stop it.
+
+    Examples
+    --------
+    >>> async for event in slurmio.watch(user="user"):
+    ...     if event.failed:
+    ...         print(f"Job {event.job_id} failed: {event.new_state}")
+    """
+    filters = dict(user=user, partition=partition, name=name)
+    filters.update(account=account, qos=qos)
+    job_ids = _split(job_id) if job_id else None
+    return _poller(filters).subscribe(job_ids, min_interval, max_interval)
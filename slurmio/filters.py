@@ -0,0 +1,146 @@
+# -*- coding: utf-8 -*-
+# Author: Dylan Jones
+# Date:   2026-10-17
+
+"""Helpers for matching and filtering raw squeue/sacct job records in memory."""
+
+import re
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, List, Sequence, Set, Tuple, Union
+
+Names = Union[str, Sequence[str]]
+Ids = Union[int, str, Sequence[Union[int, str]]]
+Time = Union[datetime, str]
+
+
+def _number(value: Any) -> Any:
+    """Return the value of a Slurm number object or the value itself."""
+    if isinstance(value, dict):
+        return value.get("number") if value.get("set", True) else None
+    return value
+
+
+def _array_ids(job: Dict[str, Any]) -> Tuple[Any, Any]:
+    """Return the array job id and array task id of a squeue or sacct job record."""
+    if "array_job_id" in job:
+        return _number(job["array_job_id"]), _number(job.get("array_task_id"))
+    array = job.get("array") or dict()
+    return _number(array.get("job_id")), _number(array.get("task_id"))
+
+
+def _match_job_id(job: Dict[str, Any], job_id: str) -> bool:
+    if str(job["job_id"]) == job_id:
+        return True
+    array_job_id, task_id = _array_ids(job)
+    if "_" in job_id:
+        array_id, task = job_id.split("_", 1)
+        return str(array_job_id) == array_id and str(task_id) == task
+    # Querying the id of an array job also matches all of its tasks
+    return array_job_id not in (None, 0) and str(array_job_id) == job_id
+
+
+def _split(values: Union[Any, Sequence[Any]]) -> List[str]:
+    """Split a comma separated string or a sequence of values into strings."""
+    if isinstance(values, str):
+        return [x.strip() for x in values.split(",") if x.strip()]
+    if isinstance(values, Iterable):
+        return [str(x) for x in values]
+    return [str(values)]
+
+
+def _join(values: Union[Any, Sequence[Any]]) -> str:
+    return ",".join(_split(values))
+
+
+def _squeue_state(job: Dict[str, Any]) -> List[str]:
+    return job.get("job_state") or list()
+
+
+def _sacct_state(job: Dict[str, Any]) -> List[str]:
+    state = (job.get("state") or dict()).get("current") or list()
+    return [state] if isinstance(state, str) else state
+
+
+def _filter_jobs(
+    jobs: List[Dict[str, Any]],
+    user_key: str,
+    get_state: Callable[[Dict[str, Any]], List[str]],
+    user: Names = None,
+    job_id: Ids = None,
+    states: Names = None,
+    partition: Names = None,
+    name: Names = None,
+    account: Names = None,
+    qos: Names = None,
+) -> List[Dict[str, Any]]:
+    """Apply the squeue/sacct filters to raw job records in memory."""
+    checks = list()
+    if job_id:
+        checks.append(_job_id_matcher(_split(job_id)))
+    if user:
+        users = set(_split(user))
+        checks.append(lambda job: job.get(user_key) in users)
+    if states:
+        upper = {x.upper() for x in _split(states)}
+        checks.append(lambda job: bool(upper.intersection(get_state(job))))
+    for key, values in (
+        ("partition", partition),
+        ("name", name),
+        ("account", account),
+        ("qos", qos),
+    ):
+        if values:
+            checks.append(
+                lambda job, k=key, v=set(_split(values)): bool(
+                    v.intersection(_split(job.get(k) or ""))
+                )
+            )
+    return [job for job in jobs if all(check(job) for check in checks)]
+
+
+RE_ARRAY_RANGE = re.compile(r"^(\d+)_\[([\d,\-]+)(?:%\d+)?\]$")
+
+
+def _parse_ranges(ranges: str) -> Set[int]:
+    """Parse a Slurm index list like `1,3-5` to a set of integers."""
+    indices = set()
+    for part in ranges.split(","):
+        if "-" in part:
+            start, stop = part.split("-", 1)
+            indices.update(range(int(start), int(stop) + 1))
+        elif part:
+            indices.add(int(part))
+    return indices
+
+
+def _job_id_matcher(job_ids: Sequence[str]) -> Callable[[Dict[str, Any]], bool]:
+    """Return a function checking if a job record matches any of the job ids.
+
+    The ids are parsed once into a set of plain job ids and the task ids of each
+    array job (from `<id>_<task>` and `<id>_[<ranges>]`), so matching a record costs
+    a few set lookups independent of the number of ids.
+    """
+    plain: Set[str] = set()
+    tasks: Dict[str, Set[str]] = dict()
+    for job_id in job_ids:
+        match = RE_ARRAY_RANGE.match(job_id)
+        if match:
+            indices = _parse_ranges(match.group(2))
+            tasks.setdefault(match.group(1), set()).update(map(str, indices))
+        elif "_" in job_id:
+            array_id, task = job_id.split("_", 1)
+            tasks.setdefault(array_id, set()).add(task)
+        else:
+            plain.add(job_id)
+
+    def match(job: Dict[str, Any]) -> bool:
+        if str(job["job_id"]) in plain:
+            return True
+        array_job_id, task_id = _array_ids(job)
+        if array_job_id in (None, 0):
+            return False
+        # Querying the id of an array job also matches all of its tasks
+        array_id = str(array_job_id)
+        return array_id in plain or str(task_id) in tasks.get(array_id, ())
+
+    return match
@@ -0,0 +1,268 @@
+# -*- coding: utf-8 -*-
+# Author: Dylan Jones
+# Date:   2026-10-17
+
+"""Local SQLite store of the job history with incremental sacct synchronization."""
+
+import json
+import os
+import sqlite3
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Tuple, Union
+
+from .backends import get_backend
+from .filters import _number
+from .models import Sacct
+from .speedups import gc_paused, loads
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    cluster TEXT NOT NULL,
+    job_id INTEGER NOT NULL,
+    name TEXT,
+    user TEXT,
+    account TEXT,
+    partition TEXT,
+    state TEXT,
+    submit_time INTEGER,
+    start_time INTEGER,
+    end_time INTEGER,
+    data TEXT NOT NULL,
+    PRIMARY KEY (cluster, job_id)
+);
+CREATE INDEX IF NOT EXISTS jobs_job_id ON jobs (job_id);
+CREATE INDEX IF NOT EXISTS jobs_user ON jobs (user);
+CREATE INDEX IF NOT EXISTS jobs_state ON jobs (state);
+CREATE INDEX IF NOT EXISTS jobs_end_time ON jobs (end_time);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+Timestamp = Union[datetime, float, int]
+
+
+def cache_dir() -> Path:
+    """Return the user cache directory of slurmio."""
+    root = os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache"
+    return Path(root) / "slurmio"
+
+
+def _timestamp(t: Timestamp) -> float:
+    return t.timestamp() if isinstance(t, datetime) else float(t)
+
+
+def _row(job: Dict[str, Any]) -> Tuple[Any, ...]:
+    time = job.get("time", {})
+    state = job.get("state", {}).get("current")
+    if isinstance(state, list):
+        state = ",".join(state)
+    return (
+        job.get("cluster", ""),
+        job["job_id"],
+        job.get("name"),
+        job.get("user"),
+        job.get("account"),
+        job.get("partition"),
+        state,
+        _number(time.get("submission")),
+        _number(time.get("start")),
+        _number(time.get("end")),
+        json.dumps(job),
+    )
+
+
+class JobHistory:
+    """Persistent local store of sacct job records.
+
+    The store keeps a high-water mark of the last synchronization. Each call of
+    `sync` only fetches the jobs that were eligible or running since then (with a
+    small overlap) via the `--starttime`/`--endtime` options of sacct, so repeated
+    reports are answered from the local database without querying slurmdbd.
+
+    Parameters
+    ----------
+    path : str or Path, optional
+        The path of the SQLite database. Defaults to `history.sqlite` in the user
+        cache directory.
+    all_users : bool, optional
+        Synchronize the jobs of all users instead of only the current user. Defaults
+        to True.
+    overlap : float, optional
+        Seconds the window of each synchronization overlaps with the previous one.
+        Defaults to 5 minutes.
+
+    Examples
+    --------
+    >>> with JobHistory() as history:
+    ...     history.sync(start=datetime(2026, 1, 1))
+    ...     failed = history.query(user="user", state="FAILED")
+    """
+
+    def __init__(
+        self,
+        path: Union[str, Path] = None,
+        all_users: bool = True,
+        overlap: float = 300.0,
+    ):
+        path = Path(path) if path is not None else cache_dir() / "history.sqlite"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.path = path
+        self.all_users = all_users
+        self.overlap = overlap
+        self._conn = sqlite3.connect(str(path))
+        self._conn.row_factory = sqlite3.Row
+        self._conn.executescript(SCHEMA)
+
+    def close(self) -> None:
+        self._conn.close()
+
+    def __enter__(self) -> "JobHistory":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return self._conn.execute("SELECT COUNT(*) FROM jobs").fetchone()[0]
+
+    @property
+    def high_water_mark(self) -> Union[datetime, None]:
+        """The end time of the last synchronization window."""
+        row = self._conn.execute(
+            "SELECT value FROM meta WHERE key = 'high_water_mark'"
+        ).fetchone()
+        return datetime.fromtimestamp(float(row[0])) if row else None
+
+    def _set_high_water_mark(self, t: float) -> None:
+        self._conn.execute(
+            "INSERT OR REPLACE INTO meta (key, value) VALUES ('high_water_mark', ?)",
+            (str(t),),
+        )
+
+    def _fetch(self, start: float, end: float) -> List[Dict[str, Any]]:
+        return get_backend().sacct(
+            start=datetime.fromtimestamp(start),
+            end=datetime.fromtimestamp(end),
+            all_users=self.all_users,
+        )
+
+    def insert(self, jobs: Iterable[Dict[str, Any]]) -> int:
+        """Insert or update raw sacct job records, return the number of records."""
+        rows = [_row(job) for job in jobs]
+        with self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO jobs VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+        return len(rows)
+
+    def sync(
+        self,
+        start: Timestamp = None,
+        end: Timestamp = None,
+        window: timedelta = timedelta(days=1),
+    ) -> int:
+        """Fetch all new or changed jobs since the last synchronization.
+
+        Parameters
+        ----------
+        start : datetime or float, optional
+            Start of the synchronization window. Defaults to the high-water mark
+            minus the overlap, or the start of the current day on the first sync.
+        end : datetime or float, optional
+            End of the synchronization window. Defaults to now.
+        window : timedelta, optional
+            Long ranges are fetched in windows of this length to bound the size of
+            each sacct response. Defaults to one day.
+
+        Returns
+        -------
+        int
+            The number of inserted or updated job records.
+        """
+        end = _timestamp(end) if end is not None else datetime.now().timestamp()
+        if start is not None:
+            start = _timestamp(start)
+        else:
+            hwm = self.high_water_mark
+            if hwm is not None:
+                start = hwm.timestamp() - self.overlap
+            else:
+                today = datetime.now().replace(hour=0, minute=0, second=0)
+                start = today.timestamp()
+
+        step = window.total_seconds()
+        count = 0
+        t0 = start
+        while t0 < end:
+            t1 = min(t0 + step, end)
+            count += self.insert(self._fetch(t0, t1))
+            with self._conn:
+                hwm = self.high_water_mark
+                if hwm is None or t1 > hwm.timestamp():
+                    self._set_high_water_mark(t1)
+            t0 = t1
+        return count
+
+    def query(
+        self,
+        job_id: Union[int, str] = None,
+        user: str = None,
+        state: str = None,
+        partition: str = None,
+        account: str = None,
+        since: Timestamp = None,
+        until: Timestamp = None,
+        rows: bool = False,
+    ) -> Union[List[Sacct], List[sqlite3.Row]]:
+        """Query jobs from the local store.
+
+        Parameters
+        ----------
+        job_id : int or str, optional
+            Only return the job with this id.
+        user : str, optional
+            Only return jobs of this user.
+        state : str, optional
+            Only return jobs in this state, for example "COMPLETED".
+        partition : str, optional
+            Only return jobs of this partition.
+        account : str, optional
+            Only return jobs of this account.
+        since : datetime or float, optional
+            Only return jobs that ended at or after this time.
+        until : datetime or float, optional
+            Only return jobs that ended before this time.
+        rows : bool, optional
+            Return the database rows instead of `Sacct` objects. The raw sacct
+            record is stored as JSON in the `data` column.
+        """
+        conditions, params = list(), list()
+        for column, value in (
+            ("job_id", job_id),
+            ("user", user),
+            ("state", state),
+            ("partition", partition),
+            ("account", account),
+        ):
+            if value is not None:
+                conditions.append(f"{column} = ?")
+                params.append(int(value) if column == "job_id" else value)
+        if since is not None:
+            conditions.append("end_time >= ?")
+            params.append(_timestamp(since))
+        if until is not None:
+            conditions.append("end_time < ?")
+            params.append(_timestamp(until))
+        sql = "SELECT * FROM jobs"
+        if conditions:
+            sql += " WHERE " + " AND ".join(conditions)
+        sql += " ORDER BY end_time, job_id"
+        result = self._conn.execute(sql, params).fetchall()
+        if rows:
+            return result
+        with gc_paused():
+            return [Sacct(**loads(row["data"])) for row in result]
@@ -0,0 +1,317 @@
+# -*- coding: utf-8 -*-
+# Author: Dylan Jones
+# Date:   2026-10-17
+
+"""Content-addressed journal of submitted jobs for deduplicating submissions.
+
+Each submission is keyed by a hash of the script content, the working directory
+and the sbatch options. Before submitting, the journal is checked for a job with
+the same key. If that job is still in the queue or completed successfully, it is
+returned instead of submitting the script again. Jobs which failed, were cancelled
+or are unknown to Slurm are submitted again.
+
+The states of the journaled jobs are looked up with one squeue and one sacct query
+for all jobs of a batch, so resuming a campaign of thousands of jobs with
+`sbatch_many` costs a handful of Slurm queries.
+
+Examples
+--------
+>>> journal = SubmissionJournal()
+>>> job = script.sbatch(journal=journal)
+>>> job = script.sbatch(journal=journal)  # Returns the same job
+>>> results = journal.sbatch_many(scripts)  # Only submits the missing jobs
+"""
+
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from collections import defaultdict
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Mapping, Sequence, Tuple, Union
+
+from .backends import _chunk_joined, _sbatch_args, get_backend
+from .bulk import SubmitResult, Submittable, sbatch_many
+from .events import FINAL_STATES, _first
+from .filters import Ids, _array_ids, _sacct_state, _squeue_state
+from .history import cache_dir
+from .models import Squeue
+from .script import SlurmScript
+from .slurm import SubmittedJob, _script_file, sbatch
+from .workflow import _aggregate
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS submissions (
+    key TEXT PRIMARY KEY,
+    job_id INTEGER NOT NULL,
+    cluster TEXT,
+    cwd TEXT,
+    submit_time REAL
+);
+"""
+
+# Maximal number of host parameters of a single SQLite statement
+MAX_VARIABLES = 900
+
+
+def _content(script: Submittable) -> str:
+    if isinstance(script, SlurmScript):
+        return script.dumps()
+    file = _script_file(script)
+    if file is not None:
+        return file.read_text()
+    return str(script)
+
+
+def submission_key(
+    script: Submittable, cwd: Union[str, Path] = None, args: Sequence[str] = None
+) -> str:
+    """Return the journal key of a submission.
+
+    Parameters
+    ----------
+    script : SlurmScript or str or Path
+        The script, a script file or the content of a script.
+    cwd : str or Path, optional
+        The working directory of the submission. Defaults to the current directory.
+    args : Sequence[str], optional
+        The command line options of sbatch.
+    """
+    cwd = os.path.abspath(cwd if cwd is not None else os.getcwd())
+    h = hashlib.blake2b(digest_size=20)
+    h.update(_content(script).encode())
+    h.update(b"\0" + cwd.encode())
+    for arg in args or ():
+        h.update(b"\0" + str(arg).encode())
+    return h.hexdigest()
+
+
+def _job_states(job_ids: List[int]) -> Dict[int, Tuple[str, Dict[str, Any]]]:
+    """Look up the states of jobs with batched squeue and sacct queries.
+
+    Returns the combined state of each job (of all tasks for array jobs) and its
+    squeue record if the job is still in the queue.
+    """
+    backend = get_backend()
+    wanted = set(job_ids)
+    states: Dict[int, List[str]] = defaultdict(list)
+    records: Dict[int, Dict[str, Any]] = dict()
+    ids = [str(job_id) for job_id in sorted(wanted)]
+    for chunk in _chunk_joined(ids):
+        for job in backend.squeue(job_id=chunk):
+            array_job_id, _ = _array_ids(job)
+            job_id = array_job_id if array_job_id in wanted else job["job_id"]
+            if job_id in wanted:
+                states[job_id].append(_first(_squeue_state(job)))
+                records.setdefault(job_id, job)
+
+    ids = [str(job_id) for job_id in sorted(wanted - set(states))]
+    for chunk in _chunk_joined(ids):
+        for job in backend.sacct(job_id=chunk):
+            array_job_id, _ = _array_ids(job)
+            job_id = array_job_id if array_job_id in wanted else job["job_id"]
+            if job_id in wanted:
+                states[job_id].append(_first(_sacct_state(job)))
+
+    return {
+        job_id: (_aggregate(job_states), records.get(job_id))
+        for job_id, job_states in states.items()
+    }
+
+
+class SubmissionJournal:
+    """Local store of submitted jobs, keyed by the content of the submission.
+
+    Parameters
+    ----------
+    path : str or Path, optional
+        The path of the SQLite database. Defaults to `journal.sqlite` in the user
+        cache directory. The database can be shared by concurrent processes.
+    grace : float, optional
+        Seconds after a submission in which a job which is not (yet) known to squeue
+        or sacct is still considered queued. Defaults to 60 seconds.
+    """
+
+    def __init__(self, path: Union[str, Path] = None, grace: float = 60.0):
+        path = Path(path) if path is not None else cache_dir() / "journal.sqlite"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.path = path
+        self.grace = grace
+        self._conn = sqlite3.connect(str(path), timeout=30, check_same_thread=False)
+        self._conn.executescript(SCHEMA)
+        self._lock = threading.Lock()
+        self._key_locks: Dict[str, threading.Lock] = defaultdict(threading.Lock)
+
+    def close(self) -> None:
+        self._conn.close()
+
+    def __enter__(self) -> "SubmissionJournal":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM submissions").fetchone()[0]
+
+    def record(self, key: str, job: SubmittedJob, cwd: Union[str, Path] = None) -> None:
+        """Store the job of a submission."""
+        self.record_many([(key, job)], cwd)
+
+    def record_many(
+        self, jobs: Iterable[Tuple[str, SubmittedJob]], cwd: Union[str, Path] = None
+    ) -> None:
+        """Store the jobs of many submissions in one transaction."""
+        cwd = os.path.abspath(cwd if cwd is not None else os.getcwd())
+        now = time.time()
+        rows = [(key, job.job_id, job.cluster, cwd, now) for key, job in jobs]
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO submissions VALUES (?, ?, ?, ?, ?)", rows
+            )
+
+    def forget(self, keys: Iterable[str]) -> None:
+        """Remove submissions from the journal."""
+        keys = list(keys)
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "DELETE FROM submissions WHERE key = ?", [(key,) for key in keys]
+            )
+
+    def _select(self, keys: List[str]) -> Dict[str, Tuple[int, str, float]]:
+        entries = dict()
+        with self._lock:
+            for i in range(0, len(keys), MAX_VARIABLES):
+                chunk = keys[i : i + MAX_VARIABLES]
+                marks = ",".join("?" * len(chunk))
+                for key, job_id, cluster, t in self._conn.execute(
+                    "SELECT key, job_id, cluster, submit_time FROM submissions "
+                    f"WHERE key IN ({marks})",
+                    chunk,
+                ):
+                    entries[key] = job_id, cluster, t
+        return entries
+
+    def lookup(
+        self, keys: Iterable[str]
+    ) -> Dict[str, Tuple[SubmittedJob, Union[Dict[str, Any], None]]]:
+        """Return the journaled jobs of the keys which are queued or completed.
+
+        The states of all jobs are looked up with one batched squeue and sacct query.
+
+        Parameters
+        ----------
+        keys : Iterable[str]
+            The submission keys.
+
+        Returns
+        -------
+        Dict[str, Tuple[SubmittedJob, dict or None]]
+            The job of each key with a live or successfully completed job and the
+            raw squeue record of the job if it is still in the queue. Keys without
+            a journal entry or whose job failed are missing.
+        """
+        entries = self._select(list(dict.fromkeys(keys)))
+        if not entries:
+            return dict()
+        states = _job_states([job_id for job_id, _, _ in entries.values()])
+        now = time.time()
+        found = dict()
+        for key, (job_id, cluster, t) in entries.items():
+            state, record = states.get(job_id, (None, None))
+            if state is None:
+                if now - t > self.grace:
+                    continue  # Unknown to Slurm, for example purged from sacct
+            elif state in FINAL_STATES and state != "COMPLETED":
+                continue
+            found[key] = SubmittedJob(job_id, cluster), record
+        return found
+
+    def sbatch(
+        self,
+        file_or_script: Submittable,
+        wait: bool = True,
+        timeout: float = None,
+        hold: bool = False,
+        dependency: Union[str, Ids] = None,
+        export: Union[str, Sequence[str], Mapping[str, str]] = None,
+        args: Sequence[str] = None,
+    ) -> Union[Squeue, SubmittedJob]:
+        """Submit a job unless the same submission is queued or completed.
+
+        The arguments are the same as of `slurmio.sbatch`. If an identical job is
+        still in the queue, it is returned as `Squeue` object if `wait` is True. A
+        completed job is always returned as `SubmittedJob`, since it will not show
+        up in the queue anymore.
+        """
+        options = _sbatch_args(hold, dependency, export, args)
+        if isinstance(file_or_script, SlurmScript):
+            file_or_script = file_or_script.dumps()
+        key = submission_key(file_or_script, args=options)
+        with self._lock:
+            key_lock = self._key_locks[key]
+        # Concurrent identical submissions of this process wait for the first one
+        with key_lock:
+            found = self.lookup([key])
+            if key in found:
+                job, record = found[key]
+                if wait and record is not None:
+                    return Squeue(**record)
+                return job
+            job = sbatch(file_or_script, wait=False, args=options)
+            self.record(key, job)
+        if not wait:
+            return job
+        return job.squeue(timeout)
+
+    def sbatch_many(
+        self, scripts: Iterable[Submittable], max_workers: int = 8, rate: float = None
+    ) -> List[SubmitResult]:
+        """Submit the scripts which are not queued or completed yet.
+
+        The journal is checked for all scripts with one batched lookup, the missing
+        scripts are submitted concurrently with `slurmio.sbatch_many`.
+
+        Parameters
+        ----------
+        scripts : Iterable[SlurmScript or str or Path]
+            The scripts to submit.
+        max_workers : int, optional
+            Maximal number of concurrent sbatch calls. Defaults to 8.
+        rate : float, optional
+            Maximal number of submissions per second.
+
+        Returns
+        -------
+        List[SubmitResult]
+            The result of each script in input order. Scripts with an existing job
+            have the journaled job and an elapsed time of zero.
+        """
+        scripts = list(scripts)
+        keys = [submission_key(script) for script in scripts]
+        found = self.lookup(keys)
+        results: List[SubmitResult] = [None] * len(scripts)
+        first: Dict[str, int] = dict()
+        missing = list()
+        for i, (script, key) in enumerate(zip(scripts, keys)):
+            if key in found:
+                results[i] = SubmitResult(i, script, job=found[key][0])
+            elif key not in first:
+                first[key] = i
+                missing.append(i)
+        if missing:
+            submission = sbatch_many([scripts[i] for i in missing], max_workers, rate)
+            for result in submission:
+                result.index = missing[result.index]
+                results[result.index] = result
+            self.record_many(
+                (keys[i], results[i].job) for i in missing if results[i].ok
+            )
+        # Duplicates within the batch share the result of their first occurrence
+        for i, key in enumerate(keys):
+            if results[i] is None:
+                result = results[first[key]]
+                results[i] = SubmitResult(i, scripts[i], result.job, result.error)
+        return results
@@ -0,0 +1,121 @@
+# -*- coding: utf-8 -*-
+# Author: Dylan Jones
+# Date:   2026-10-17
+
+"""Incremental parsing of large JSON documents."""
+
+import json
+from typing import Any, Dict, Iterable, Iterator
+
+WHITESPACE = " \t\n\r"
+
+
+class JSONArrayStream:
+    """Incrementally parse a JSON object and stream the items of one of its arrays.
+
+    The JSON document is read chunk by chunk. The items of the array stored under
+    `key` in the top-level object are yielded one by one as soon as they are
+    complete, so the full document is never held in memory. All other top-level
+    values are parsed completely and collected in the `values` dictionary.
+
+    Parameters
+    ----------
+    chunks : Iterable[str]
+        The chunks of the JSON document.
+    key : str
+        The key of the top-level array to stream.
+
+    Examples
+    --------
+    >>> stream = JSONArrayStream(['{"errors": [], "jobs": [{"a"', ': 1}, 2]}'], "jobs")
+    >>> list(stream)
+    [{'a': 1}, 2]
+    >>> stream.values
+    {'errors': []}
+    """
+
+    def __init__(self, chunks: Iterable[str], key: str):
+        self._chunks = iter(chunks)
+        self._key = key
+        self._decoder = json.JSONDecoder()
+        self._buf = ""
+        self._pos = 0
+        self._eof = False
+        self.values: Dict[str, Any] = dict()
+
+    def _fill(self) -> bool:
+        """Read the next chunk into the buffer, return False at the end of input."""
+        if self._eof:
+            return False
+        # Drop the consumed part of the buffer
+        if self._pos:
+            self._buf = self._buf[self._pos :]
+            self._pos = 0
+        for chunk in self._chunks:
+            if chunk:
+                self._buf += chunk
+                return True
+        self._eof = True
+        return False
+
+    def _peek(self) -> str:
+        """Skip whitespace and return the next character without consuming it."""
+        while True:
+            buf, pos = self._buf, self._pos
+            n = len(buf)
+            while pos < n and buf[pos] in WHITESPACE:
+                pos += 1
+            self._pos = pos
+            if pos < n:
+                return buf[pos]
+            if not self._fill():
+                raise ValueError("Unexpected end of JSON input")
+
+    def _expect(self, chars: str) -> str:
+        c = self._peek()
+        if c not in chars:
+            raise ValueError(f"Expected one of {chars!r} at position {self._pos}")
+        self._pos += 1
+        return c
+
+    def _value(self) -> Any:
+        """Decode the next complete JSON value, reading more input if necessary."""
+        self._peek()
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self._buf, self._pos)
+            except json.JSONDecodeError:
+                if not self._fill():
+                    raise
+                continue
+            # A number at the end of the buffer might continue in the next chunk
+            if (
+                end == len(self._buf)
+                and type(value) in (int, float)
+                and not self._eof
+                and self._fill()
+            ):
+                continue
+            self._pos = end
+            return value
+
+    def __iter__(self) -> Iterator[Any]:
+        self._expect("{")
+        if self._peek() == "}":
+            return
+        while True:
+            key = self._value()
+            self._expect(":")
+            if key == self._key and self._peek() == "[":
+                self._pos += 1
+                if self._peek() == "]":
+                    self._pos += 1
+                else:
+                    while True:
+                        yield self._value()
+                        if self._expect(",]") == "]":
+                            break
+            else:
+                self.values[key] = self._value()
+            if self._expect(",}") == "}":
+                return
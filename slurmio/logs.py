@@ -0,0 +1,437 @@
+# -*- coding: utf-8 -*-
+# Author: Dylan Jones
+# Date:   2026-10-17
+
+"""Following the output files of many slurm jobs at once.
+
+A `LogFollower` remembers the byte offset of each file, so every poll only reads the
+bytes appended since the last one (memory mapped if there are many of them). The
+lines of all files are multiplexed into a single stream of `(key, line)` tuples.
+
+Changes are detected with inotify where it is available (Linux). Since inotify does
+not see writes done on other nodes of network file systems like NFS or Lustre, all
+files are additionally checked with a cheap `stat` every `interval` seconds.
+
+Examples
+--------
+>>> for job_id, line in follow_jobs(user="user"):
+...     print(f"[{job_id}] {line}")
+"""
+
+import ctypes
+import ctypes.util
+import mmap
+import os
+import select
+import struct
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Mapping, Tuple, Union
+
+from .models import Squeue
+from .slurm import squeue
+
+# Appended chunks of at least this many bytes are read via mmap
+MMAP_THRESHOLD = 1 << 20
+
+Line = Tuple[str, str]
+
+# inotify event masks, see `man inotify`
+IN_MODIFY = 0x002
+IN_CLOSE_WRITE = 0x008
+IN_MOVED_TO = 0x080
+IN_CREATE = 0x100
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+_EVENT = struct.Struct("iIII")
+
+
+class _Inotify:
+    """Minimal inotify binding watching directories for written files."""
+
+    def __init__(self):
+        libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        self._libc = libc
+        self.fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self._dirs: Dict[int, str] = dict()
+        self._wds: Dict[str, int] = dict()
+
+    @classmethod
+    def create(cls) -> Union["_Inotify", None]:
+        """Return a new instance or None if inotify is not available."""
+        try:
+            return cls()
+        except (OSError, AttributeError, TypeError):
+            return None
+
+    def watch(self, directory: str) -> None:
+        if directory in self._wds:
+            return
+        mask = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE
+        wd = self._libc.inotify_add_watch(self.fd, os.fsencode(directory), mask)
+        if wd >= 0:
+            self._wds[directory] = wd
+            self._dirs[wd] = directory
+
+    def read(self, timeout: float) -> List[str]:
+        """Wait for events and return the paths of the changed files."""
+        ready, _, _ = select.select([self.fd], [], [], max(timeout, 0))
+        if not ready:
+            return list()
+        try:
+            data = os.read(self.fd, 1 << 16)
+        except BlockingIOError:
+            return list()
+        paths, pos = list(), 0
+        while pos + _EVENT.size <= len(data):
+            wd, _, _, length = _EVENT.unpack_from(data, pos)
+            pos += _EVENT.size
+            name = data[pos : pos + length].rstrip(b"\0")
+            pos += length
+            directory = self._dirs.get(wd)
+            if directory is not None and name:
+                paths.append(os.path.join(directory, os.fsdecode(name)))
+        return paths
+
+    def close(self) -> None:
+        if self.fd >= 0:
+            os.close(self.fd)
+            self.fd = -1
+
+
+class LogFile:
+    """A followed file remembering the offset up to which it has been read.
+
+    Parameters
+    ----------
+    path : str or Path
+        The path of the file. The file doesn't have to exist yet.
+    key : str, optional
+        The key the lines of the file are yielded with. Defaults to the path.
+    lines : int, optional
+        Start with the last `lines` lines of the file instead of the beginning.
+        Only applies if the file already exists, a file created later is read from
+        the beginning.
+    """
+
+    def __init__(self, path: Union[str, Path], key: str = None, lines: int = None):
+        self.path = os.path.abspath(str(path))
+        self.key = key if key is not None else str(path)
+        self.offset = 0
+        # Files appearing later are new output, none of their lines may be skipped
+        self.lines = lines if lines is not None and os.path.exists(self.path) else None
+        self._fd: int = None
+        self._inode: Tuple[int, int] = None
+        self._rest = b""
+
+    def _open(self) -> bool:
+        try:
+            self._fd = os.open(self.path, os.O_RDONLY)
+        except FileNotFoundError:
+            return False
+        st = os.fstat(self._fd)
+        self._inode = (st.st_dev, st.st_ino)
+        self.offset, self._rest = 0, b""
+        if self.lines is not None:
+            self.offset = _tail_offset(self._fd, st.st_size, self.lines)
+        return True
+
+    def read(self) -> List[str]:
+        """Return the complete lines appended since the last call."""
+        if self._fd is None and not self._open():
+            return list()
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return list()
+        if (st.st_dev, st.st_ino) != self._inode:
+            # The file was replaced, start over with the new one
+            self.close()
+            self.lines = None
+            if not self._open():
+                return list()
+            st = os.fstat(self._fd)
+        if st.st_size < self.offset:
+            self.offset, self._rest = 0, b""  # Truncated
+        size = st.st_size - self.offset
+        if size <= 0:
+            return list()
+        if size >= MMAP_THRESHOLD:
+            with mmap.mmap(self._fd, 0, access=mmap.ACCESS_READ) as mm:
+                data = mm[self.offset : self.offset + size]
+        else:
+            data = os.pread(self._fd, size, self.offset)
+        self.offset += len(data)
+        data = self._rest + data
+        lines = data.split(b"\n")
+        self._rest = lines.pop()
+        return [line.decode("utf-8", errors="replace") for line in lines]
+
+    def flush(self) -> List[str]:
+        """Return the last line of the file if it doesn't end with a newline."""
+        rest, self._rest = self._rest, b""
+        return [rest.decode("utf-8", errors="replace")] if rest else list()
+
+    def close(self) -> None:
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+
+
+def _tail_offset(fd: int, size: int, lines: int, block: int = 1 << 14) -> int:
+    """Return the offset of the last `lines` lines of a file."""
+    if lines <= 0:
+        return size
+    end = size
+    count = 0
+    while end > 0:
+        start = max(0, end - block)
+        data = os.pread(fd, end - start, start)
+        if end == size and data.endswith(b"\n"):
+            data = data[:-1]  # Ignore the newline of the last line
+        pos = len(data)
+        while True:
+            pos = data.rfind(b"\n", 0, pos)
+            if pos < 0:
+                break
+            count += 1
+            if count == lines:
+                return start + pos + 1
+        end = start
+    return 0
+
+
+class LogFollower:
+    """Follow many files and multiplex their new lines.
+
+    Parameters
+    ----------
+    files : Mapping[str, str or Path] or Iterable[str or Path], optional
+        The files to follow, optionally mapped from the keys of their lines.
+    lines : int, optional
+        Start with the last `lines` lines of every file. By default, files are read
+        from the beginning.
+    interval : float, optional
+        Seconds between two `stat` checks of all files. Defaults to 1 second.
+    inotify : bool, optional
+        Use inotify to get notified about changes early. Defaults to True if
+        inotify is available.
+    """
+
+    def __init__(
+        self,
+        files: Union[Mapping[str, Any], Iterable[Any]] = None,
+        lines: int = None,
+        interval: float = 1.0,
+        inotify: bool = True,
+    ):
+        self.lines = lines
+        self.interval = interval
+        self.files: Dict[str, LogFile] = dict()
+        self._inotify = _Inotify.create() if inotify else None
+        if isinstance(files, Mapping):
+            for key, path in files.items():
+                self.add(path, key)
+        elif files is not None:
+            for path in files:
+                self.add(path)
+
+    def __enter__(self) -> "LogFollower":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return len(self.files)
+
+    def __contains__(self, path: Union[str, Path]) -> bool:
+        return os.path.abspath(str(path)) in self.files
+
+    @property
+    def uses_inotify(self) -> bool:
+        return self._inotify is not None
+
+    def add(self, path: Union[str, Path], key: str = None) -> LogFile:
+        """Start following a file."""
+        file = LogFile(path, key, self.lines)
+        if file.path in self.files:
+            return self.files[file.path]
+        self.files[file.path] = file
+        if self._inotify is not None:
+            self._inotify.watch(os.path.dirname(file.path))
+        return file
+
+    def remove(self, path: Union[str, Path]) -> List[Line]:
+        """Stop following a file and return its remaining lines."""
+        file = self.files.pop(os.path.abspath(str(path)), None)
+        if file is None:
+            return list()
+        lines = file.read() + file.flush()
+        file.close()
+        return [(file.key, line) for line in lines]
+
+    def poll(self, paths: Iterable[str] = None) -> List[Line]:
+        """Read the new lines of all files (or only of the given paths)."""
+        files = self.files.values()
+        if paths is not None:
+            files = [self.files[p] for p in set(paths) if p in self.files]
+        out = list()
+        for file in files:
+            out.extend((file.key, line) for line in file.read())
+        return out
+
+    def follow(self, until: Callable[[], bool] = None) -> Iterator[Line]:
+        """Yield the new lines of the files as they are written.
+
+        Parameters
+        ----------
+        until : Callable[[], bool], optional
+            Stop after the poll for which the function returns True. By default,
+            the files are followed forever.
+        """
+        yield from self.poll()
+        next_scan = time.monotonic() + self.interval
+        while until is None or not until():
+            remaining = next_scan - time.monotonic()
+            if self._inotify is not None and remaining > 0:
+                yield from self.poll(self._inotify.read(remaining))
+                continue
+            if remaining > 0:
+                time.sleep(remaining)
+            yield from self.poll()
+            next_scan = time.monotonic() + self.interval
+        yield from self.poll()
+
+    def close(self) -> None:
+        for file in self.files.values():
+            file.close()
+        self.files.clear()
+        if self._inotify is not None:
+            self._inotify.close()
+            self._inotify = None
+
+
+def output_path(job: Squeue, stderr: bool = False) -> Path:
+    """Return the path of the output file of a job.
+
+    The filename patterns of sbatch (`%j`, `%A`, `%a`, `%x`, `%u`, `%%`) are
+    replaced and relative paths are resolved against the working directory of the
+    job. Without an explicit output file, `slurm-%j.out` (or `slurm-%A_%a.out` for
+    array tasks) is used.
+    """
+    pattern = job.standard_error if stderr else job.standard_output
+    array_job_id = job.array_job_id.number if job.array_job_id else None
+    task_id = job.array_task_id.number if job.array_task_id else None
+    if not pattern:
+        pattern = "slurm-%A_%a.out" if array_job_id else "slurm-%j.out"
+    values = {
+        "j": str(job.job_id),
+        "A": str(array_job_id or job.job_id),
+        "a": str(task_id) if task_id is not None else "4294967294",
+        "x": job.name or "",
+        "u": job.user_name or "",
+        "%": "%",
+    }
+    parts, i = list(), 0
+    while i < len(pattern):
+        char = pattern[i]
+        if char == "%" and i + 1 < len(pattern) and pattern[i + 1] in values:
+            parts.append(values[pattern[i + 1]])
+            i += 2
+        else:
+            parts.append(char)
+            i += 1
+    path = Path("".join(parts))
+    if not path.is_absolute() and job.current_working_directory:
+        path = Path(job.current_working_directory) / path
+    return path
+
+
+# Fields of the `Squeue` model needed to resolve the output files
+OUTPUT_FIELDS = [
+    "job_id",
+    "name",
+    "user_name",
+    "job_state",
+    "array_job_id",
+    "array_task_id",
+    "standard_output",
+    "standard_error",
+    "current_working_directory",
+]
+
+
+def _job_key(job: Squeue) -> str:
+    if job.array_job_id and job.array_job_id.number and job.array_task_id:
+        if job.array_task_id.number is not None:
+            return f"{job.array_job_id.number}_{job.array_task_id.number}"
+    return str(job.job_id)
+
+
+def follow_jobs(
+    lines: int = 10,
+    follow: bool = True,
+    stderr: bool = False,
+    interval: float = 1.0,
+    refresh: float = 30.0,
+    **filters,
+) -> Iterator[Line]:
+    """Yield the lines written to the output files of jobs.
+
+    Parameters
+    ----------
+    lines : int, optional
+        Start with the last `lines` lines of every file. Defaults to 10. If None,
+        the files are read from the beginning.
+    follow : bool, optional
+        If True (default), follow the files as they grow. Jobs which are submitted
+        later are picked up when the queue is refreshed. Stops when all jobs are
+        finished. If False, only yield the current lines.
+    stderr : bool, optional
+        Follow the error files instead of the output files.
+    interval : float, optional
+        Seconds between two checks of all files. Defaults to 1 second.
+    refresh : float, optional
+        Seconds between two squeue queries for new or finished jobs.
+    **filters
+        The filters of the jobs (see `slurmio.squeue`).
+
+    Yields
+    ------
+    Tuple[str, str]
+        The job id and the line.
+    """
+
+    def query() -> Dict[str, Path]:
+        jobs = squeue(fields=OUTPUT_FIELDS, **filters)
+        return {_job_key(job): output_path(job, stderr) for job in jobs}
+
+    with LogFollower(lines=lines, interval=interval) as follower:
+        active = query()
+        for key, path in active.items():
+            follower.add(path, key)
+        if not follow:
+            for path in list(follower.files):
+                yield from follower.remove(path)
+            return
+        next_refresh = time.monotonic() + refresh
+
+        def until() -> bool:
+            return time.monotonic() >= next_refresh
+
+        while True:
+            yield from follower.follow(until)
+            next_refresh = time.monotonic() + refresh
+            current = query()
+            for key, path in active.items():
+                if key not in current:
+                    yield from follower.remove(path)  # Finished
+            for key, path in current.items():
+                if key not in active:
+                    follower.add(path, key).lines = None  # New job, read everything
+            active = current
+            if not active:
+                return
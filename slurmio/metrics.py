@@ -0,0 +1,295 @@
+# -*- coding: utf-8 -*-
+# Author: Dylan Jones
+# Date:   2026-10-17
+
+"""Instrumentation of the slurm commands.
+
+Every call of `squeue`, `sacct`, `sbatch`, `scancel` (and their variants) is
+recorded as a `CallRecord`. The wall time of a call is split into phases:
+
+- `subprocess`: running the Slurm command line tool (fork, exec and its runtime),
+- `http`: the request to slurmrestd when the REST backend is used,
+- `decode`: decoding the JSON output,
+- `build`: validating and building the `Squeue` and `Sacct` models.
+
+The records are aggregated per command in the global `registry` and passed to the
+registered callbacks, for example to export them as OpenTelemetry spans.
+
+Examples
+--------
+>>> from slurmio import metrics
+>>> metrics.registry.add_callback(lambda rec: print(rec.command, rec.duration))
+>>> jobs = slurmio.squeue()
+squeue 0.153
+>>> print(metrics.registry.report())
+"""
+
+import functools
+import threading
+import time
+import warnings
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field, replace
+from typing import Any, Callable, Dict, Iterator, List, Tuple, TypeVar
+
+PHASES = ("subprocess", "http", "decode", "build")
+
+Callback = Callable[["CallRecord"], None]
+F = TypeVar("F", bound=Callable)
+
+
+@dataclass
+class CallRecord:
+    """The measurements of a single call of a slurm command.
+
+    Attributes
+    ----------
+    command : str
+        The name of the command, for example "squeue".
+    start : float
+        The Unix timestamp of the start of the call.
+    duration : float
+        The wall time of the call in seconds.
+    phases : List[Tuple[str, float, float]]
+        The measured phases as (name, offset to the start, duration) in seconds.
+    bytes : int
+        The number of bytes of output received from Slurm.
+    jobs : int
+        The number of decoded job records.
+    error : str
+        The name of the exception raised by the call, if any.
+    """
+
+    command: str
+    start: float = field(default_factory=time.time)
+    duration: float = 0.0
+    phases: List[Tuple[str, float, float]] = field(default_factory=list)
+    bytes: int = 0
+    jobs: int = 0
+    error: str = None
+
+    def __post_init__(self):
+        self._t0 = time.perf_counter()
+
+    def add(self, name: str, duration: float, offset: float = None) -> None:
+        """Add the duration of a phase to the call."""
+        if offset is None:
+            offset = time.perf_counter() - self._t0 - duration
+        self.phases.append((name, offset, duration))
+
+    @property
+    def times(self) -> Dict[str, float]:
+        """The total time spent in each phase."""
+        times = dict()
+        for name, _, duration in self.phases:
+            times[name] = times.get(name, 0.0) + duration
+        return times
+
+
+@dataclass
+class CommandStats:
+    """Aggregated measurements of all calls of one command."""
+
+    calls: int = 0
+    errors: int = 0
+    total: float = 0.0
+    phases: Dict[str, float] = field(default_factory=dict)
+    bytes: int = 0
+    jobs: int = 0
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.calls if self.calls else 0.0
+
+    @property
+    def other(self) -> float:
+        """Time not covered by any measured phase."""
+        return max(0.0, self.total - sum(self.phases.values()))
+
+
+def _format_bytes(size: float) -> str:
+    for unit in ("B", "KB", "MB", "GB"):
+        if size < 1024 or unit == "GB":
+            break
+        size /= 1024
+    return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+
+
+class MetricsRegistry:
+    """Thread-safe registry aggregating the call records per command."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats: Dict[str, CommandStats] = dict()
+        self._callbacks: List[Callback] = list()
+        self.enabled = True
+
+    def add_callback(self, callback: Callback) -> Callback:
+        """Call a function with every finished `CallRecord`. Returns the callback."""
+        with self._lock:
+            self._callbacks.append(callback)
+        return callback
+
+    def remove_callback(self, callback: Callback) -> None:
+        with self._lock:
+            self._callbacks.remove(callback)
+
+    def record(self, rec: CallRecord) -> None:
+        """Add a finished call to the statistics and pass it to the callbacks."""
+        if not self.enabled:
+            return
+        with self._lock:
+            stats = self._stats.setdefault(rec.command, CommandStats())
+            stats.calls += 1
+            stats.errors += rec.error is not None
+            stats.total += rec.duration
+            stats.bytes += rec.bytes
+            stats.jobs += rec.jobs
+            for name, duration in rec.times.items():
+                stats.phases[name] = stats.phases.get(name, 0.0) + duration
+            callbacks = list(self._callbacks)
+        for callback in callbacks:
+            try:
+                callback(rec)
+            except Exception as e:
+                warnings.warn(f"Metrics callback {callback!r} failed: {e}")
+
+    def stats(self) -> Dict[str, CommandStats]:
+        """Return a copy of the aggregated statistics per command."""
+        with self._lock:
+            return {
+                k: replace(v, phases=dict(v.phases)) for k, v in self._stats.items()
+            }
+
+    def reset(self) -> None:
+        """Clear the aggregated statistics."""
+        with self._lock:
+            self._stats.clear()
+
+    def report(self) -> str:
+        """Format the aggregated statistics as a table."""
+        stats = self.stats()
+        phases = [p for p in PHASES if any(p in s.phases for s in stats.values())]
+        headers = ["command", "calls", "errors", "total"] + phases
+        headers += ["other", "bytes", "jobs"]
+        rows = list()
+        for command, s in sorted(stats.items()):
+            row = [command, str(s.calls), str(s.errors), f"{s.total:.3f}s"]
+            row += [f"{s.phases.get(p, 0.0):.3f}s" for p in phases]
+            row += [f"{s.other:.3f}s", _format_bytes(s.bytes), str(s.jobs)]
+            rows.append(row)
+        widths = [max(len(r[i]) for r in [headers] + rows) for i in range(len(headers))]
+        lines = list()
+        for row in [headers] + rows:
+            cells = [row[0].ljust(widths[0])]
+            cells += [x.rjust(w) for x, w in zip(row[1:], widths[1:])]
+            lines.append("  ".join(cells))
+        return "\n".join(lines)
+
+
+# Global registry of all slurm command calls
+registry = MetricsRegistry()
+
+_current: ContextVar[CallRecord] = ContextVar("slurmio_call", default=None)
+
+
+def current() -> CallRecord:
+    """Return the record of the call running in the current context, if any."""
+    return _current.get()
+
+
+@contextmanager
+def call(command: str) -> Iterator[CallRecord]:
+    """Measure a call of a slurm command.
+
+    Calls nested in another call (for example the squeue call resolving the jobs of
+    `scancel_many`) are attributed to the outer call.
+    """
+    parent = _current.get()
+    if parent is not None:
+        yield parent
+        return
+    rec = CallRecord(command)
+    token = _current.set(rec)
+    try:
+        yield rec
+    except BaseException as e:
+        rec.error = type(e).__name__
+        raise
+    finally:
+        rec.duration = time.perf_counter() - rec._t0
+        _current.reset(token)
+        registry.record(rec)
+
+
+def instrument(command: str) -> Callable[[F], F]:
+    """Decorator measuring each call of a function as a call of a slurm command."""
+
+    def decorator(func: F) -> F:
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs) -> Any:
+            with call(command):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+@contextmanager
+def phase(name: str, command: str = None) -> Iterator[CallRecord]:
+    """Measure a phase of the current call.
+
+    If no call is running, the phase is recorded as a call of its own with the name
+    `command`.
+    """
+    if _current.get() is None:
+        with call(command or name), phase(name) as rec:
+            yield rec
+        return
+    rec = _current.get()
+    t0 = time.perf_counter()
+    try:
+        yield rec
+    finally:
+        t1 = time.perf_counter()
+        rec.add(name, t1 - t0, t0 - rec._t0)
+
+
+def otel_callback(tracer: object = None) -> Callback:
+    """Create a callback exporting the call records as OpenTelemetry spans.
+
+    Each call becomes a span named `slurmio.<command>` with a child span per phase.
+    Requires the `opentelemetry-api` package.
+
+    Parameters
+    ----------
+    tracer : opentelemetry.trace.Tracer, optional
+        The tracer creating the spans. Defaults to the tracer of the global provider.
+
+    Examples
+    --------
+    >>> registry.add_callback(otel_callback())
+    """
+    from opentelemetry import trace
+
+    if tracer is None:
+        tracer = trace.get_tracer("slurmio")
+
+    def export(rec: CallRecord) -> None:
+        start = int(rec.start * 1e9)
+        span = tracer.start_span(f"slurmio.{rec.command}", start_time=start)
+        span.set_attribute("slurmio.command", rec.command)
+        span.set_attribute("slurmio.bytes", rec.bytes)
+        span.set_attribute("slurmio.jobs", rec.jobs)
+        if rec.error is not None:
+            span.set_status(trace.Status(trace.StatusCode.ERROR, rec.error))
+        context = trace.set_span_in_context(span)
+        for name, offset, duration in rec.phases:
+            t0 = start + int(offset * 1e9)
+            child = tracer.start_span(name, context=context, start_time=t0)
+            child.end(end_time=t0 + int(duration * 1e9))
+        span.end(end_time=start + int(rec.duration * 1e9))
+
+    return export
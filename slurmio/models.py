@@ -3,10 +3,11 @@
 # Date:   2024-08-03
 
 from enum import Enum
+from functools import lru_cache
 from pprint import pformat
-from typing import Any, Dict, List, Union
+from typing import Any, Dict, Iterable, List, Tuple, Type, Union
 
-from pydantic import BaseModel
+from pydantic import BaseModel, create_model
 
 
 class Options(Enum):
@@ -377,3 +378,32 @@ class Sacct(Base):
 
     def __str__(self) -> str:
         return f"SacctJob({self.job_id}, {self.name})"
+
+
+@lru_cache(maxsize=None)
+def _projection(model: Type[Base], fields: Tuple[str, ...]) -> Type[Base]:
+    unknown = [name for name in fields if name not in model.model_fields]
+    if unknown:
+        raise ValueError(f"Unknown fields of {model.__name__}: {', '.join(unknown)}")
+    definitions = {
+        name: (model.model_fields[name].annotation, model.model_fields[name])
+        for name in fields
+    }
+    return create_model(f"{model.__name__}Projection", __base__=Base, **definitions)
+
+
+def project(model: Type[Base], fields: Iterable[str]) -> Type[Base]:
+    """Return a slim model containing only the given fields of a model.
+
+    The `job_id` field is always included. The projected models are cached, so
+    projecting the same fields twice returns the same class.
+
+    Parameters
+    ----------
+    model : Type[Base]
+        The model to project, for example `Squeue` or `Sacct`.
+    fields : Iterable[str]
+        The names of the fields to keep.
+    """
+    names = ["job_id"] + [name for name in fields if name != "job_id"]
+    return _projection(model, tuple(dict.fromkeys(names)))
@@ -0,0 +1,458 @@
+# -*- coding: utf-8 -*-
+# Author: Dylan Jones
+# Date:   2026-10-17
+
+"""Backend talking to the Slurm REST API daemon (slurmrestd).
+
+The job records returned by slurmrestd have the same schema as the JSON output of
+the squeue and sacct command line tools, so the `Squeue` and `Sacct` models are
+reused as-is. All requests go over a small pool of persistent keep-alive HTTP
+connections, optionally via the Unix socket of slurmrestd, so polling the queue
+does not fork any process.
+
+Examples
+--------
+>>> from slurmio import set_backend, squeue
+>>> from slurmio.rest import RestBackend
+>>> set_backend(RestBackend("http://localhost:6820", token="..."))
+>>> jobs = squeue(user="user")
+"""
+
+import http.client
+import json
+import os
+import queue
+import re
+import socket
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Sequence, Tuple
+from urllib.parse import urlencode, urlsplit
+
+from . import metrics
+from .backends import Backend, Jobs
+from .filters import Ids, Names, Time, _filter_jobs, _join, _squeue_state
+from .speedups import loads
+from .utility import get_user
+
+# Errors of a reused keep-alive connection that was closed by the server
+STALE_ERRORS = (
+    http.client.RemoteDisconnected,
+    http.client.CannotSendRequest,
+    ConnectionResetError,
+    BrokenPipeError,
+)
+
+RE_SBATCH = re.compile(r"^#SBATCH\s+--?([\w-]+)(?:[=\s]\s*(.*?))?\s*$")
+
+# #SBATCH options mapped to the string fields of the job description
+STRING_OPTIONS = {
+    "job_name": "name",
+    "partition": "partition",
+    "account": "account",
+    "qos": "qos",
+    "array": "array",
+    "dependency": "dependency",
+    "comment": "comment",
+    "constraint": "constraints",
+    "reservation": "reservation",
+    "nodes": "nodes",
+    "output": "standard_output",
+    "error": "standard_error",
+    "input": "standard_input",
+    "chdir": "current_working_directory",
+    "mail_user": "mail_user",
+}
+# #SBATCH options mapped to the integer fields of the job description
+INT_OPTIONS = {
+    "ntasks": "tasks",
+    "ntasks_per_node": "tasks_per_node",
+    "cpus_per_task": "cpus_per_task",
+}
+
+# Native scancel filters mapped to the fields of the kill jobs request
+SCANCEL_FIELDS = {
+    "job_name": "job_name",
+    "state": "job_state",
+    "partition": "partition",
+    "user": "user_name",
+    "account": "account",
+    "qos": "qos",
+}
+
+MEMORY_UNITS = {"K": 1 / 1024, "M": 1, "G": 1024, "T": 1024 * 1024}
+
+
+class _UnixHTTPConnection(http.client.HTTPConnection):
+    """HTTP connection over a Unix domain socket."""
+
+    def __init__(self, path: str, timeout: float = None):
+        super().__init__("localhost", timeout=timeout)
+        self.socket_path = path
+
+    def connect(self) -> None:
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        if self.timeout is not None:
+            sock.settimeout(self.timeout)
+        sock.connect(self.socket_path)
+        self.sock = sock
+
+
+class ConnectionPool:
+    """Thread-safe pool of persistent HTTP connections to one server.
+
+    Connections are kept open between requests (HTTP keep-alive) and handed out to
+    one thread at a time. A request on a reused connection that was closed by the
+    server in the meantime is retried once on a fresh connection.
+
+    Parameters
+    ----------
+    url : str
+        The base URL of the server, for example `http://localhost:6820`.
+    socket_path : str, optional
+        Connect to this Unix socket instead of the host and port of the URL.
+    size : int, optional
+        The maximal number of idle connections kept open. Defaults to 4.
+    timeout : float, optional
+        The socket timeout of the connections in seconds. Defaults to 30.
+    """
+
+    def __init__(
+        self,
+        url: str = "http://localhost",
+        socket_path: str = None,
+        size: int = 4,
+        timeout: float = 30.0,
+    ):
+        parts = urlsplit(url)
+        self.scheme = parts.scheme or "http"
+        self.host = parts.hostname or "localhost"
+        self.port = parts.port
+        self.prefix = parts.path.rstrip("/")
+        self.socket_path = socket_path
+        self.timeout = timeout
+        self._idle: "queue.LifoQueue[http.client.HTTPConnection]"
+        self._idle = queue.LifoQueue(maxsize=size)
+
+    def _connect(self) -> http.client.HTTPConnection:
+        if self.socket_path is not None:
+            return _UnixHTTPConnection(self.socket_path, self.timeout)
+        if self.scheme == "https":
+            return http.client.HTTPSConnection(
+                self.host, self.port, timeout=self.timeout
+            )
+        return http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+
+    def _acquire(self) -> Tuple[http.client.HTTPConnection, bool]:
+        try:
+            return self._idle.get_nowait(), True
+        except queue.Empty:
+            return self._connect(), False
+
+    def _release(self, conn: http.client.HTTPConnection) -> None:
+        try:
+            self._idle.put_nowait(conn)
+        except queue.Full:
+            conn.close()
+
+    def request(
+        self,
+        method: str,
+        path: str,
+        body: bytes = None,
+        headers: Dict[str, str] = None,
+    ) -> Tuple[int, bytes]:
+        """Send a request and return the status code and the response body."""
+        path = self.prefix + path
+        conn, reused = self._acquire()
+        while True:
+            try:
+                conn.request(method, path, body=body, headers=headers or {})
+                response = conn.getresponse()
+                data = response.read()
+            except STALE_ERRORS:
+                conn.close()
+                if not reused:
+                    raise
+                # The server closed the idle connection, retry on a fresh one
+                conn, reused = self._connect(), False
+                continue
+            except BaseException:
+                conn.close()
+                raise
+            break
+        if response.will_close:
+            conn.close()
+        else:
+            self._release(conn)
+        return response.status, data
+
+    def close(self) -> None:
+        """Close all idle connections."""
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                return
+
+
+def _minutes(time: str) -> int:
+    """Convert a Slurm time limit like `1-12:00:00` or `90` to minutes."""
+    days, _, rest = time.rpartition("-")
+    parts = [int(x) for x in rest.split(":")]
+    if days:
+        # days-hours[:minutes[:seconds]]
+        parts += [0] * (3 - len(parts))
+        hours, minutes, seconds = parts
+        hours += 24 * int(days)
+    elif len(parts) == 1:
+        hours, minutes, seconds = 0, parts[0], 0
+    elif len(parts) == 2:
+        hours, minutes, seconds = 0, parts[0], parts[1]
+    else:
+        hours, minutes, seconds = parts
+    return 60 * hours + minutes + (1 if seconds else 0)
+
+
+def _megabytes(mem: str) -> int:
+    """Convert a Slurm memory size like `4G` or `500` to megabytes."""
+    mem = mem.strip().upper().rstrip("B")
+    unit = mem[-1] if mem and mem[-1] in MEMORY_UNITS else "M"
+    value = mem[:-1] if mem and mem[-1] in MEMORY_UNITS else mem
+    return int(float(value) * MEMORY_UNITS[unit])
+
+
+def _number(value: int) -> Dict[str, Any]:
+    return {"set": True, "infinite": False, "number": value}
+
+
+def _script_options(script: str) -> Dict[str, str]:
+    """Parse the #SBATCH options at the top of a job script."""
+    options = dict()
+    for line in script.splitlines()[1:]:
+        line = line.strip()
+        if not line:
+            continue
+        if not line.startswith("#"):
+            break
+        match = RE_SBATCH.match(line)
+        if match is not None:
+            key, value = match.groups()
+            options[key.replace("-", "_")] = value if value is not None else ""
+    return options
+
+
+def _arg_options(args: Sequence[str]) -> Dict[str, str]:
+    """Parse sbatch command line options like `--hold` or `--dependency=afterok:1`."""
+    options = dict()
+    args = list(args)
+    while args:
+        arg = args.pop(0)
+        if not arg.startswith("-"):
+            raise ValueError(f"Unexpected sbatch argument {arg!r}")
+        key, sep, value = arg.lstrip("-").partition("=")
+        if not sep and args and not args[0].startswith("-"):
+            value = args.pop(0)
+        options[key.replace("-", "_")] = value
+    return options
+
+
+def _environment(export: str) -> List[str]:
+    """Build the environment of a job from the value of the `--export` option."""
+    env = dict()
+    for item in export.split(","):
+        key, sep, value = item.partition("=")
+        if item == "ALL":
+            env.update(os.environ)
+        elif sep:
+            env[key] = value
+        elif item != "NONE" and item in os.environ:
+            env[item] = os.environ[item]
+    return [f"{k}={v}" for k, v in env.items()]
+
+
+def _job_description(script: str, args: Sequence[str] = None) -> Dict[str, Any]:
+    """Build the slurmrestd job description from the #SBATCH options of a script.
+
+    slurmrestd does not interpret the #SBATCH lines of the submitted script, so the
+    supported options are converted to the fields of the job description. The
+    command line options `args` take precedence over the ones of the script.
+    """
+    job: Dict[str, Any] = {
+        "current_working_directory": os.getcwd(),
+        "environment": [f"{k}={v}" for k, v in os.environ.items()],
+    }
+    options = _script_options(script)
+    options.update(_arg_options(args or ()))
+    options.pop("parsable", None)
+    for key, value in options.items():
+        if key in STRING_OPTIONS:
+            job[STRING_OPTIONS[key]] = value
+        elif key in INT_OPTIONS:
+            job[INT_OPTIONS[key]] = int(value)
+        elif key == "time":
+            job["time_limit"] = _number(_minutes(value))
+        elif key == "mem":
+            job["memory_per_node"] = _number(_megabytes(value))
+        elif key == "mem_per_cpu":
+            job["memory_per_cpu"] = _number(_megabytes(value))
+        elif key == "priority":
+            job["priority"] = _number(int(value))
+        elif key == "mail_type":
+            job["mail_type"] = value.split(",")
+        elif key == "nodelist":
+            job["required_nodes"] = value.split(",")
+        elif key == "exclude":
+            job["excluded_nodes"] = value.split(",")
+        elif key == "hold":
+            job["hold"] = True
+        elif key == "export":
+            job["environment"] = _environment(value)
+        else:
+            raise ValueError(f"Option --{key} is not supported by the REST backend")
+    return job
+
+
+class RestBackend(Backend):
+    """Backend using the REST API of slurmrestd.
+
+    Parameters
+    ----------
+    url : str, optional
+        The base URL of slurmrestd. Defaults to `http://localhost:6820`.
+    token : str, optional
+        The JWT used for authentication. Defaults to the `SLURM_JWT` environment
+        variable. Not required when connecting via the Unix socket.
+    user : str, optional
+        The user name sent with the token. Defaults to the current user.
+    version : str, optional
+        The version of the OpenAPI plugins of slurmrestd. Defaults to `v0.0.40`.
+    socket_path : str, optional
+        Connect to this Unix socket of slurmrestd instead of the URL.
+    pool_size : int, optional
+        The maximal number of idle connections kept open. Defaults to 4.
+    timeout : float, optional
+        The socket timeout of the connections in seconds. Defaults to 30.
+    """
+
+    def __init__(
+        self,
+        url: str = "http://localhost:6820",
+        token: str = None,
+        user: str = None,
+        version: str = "v0.0.40",
+        socket_path: str = None,
+        pool_size: int = 4,
+        timeout: float = 30.0,
+    ):
+        self.token = token if token is not None else os.environ.get("SLURM_JWT")
+        self.user = user or get_user()
+        self.version = version
+        self.pool = ConnectionPool(url, socket_path, pool_size, timeout)
+
+    def close(self) -> None:
+        self.pool.close()
+
+    def request(
+        self, method: str, path: str, params: Dict[str, str] = None, data: Any = None
+    ) -> Dict[str, Any]:
+        """Send a request to slurmrestd and return the decoded response.
+
+        Raises
+        ------
+        Exception
+            If the request fails or the response contains errors.
+        """
+        if params:
+            path += "?" + urlencode(params)
+        headers = {"Accept": "application/json"}
+        if self.token:
+            headers["X-SLURM-USER-NAME"] = self.user
+            headers["X-SLURM-USER-TOKEN"] = self.token
+        body = None
+        if data is not None:
+            body = json.dumps(data).encode("utf-8")
+            headers["Content-Type"] = "application/json"
+        with metrics.call("slurmrestd") as rec:
+            with metrics.phase("http"):
+                status, out = self.pool.request(method, path, body, headers)
+            rec.bytes += len(out)
+            with metrics.phase("decode"):
+                try:
+                    raw = loads(out) if out else dict()
+                except ValueError:
+                    raw = dict()
+            rec.jobs += len(raw.get("jobs") or [])
+        if raw.get("errors"):
+            raise Exception(raw["errors"])
+        if status >= 400:
+            raise Exception(f"{method} {path} failed with status {status}: {out!r}")
+        return raw
+
+    def squeue(self, nodelist: Names = None, **filters) -> Jobs:
+        if nodelist:
+            raise ValueError("The nodelist filter is not supported by the REST backend")
+        raw = self.request("GET", f"/slurm/{self.version}/jobs")
+        return _filter_jobs(raw["jobs"], "user_name", _squeue_state, **filters)
+
+    def sacct(
+        self,
+        user: Names = None,
+        job_id: Ids = None,
+        states: Names = None,
+        partition: Names = None,
+        name: Names = None,
+        account: Names = None,
+        qos: Names = None,
+        nodelist: Names = None,
+        start: Time = None,
+        end: Time = None,
+        all_users: bool = False,
+    ) -> Jobs:
+        if not user and not all_users and not job_id:
+            # Like sacct, explicitly requested jobs are returned for any user
+            user = self.user
+        params = dict()
+        for key, value in (
+            ("users", user),
+            ("step", job_id),
+            ("state", states),
+            ("partition", partition),
+            ("job_name", name),
+            ("account", account),
+            ("qos", qos),
+            ("node", nodelist),
+        ):
+            if value:
+                params[key] = _join(value)
+        for key, value in (("start_time", start), ("end_time", end)):
+            if value is not None:
+                if isinstance(value, datetime):
+                    value = str(int(value.timestamp()))
+                params[key] = value
+        raw = self.request("GET", f"/slurmdb/{self.version}/jobs", params)
+        return raw["jobs"]
+
+    def sbatch(
+        self, script: str = None, file: Path = None, args: Sequence[str] = None
+    ) -> Tuple[int, str]:
+        if file is not None:
+            script = Path(file).read_text()
+        data = {"script": script, "job": _job_description(script, args)}
+        raw = self.request("POST", f"/slurm/{self.version}/job/submit", data=data)
+        return int(raw["job_id"]), raw.get("cluster") or None
+
+    def scancel(
+        self, job_ids: Sequence[str] = None, max_workers: int = 1, **filters
+    ) -> str:
+        # All jobs are signaled with a single request, `max_workers` is not needed
+        data: Dict[str, Any] = dict()
+        for key, value in filters.items():
+            if value is not None:
+                data[SCANCEL_FIELDS[key]] = value
+        if "job_state" in data:
+            data["job_state"] = [data["job_state"]]
+        if job_ids:
+            data["jobs"] = [str(x) for x in job_ids]
+        raw = self.request("DELETE", f"/slurm/{self.version}/jobs", data=data)
+        return json.dumps(raw.get("status", []))
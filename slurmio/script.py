@@ -2,15 +2,18 @@
 # Author: Dylan Jones
 # Date:   2024-08-03
 
+import glob
+import os
 import re
 from collections.abc import MutableSequence
+from concurrent.futures import ProcessPoolExecutor
 from dataclasses import dataclass
 from pathlib import Path
 from textwrap import dedent
-from typing import Iterable, List, Union
+from typing import Dict, Iterable, List, Optional, Tuple, Union
 
-from .options import SlurmOptions
-from .slurm import Squeue, sbatch
+from .options import OPTIONS, SlurmOptions
+from .slurm import Squeue, SubmittedJob, sbatch
 
 
 @dataclass
@@ -31,6 +34,59 @@ class SlurmCommand:
         self.comment = re.sub(pattern, repl, self.comment)
 
 
+# Shell, options and (command, comment) pairs of a parsed script
+Parsed = Tuple[Optional[str], List[Tuple[str, str]], List[Tuple[str, str]]]
+
+
+def parse_script(lines: Iterable[str], options_only: bool = False) -> Parsed:
+    """Parse the lines of a SLURM file in a single pass.
+
+    Parameters
+    ----------
+    lines : Iterable[str]
+        The lines of the file, for example an open file handle. Trailing newlines
+        are ignored.
+    options_only : bool, optional
+        Stop reading after the #SBATCH options and return no commands.
+
+    Returns
+    -------
+    shell : str or None
+        The interpreter of the shebang line, None if there is none.
+    options : List[Tuple[str, str]]
+        The validated option names (with underscores) and their values.
+    commands : List[Tuple[str, str]]
+        The commands and their comments.
+    """
+    shell = None
+    options: List[Tuple[str, str]] = list()
+    commands: List[Tuple[str, str]] = list()
+    first = header = True
+    for line in lines:
+        if first:
+            first = False
+            if line.startswith("#!"):
+                shell = line.replace("#!", "").strip()
+                continue
+        line = line.strip()
+        if header:
+            if not line and not options:
+                continue  # Skip empty lines before the options
+            if line.startswith("#SBATCH"):
+                key, value = line[7:].strip()[1:].split("=", 1)
+                key = key.lstrip("-").replace("-", "_")
+                if key not in OPTIONS:
+                    raise ValueError(f"Invalid option: {key}")
+                options.append((key, value))
+                continue
+            header = False
+            if options_only:
+                break
+        cmd, sep, comment = line.partition("#")
+        commands.append((cmd.strip(), comment.strip()) if sep else (line, ""))
+    return shell, options, commands
+
+
 class SlurmScript(MutableSequence):
     def __init__(
         self,
@@ -114,37 +170,17 @@ class SlurmScript(MutableSequence):
     def __delitem__(self, index: Union[int, slice]) -> None:
         del self._commands[index]
 
-    def loads(self, data: str) -> None:
-        """Parse the content of a SLURM file."""
-        lines = data.splitlines(keepends=False)
-        # Parse shebang line
-        if lines[0].startswith("#!"):
-            self._shell = lines.pop(0).replace("#!", "").strip()
-
-        # Parse SLURM options
+    def _set_parsed(self, parsed: "Parsed") -> None:
+        shell, options, commands = parsed
+        if shell is not None:
+            self._shell = shell
         self._options.clear()
-        # Skip empty lines
-        while lines and not lines[0].strip():
-            lines.pop(0)
+        self._options._options.update(options)
+        self._commands = [SlurmCommand(cmd, comment) for cmd, comment in commands]
 
-        while lines:
-            line = lines[0].strip()
-            if not line.startswith("#SBATCH"):
-                break
-            line = lines.pop(0).replace("#SBATCH", "").strip()
-            key, value = line[1:].split("=", 1)
-            self._options[key.lstrip("--")] = value
-
-        # Parse commands
-        cmds = list()
-        for s in lines:
-            s = s.strip()
-            if "#" in s:
-                command, comment = s.split("#", 1)
-                cmds.append(SlurmCommand(command.strip(), comment.strip()))
-            else:
-                cmds.append(SlurmCommand(s))
-        self._commands = cmds
+    def loads(self, data: str) -> None:
+        """Parse the content of a SLURM file."""
+        self._set_parsed(parse_script(data.splitlines()))
 
     def dumps(self, linesep: str = "\n") -> str:
         """Serialize the SLURM file to a string."""
@@ -173,8 +209,7 @@ class SlurmScript(MutableSequence):
             raise FileNotFoundError(f"File not found: {file}")
 
         with open(str(file), "r") as fh:
-            data = fh.read()
-        self.loads(data)
+            self._set_parsed(parse_script(fh))
 
     def dump(self, file: Union[str, Path] = None, mkdir: bool = False) -> None:
         """Save the SLURM file to disk."""
@@ -283,6 +318,101 @@ class SlurmScript(MutableSequence):
                 comment = re.compile(comment)
             return [cmd for cmd in self._commands if comment.match(cmd.comment)]
 
-    def sbatch(self) -> Squeue:
-        """Submit the SLURM file as a job."""
-        return sbatch(self.dumps())
+    def sbatch(
+        self, wait: bool = True, timeout: float = None, **kwargs
+    ) -> Union[Squeue, SubmittedJob]:
+        """Submit the SLURM file as a job (see `slurmio.sbatch`).
+
+        The keyword arguments (`hold`, `dependency`, `export`, `args`) are passed on
+        to `slurmio.sbatch`.
+        """
+        return sbatch(self.dumps(), wait=wait, timeout=timeout, **kwargs)
+
+
+def _parse_files(paths: List[str], options_only: bool) -> List[Parsed]:
+    parsed = list()
+    for path in paths:
+        try:
+            with open(path, "r") as fh:
+                parsed.append(parse_script(fh, options_only))
+        except ValueError as e:
+            # Includes decoding errors, whose constructor takes other arguments
+            raise ValueError(f"{path}: {e}") from e
+        except OSError as e:
+            raise OSError(f"{path}: {e}") from e
+    return parsed
+
+
+def _expand(
+    paths: Union[str, Path, Iterable[Union[str, Path]]], pattern: str
+) -> List[str]:
+    if isinstance(paths, (str, Path)):
+        paths = [paths]
+    files = list()
+    for path in paths:
+        path = str(path)
+        if os.path.isdir(path):
+            files.extend(
+                sorted(glob.glob(os.path.join(path, "**", pattern), recursive=True))
+            )
+        elif glob.has_magic(path):
+            files.extend(sorted(glob.glob(path, recursive=True)))
+        else:
+            files.append(path)
+    return files
+
+
+def load_many(
+    paths: Union[str, Path, Iterable[Union[str, Path]]],
+    workers: int = None,
+    options_only: bool = False,
+    pattern: str = "*.slurm",
+    chunksize: int = 256,
+) -> Union[Dict[str, SlurmScript], Dict[str, Dict[str, str]]]:
+    """Load many SLURM files in parallel.
+
+    Parameters
+    ----------
+    paths : str or Path or Iterable[str or Path]
+        Files, glob patterns like `runs/**/*.sh` or directories, which are searched
+        recursively for files matching `pattern`.
+    workers : int, optional
+        The number of worker processes. Defaults to the number of CPUs. With one
+        worker or few files, the files are loaded in the current process.
+    options_only : bool, optional
+        Only read the #SBATCH options of the files and return them as plain
+        dictionaries instead of `SlurmScript` objects. The rest of each file is not
+        read.
+    pattern : str, optional
+        The pattern of the files in directories. Defaults to `*.slurm`.
+    chunksize : int, optional
+        The maximal number of files parsed per task of a worker process.
+
+    Returns
+    -------
+    Dict[str, SlurmScript] or Dict[str, Dict[str, str]]
+        The scripts, or their options if `options_only` is True, by path.
+    """
+    files = _expand(paths, pattern)
+    workers = workers or os.cpu_count() or 1
+    # Balance the chunks over the workers, but keep them small enough to stream
+    size = max(1, min(chunksize, -(-len(files) // (4 * workers))))
+    chunks = [files[i : i + size] for i in range(0, len(files), size)]
+    if workers > 1 and len(chunks) > 1:
+        with ProcessPoolExecutor(min(workers, len(chunks))) as executor:
+            results = executor.map(_parse_files, chunks, [options_only] * len(chunks))
+            parsed = [item for result in results for item in result]
+    else:
+        parsed = [
+            item for chunk in chunks for item in _parse_files(chunk, options_only)
+        ]
+
+    if options_only:
+        return {file: dict(options) for file, (_, options, _) in zip(files, parsed)}
+    scripts = dict()
+    for file, item in zip(files, parsed):
+        script = SlurmScript()
+        script._file = Path(file)
+        script._set_parsed(item)
+        scripts[file] = script
+    return scripts
@@ -2,15 +2,45 @@
 # Author: Dylan Jones
 # Date:   2024-08-03
 
-import json
+import re
 from dataclasses import dataclass
-from datetime import timedelta
+from datetime import datetime, timedelta
 from pathlib import Path
-from time import sleep
-from typing import Any, Dict, List, Union
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Mapping,
+    Sequence,
+    Set,
+    Type,
+    Union,
+)
 
-from .models import Sacct, Squeue
-from .utility import run
+from . import metrics
+from .backends import _sbatch_args, get_backend
+from .cache import SnapshotCache
+from .cleanup import RE_SLURM_FILE, RE_SLURM_OUT, CleanupResult, cleanup
+from .filters import (
+    Ids,
+    Names,
+    Time,
+    _filter_jobs,
+    _job_id_matcher,
+    _match_job_id,
+    _sacct_state,
+    _squeue_state,
+)
+from .models import Base, Sacct, Squeue, project
+from .speedups import gc_paused
+from .utility import get_user, run
+from .waiter import JobWaiter
+
+if TYPE_CHECKING:  # pragma: no cover
+    from .journal import SubmissionJournal
 
 
 @dataclass
@@ -139,64 +169,508 @@ def squeue_old(
     return items
 
 
-def squeue(user: str = None, job_id: Union[int, str] = None) -> List[Squeue]:
-    cmd = ["squeue", "--json"]
-    if user:
-        cmd += ["-u", user]
-    if job_id:
-        cmd += ["--job", str(job_id)]
-    out = run(cmd)
-    raw = json.loads(out)
-    errors = raw["errors"]
-    if errors:
-        raise Exception(errors)
-    return [Squeue(**job) for job in raw["jobs"]]
+def _fetch_squeue() -> List[Dict[str, Any]]:
+    return get_backend().squeue()
 
 
-def sacct(user: str = None, job_id: Union[int, str] = None) -> List[Sacct]:
-    cmd = ["sacct", "--json"]
-    if user:
-        cmd += ["-u", user]
-    if job_id:
-        cmd += ["--job", str(job_id)]
-    out = run(cmd)
-    raw = json.loads(out)
-    errors = raw["errors"]
-    if errors:
-        raise Exception(errors)
-    return [Sacct(**job) for job in raw["jobs"]]
+def _fetch_sacct() -> List[Dict[str, Any]]:
+    start = datetime.now().replace(microsecond=0) - sacct_cache_window
+    return get_backend().sacct(start=start, all_users=True)
+
+
+# Shared full-queue snapshots used by `squeue(..., cache=True)` and
+# `sacct(..., cache=True)`. Adjust the `ttl` attribute to change the time to live.
+squeue_cache = SnapshotCache(_fetch_squeue)
+sacct_cache = SnapshotCache(_fetch_sacct)
+
+# The sacct snapshot holds the jobs of all users which were eligible or running
+# within this window before the fetch. Older jobs are not found with `cache=True`.
+sacct_cache_window = timedelta(days=1)
+
+
+def _build(
+    model: Type[Base], jobs: Iterable[Dict[str, Any]], fields: Sequence[str] = None
+) -> Iterator[Base]:
+    """Build models from raw job records, optionally only with the given fields."""
+    if fields is None:
+        for job in jobs:
+            yield model(**job)
+        return
+    model = project(model, fields)
+    names = tuple(model.model_fields)
+    # Drop all other fields before validation
+    for job in jobs:
+        yield model(**{k: job[k] for k in names if k in job})
+
+
+def _from_cache(
+    cache: Union[bool, SnapshotCache], default: SnapshotCache
+) -> Union[SnapshotCache, None]:
+    if not cache:
+        return None
+    return default if cache is True else cache
+
+
+def squeue_json(
+    user: Names = None,
+    job_id: Ids = None,
+    states: Names = None,
+    partition: Names = None,
+    name: Names = None,
+    account: Names = None,
+    qos: Names = None,
+    nodelist: Names = None,
+    cache: Union[bool, SnapshotCache] = False,
+) -> List[Dict[str, Any]]:
+    """Get the raw job records of the squeue command (see `squeue`)."""
+    filters = dict(
+        user=user,
+        job_id=job_id,
+        states=states,
+        partition=partition,
+        name=name,
+        account=account,
+        qos=qos,
+    )
+    cache = _from_cache(cache, squeue_cache)
+    if cache is not None:
+        if nodelist:
+            raise ValueError("The nodelist filter is not supported with a cache")
+        return _filter_jobs(cache.get(), "user_name", _squeue_state, **filters)
+    with metrics.call("squeue"):
+        return get_backend().squeue(nodelist=nodelist, **filters)
+
+
+def sacct_json(
+    user: Names = None,
+    job_id: Ids = None,
+    states: Names = None,
+    partition: Names = None,
+    name: Names = None,
+    account: Names = None,
+    qos: Names = None,
+    nodelist: Names = None,
+    start: Time = None,
+    end: Time = None,
+    all_users: bool = False,
+    cache: Union[bool, SnapshotCache] = False,
+) -> List[Dict[str, Any]]:
+    """Get the raw job records of the sacct command (see `sacct`)."""
+    filters = dict(
+        user=user,
+        job_id=job_id,
+        states=states,
+        partition=partition,
+        name=name,
+        account=account,
+        qos=qos,
+    )
+    cache = _from_cache(cache, sacct_cache)
+    if cache is not None:
+        if nodelist or start is not None or end is not None:
+            raise ValueError("Node and time filters are not supported with a cache")
+        if not user and not all_users and not job_id:
+            filters["user"] = get_user()
+        return _filter_jobs(cache.get(), "user", _sacct_state, **filters)
+    with metrics.call("sacct"):
+        return get_backend().sacct(
+            nodelist=nodelist, start=start, end=end, all_users=all_users, **filters
+        )
+
+
+@metrics.instrument("squeue")
+def squeue(
+    user: Names = None,
+    job_id: Ids = None,
+    states: Names = None,
+    partition: Names = None,
+    name: Names = None,
+    account: Names = None,
+    qos: Names = None,
+    nodelist: Names = None,
+    cache: Union[bool, SnapshotCache] = False,
+    fields: Sequence[str] = None,
+) -> List[Squeue]:
+    """Get a list of jobs from the squeue command.
+
+    All filters are passed to squeue, so only the matching jobs are transferred and
+    parsed. Each filter accepts a single value, a comma separated string or a
+    sequence of values.
+
+    Parameters
+    ----------
+    user : str or Sequence[str], optional
+        Only return jobs of these users.
+    job_id : int or str or Sequence, optional
+        Only return the jobs with these ids.
+    states : str or Sequence[str], optional
+        Only return jobs in these states, for example "RUNNING".
+    partition : str or Sequence[str], optional
+        Only return jobs of these partitions.
+    name : str or Sequence[str], optional
+        Only return jobs with these names.
+    account : str or Sequence[str], optional
+        Only return jobs of these accounts.
+    qos : str or Sequence[str], optional
+        Only return jobs with these qualities of service.
+    nodelist : str or Sequence[str], optional
+        Only return jobs running on these nodes.
+    cache : bool or SnapshotCache, optional
+        If True, answer the query from the shared `squeue_cache` snapshot instead of
+        running squeue for every call. A custom `SnapshotCache` can also be passed.
+        The filters are then applied in memory.
+    fields : Sequence[str], optional
+        Only build the given fields of the `Squeue` model. All other fields are
+        dropped before validation and the jobs are returned as slim models.
+    """
+    jobs = squeue_json(
+        user, job_id, states, partition, name, account, qos, nodelist, cache
+    )
+    with metrics.phase("build"), gc_paused():
+        return list(_build(Squeue, jobs, fields))
+
+
+@metrics.instrument("sacct")
+def sacct(
+    user: Names = None,
+    job_id: Ids = None,
+    states: Names = None,
+    partition: Names = None,
+    name: Names = None,
+    account: Names = None,
+    qos: Names = None,
+    nodelist: Names = None,
+    start: Time = None,
+    end: Time = None,
+    all_users: bool = False,
+    cache: Union[bool, SnapshotCache] = False,
+    fields: Sequence[str] = None,
+) -> List[Sacct]:
+    """Get a list of jobs from the sacct command.
+
+    All filters are passed to sacct, see `squeue` for the common filters.
+
+    Parameters
+    ----------
+    start : datetime or str, optional
+        Only return jobs eligible or running after this time (`--starttime`).
+    end : datetime or str, optional
+        Only return jobs eligible or running before this time (`--endtime`).
+    all_users : bool, optional
+        Return the jobs of all users instead of only the current user.
+    cache : bool or SnapshotCache, optional
+        If True, answer the query from the shared `sacct_cache` snapshot of all users
+        instead of running sacct for every call. A custom `SnapshotCache` can also be
+        passed. The filters are then applied in memory. The snapshot only contains
+        the jobs of the last `slurmio.slurm.sacct_cache_window` (one day).
+    fields : Sequence[str], optional
+        Only build the given fields of the `Sacct` model. All other fields are
+        dropped before validation and the jobs are returned as slim models.
+    """
+    jobs = sacct_json(
+        user,
+        job_id,
+        states,
+        partition,
+        name,
+        account,
+        qos,
+        nodelist,
+        start,
+        end,
+        all_users,
+        cache,
+    )
+    with metrics.phase("build"), gc_paused():
+        return list(_build(Sacct, jobs, fields))
+
+
+def iter_squeue(
+    user: Names = None,
+    job_id: Ids = None,
+    states: Names = None,
+    partition: Names = None,
+    name: Names = None,
+    account: Names = None,
+    qos: Names = None,
+    nodelist: Names = None,
+    *,
+    fields: Sequence[str] = None,
+) -> Iterator[Squeue]:
+    """Iterate over the jobs of the squeue command while its output is read.
 
+    In contrast to `squeue`, the JSON output is parsed incrementally and each job is
+    yielded as soon as it is complete. The memory usage stays flat even for very
+    large queues and the first jobs are available before the full output is read.
+    Accepts the same filters as `squeue`.
+    """
+    jobs = get_backend().iter_squeue(
+        user=user,
+        job_id=job_id,
+        states=states,
+        partition=partition,
+        name=name,
+        account=account,
+        qos=qos,
+        nodelist=nodelist,
+    )
+    yield from _build(Squeue, jobs, fields)
 
-def sbatch(file_or_script: Union[str, Path]) -> Squeue:
-    """Submit a slurm job and return the job id."""
+
+def iter_sacct(
+    user: Names = None,
+    job_id: Ids = None,
+    states: Names = None,
+    partition: Names = None,
+    name: Names = None,
+    account: Names = None,
+    qos: Names = None,
+    nodelist: Names = None,
+    start: Time = None,
+    end: Time = None,
+    all_users: bool = False,
+    *,
+    fields: Sequence[str] = None,
+) -> Iterator[Sacct]:
+    """Iterate over the jobs of the sacct command while its output is read.
+
+    See `iter_squeue` for details. Accepts the same filters as `sacct`.
+    """
+    jobs = get_backend().iter_sacct(
+        user=user,
+        job_id=job_id,
+        states=states,
+        partition=partition,
+        name=name,
+        account=account,
+        qos=qos,
+        nodelist=nodelist,
+        start=start,
+        end=end,
+        all_users=all_users,
+    )
+    yield from _build(Sacct, jobs, fields)
+
+
+@metrics.instrument("squeue")
+def _fetch_squeue_jobs(job_ids: List[str]) -> List[Dict[str, Any]]:
+    return get_backend().squeue(job_id=job_ids)
+
+
+# Shared waiter resolving the `Squeue` objects of submitted jobs
+job_waiter = JobWaiter(_fetch_squeue_jobs, _match_job_id)
+
+
+@dataclass
+class SubmittedJob:
+    """A submitted job as returned by `sbatch --parsable`."""
+
+    job_id: int
+    cluster: str = None
+
+    def squeue(self, timeout: float = None) -> Squeue:
+        """Wait until the job shows up in the queue and return it."""
+        return Squeue(**job_waiter.wait(self.job_id, timeout))
+
+
+def _script_file(file_or_script: Union[str, Path]) -> Union[Path, None]:
+    """Return the path if the argument is an existing file, None if it is a script."""
+    if isinstance(file_or_script, str) and "\n" in file_or_script:
+        return None
     file = Path(file_or_script)
-    if file.exists():
-        cmd = ["sbatch", str(file)]
-    else:
-        cmd = [
-            "\n".join(["sbatch << EOF", file_or_script, "EOF"]),
-        ]
-    stdout = run(cmd, shell=True)
-    success_msg = "Submitted batch job"
-    assert success_msg in stdout
-    job_id = stdout.split()[3].strip()
+    return file if file.exists() else None
+
 
-    jobs = squeue(job_id=job_id)
-    while len(jobs) == 0:
-        sleep(0.1)
-        jobs = squeue(job_id=job_id)
-    return jobs[0]
+@metrics.instrument("sbatch")
+def sbatch(
+    file_or_script: Union[str, Path],
+    wait: bool = True,
+    timeout: float = None,
+    hold: bool = False,
+    dependency: Union[str, Ids] = None,
+    export: Union[str, Sequence[str], Mapping[str, str]] = None,
+    args: Sequence[str] = None,
+    journal: "SubmissionJournal" = None,
+) -> Union[Squeue, SubmittedJob]:
+    """Submit a slurm job.
 
+    Inline scripts are piped to the standard input of sbatch, no shell is involved.
 
+    Parameters
+    ----------
+    file_or_script : str or Path
+        The path of a slurm script file or the content of a slurm script.
+    wait : bool, optional
+        If True (default), wait until the job shows up in the queue and return its
+        `Squeue` object. Pending jobs of all callers are resolved together with
+        batched squeue queries. If False, return the `SubmittedJob` immediately.
+    timeout : float, optional
+        Maximal time to wait for the job to show up in the queue.
+    hold : bool, optional
+        Submit the job in a held state (`--hold`).
+    dependency : str or int or Sequence[int], optional
+        The dependencies of the job in the Slurm syntax, like `afterany:123`. If job
+        ids are given, the job starts after all of them completed successfully.
+    export : str or Sequence[str] or Mapping[str, str], optional
+        The environment variables propagated to the job (`--export`). A mapping is
+        exported in addition to the current environment.
+    args : Sequence[str], optional
+        Additional command line options of sbatch.
+    journal : SubmissionJournal, optional
+        If given, return the journaled job of an identical earlier submission which
+        is still queued or completed instead of submitting the script again.
+
+    Returns
+    -------
+    Squeue or SubmittedJob
+        The queued job if `wait` is True, the submitted job id otherwise.
+    """
+    if journal is not None:
+        return journal.sbatch(
+            file_or_script, wait, timeout, hold, dependency, export, args
+        )
+    options = _sbatch_args(hold, dependency, export, args)
+    file = _script_file(file_or_script)
+    if file is not None:
+        submitted = SubmittedJob(*get_backend().sbatch(file=file, args=options))
+    else:
+        result = get_backend().sbatch(script=file_or_script, args=options)
+        submitted = SubmittedJob(*result)
+    if not wait:
+        return submitted
+    return submitted.squeue(timeout)
+
+
+@metrics.instrument("scancel")
 def scancel(job_id: Union[int, str]) -> str:
     """Cancel a slurm job and return the output."""
-    cmd = ["scancel", str(job_id)]
-    out = run(cmd)
-    return out
+    return get_backend().scancel([str(job_id)])
+
+
+@metrics.instrument("scancel")
+def scancel_many(
+    job_ids: Iterable[Union[int, str]] = None,
+    name: Union[str, re.Pattern] = None,
+    job_name: str = None,
+    state: Union[str, Sequence[str]] = None,
+    partition: str = None,
+    user: str = None,
+    account: str = None,
+    qos: str = None,
+    max_workers: int = 1,
+    dry_run: bool = False,
+) -> Set[str]:
+    """Cancel many slurm jobs with as few scancel calls as possible.
+
+    Filters with a native scancel flag (`job_name`, a single `state`, `partition`,
+    `user`, `account` and `qos`) are pushed down to scancel. If only such filters are
+    given, a single scancel call cancels all matching jobs. Otherwise, the matching
+    job ids are resolved with one squeue call and packed into as few scancel calls as
+    the argument size limit of the OS allows.
+
+    Parameters
+    ----------
+    job_ids : Iterable[int or str], optional
+        The ids of the jobs to cancel. Array jobs and ranges of array tasks, like
+        `1234_[1-5,7]`, are supported.
+    name : str or re.Pattern, optional
+        Regular expression the job names have to match (resolved via squeue).
+    job_name : str, optional
+        Exact job name (native filter).
+    state : str or Sequence[str], optional
+        Job state(s), like `PENDING` or `RUNNING`. A single state is a native filter.
+    partition : str, optional
+        Partition name (native filter).
+    user : str, optional
+        User name (native filter).
+    account : str, optional
+        Account name (native filter).
+    qos : str, optional
+        Quality of service (native filter).
+    max_workers : int, optional
+        Number of scancel calls to run in parallel. Defaults to 1.
+    dry_run : bool, optional
+        If True, only resolve and return the ids of the matching jobs.
+
+    Returns
+    -------
+    Set[str]
+        The ids of the jobs passed to scancel. Empty if the cancellation was pushed
+        down to scancel filters completely.
+    """
+    if isinstance(state, (list, tuple, set)) and len(state) == 1:
+        state = next(iter(state))
+    filters = dict(
+        job_name=job_name,
+        state=state,
+        partition=partition,
+        user=user,
+        account=account,
+        qos=qos,
+    )
+    filters = {k: v for k, v in filters.items() if v is not None}
+    ids = [str(job_id) for job_id in job_ids] if job_ids is not None else None
+    if ids is not None and not ids:
+        return set()
+    if ids is None and name is None and not filters:
+        raise ValueError("Refusing to cancel jobs without any ids or filters")
+
+    backend = get_backend()
+    native = isinstance(state, str) or state is None
+    if name is None and native and not dry_run:
+        if ids is None:
+            backend.scancel(**filters)
+            return set()
+    else:
+        # Resolve the matching job ids with a single squeue call
+        if isinstance(name, str):
+            name = re.compile(name)
+        jobs = squeue_json(
+            user=user,
+            states=state,
+            partition=partition,
+            name=job_name,
+            account=account,
+            qos=qos,
+        )
+        match = _job_id_matcher(ids) if ids is not None else None
+        resolved = list()
+        for job in jobs:
+            if match is not None and not match(job):
+                continue
+            if name is not None and not name.search(job.get("name") or ""):
+                continue
+            resolved.append(str(job["job_id"]))
+        ids = resolved
+        if dry_run or not ids:
+            return set(ids)
+
+    # Non-native filters were resolved to the job ids above
+    backend.scancel(ids, max_workers, **(filters if native else {}))
+    return set(ids)
+
+
+def rm_slurm_files(
+    root: Union[str, Path] = ".",
+    recursive: bool = False,
+    keep_queued: bool = False,
+    errors: bool = False,
+) -> CleanupResult:
+    """Remove the slurm output files (`slurm-<id>.out`) in a directory.
 
+    By default, all output files are removed without querying Slurm. See
+    `slurmio.cleanup.cleanup` for more filters.
 
-def rm_slurm_files(root: Union[str, Path] = ".") -> None:
-    """Remove all slurm files in the current directory."""
-    root = Path(root)
-    for file in root.glob("slurm-*.out"):
-        file.unlink()
+    Parameters
+    ----------
+    root : str or Path, optional
+        The directory to clean up. Defaults to the current directory.
+    recursive : bool, optional
+        Also clean up all subdirectories.
+    keep_queued : bool, optional
+        Keep the files of jobs still in the queue (requires squeue).
+    errors : bool, optional
+        Also remove the `slurm-<id>.err` files.
+    """
+    pattern = RE_SLURM_FILE if errors else RE_SLURM_OUT
+    return cleanup(root, recursive, keep_queued=keep_queued, pattern=pattern)
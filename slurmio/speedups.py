@@ -0,0 +1,112 @@
+# -*- coding: utf-8 -*-
+# Author: Dylan Jones
+# Date:   2026-10-17
+
+"""Fast decoding of the JSON output of Slurm and bulk construction of the models.
+
+The JSON output of squeue and sacct is decoded with orjson or msgspec if one of
+them is installed (`pip install slurmio[fast]`), falling back to the standard
+library otherwise. See `set_json_decoder` to select a decoder explicitly.
+
+Decoding and building the models of large queues allocates millions of container
+objects, which repeatedly triggers the cyclic garbage collector. Since the job
+records don't contain reference cycles, the collector is paused while they are
+built (`gc_paused`).
+"""
+
+import gc
+import json
+import threading
+from contextlib import contextmanager
+from typing import Any, Callable, Iterator, Union
+
+DECODERS = ("orjson", "msgspec", "json")
+
+_loads: Callable[[Union[str, bytes]], Any] = json.loads
+_decoder = "json"
+
+_gc_lock = threading.Lock()
+_gc_depth = 0
+_gc_was_enabled = False
+
+
+def _get_loads(name: str) -> Callable[[Union[str, bytes]], Any]:
+    if name == "orjson":
+        import orjson
+
+        return orjson.loads
+    if name == "msgspec":
+        import msgspec
+
+        return msgspec.json.Decoder().decode
+    if name == "json":
+        return json.loads
+    raise ValueError(f"Unknown JSON decoder {name!r}, use one of {DECODERS}")
+
+
+def set_json_decoder(name: str = "auto") -> str:
+    """Set the decoder of the JSON output of Slurm.
+
+    Parameters
+    ----------
+    name : str, optional
+        One of "orjson", "msgspec" or "json" (standard library). If "auto"
+        (default), the fastest installed decoder is used.
+
+    Returns
+    -------
+    str
+        The name of the selected decoder.
+
+    Raises
+    ------
+    ImportError
+        If the requested decoder is not installed.
+    """
+    global _loads, _decoder
+    if name == "auto":
+        for candidate in DECODERS:
+            try:
+                _loads = _get_loads(candidate)
+            except ImportError:
+                continue
+            _decoder = candidate
+            return _decoder
+    _loads = _get_loads(name)
+    _decoder = name
+    return _decoder
+
+
+def get_json_decoder() -> str:
+    """Return the name of the active JSON decoder."""
+    return _decoder
+
+
+def loads(data: Union[str, bytes]) -> Any:
+    """Decode a JSON document with the active decoder."""
+    return _loads(data)
+
+
+@contextmanager
+def gc_paused() -> Iterator[None]:
+    """Pause the cyclic garbage collector while allocating many acyclic objects.
+
+    The context can be nested and used from several threads at once. The collector
+    is enabled again when the last context exits, if it was enabled before.
+    """
+    global _gc_depth, _gc_was_enabled
+    with _gc_lock:
+        if _gc_depth == 0:
+            _gc_was_enabled = gc.isenabled()
+            gc.disable()
+        _gc_depth += 1
+    try:
+        yield
+    finally:
+        with _gc_lock:
+            _gc_depth -= 1
+            if _gc_depth == 0 and _gc_was_enabled:
+                gc.enable()
+
+
+set_json_decoder("auto")
@@ -0,0 +1,537 @@
+# -*- coding: utf-8 -*-
+# Author: Dylan Jones
+# Date:   2026-10-17
+
+"""Columnar storage of job snapshots for fast filtering and aggregation."""
+
+import math
+import operator
+from array import array
+from typing import Any, Callable, Dict, Iterable, List, Sequence, Tuple, Type, Union
+
+from .models import Base, Squeue
+from .slurm import sacct_json, squeue_json
+from .speedups import gc_paused
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover
+    np = None
+
+Jobs = Iterable[Dict[str, Any]]
+
+NUMBER_KEYS = {"set", "infinite", "number"}
+CATEGORICAL = ("str", "list")
+
+OPS: Dict[str, Callable[[Any, Any], bool]] = {
+    "==": operator.eq,
+    "!=": operator.ne,
+    "<": operator.lt,
+    "<=": operator.le,
+    ">": operator.gt,
+    ">=": operator.ge,
+}
+
+
+def _is_number(value: Any) -> bool:
+    return isinstance(value, dict) and value.keys() >= NUMBER_KEYS
+
+
+def _paths(job: Dict[str, Any], prefix: str = "") -> List[str]:
+    """Return the dotted paths of all values of a job that can be stored in columns."""
+    paths = list()
+    for key, value in job.items():
+        path = prefix + key
+        if _is_number(value):
+            paths.append(path)
+        elif isinstance(value, dict):
+            paths.extend(_paths(value, path + "."))
+        elif isinstance(value, list):
+            if all(isinstance(x, str) for x in value):
+                paths.append(path)
+        else:
+            paths.append(path)
+    return paths
+
+
+def _get(job: Dict[str, Any], keys: Sequence[str]) -> Any:
+    for key in keys:
+        if not isinstance(job, dict):
+            return None
+        job = job.get(key)
+    return job
+
+
+def _kind(value: Any) -> str:
+    if _is_number(value):
+        return "number"
+    if isinstance(value, bool):
+        return "bool"
+    if isinstance(value, int):
+        return "int"
+    if isinstance(value, float):
+        return "float"
+    if isinstance(value, list):
+        return "list"
+    return "str"
+
+
+def _to_float(value: Any) -> float:
+    if value is None:
+        return math.nan
+    if isinstance(value, dict):
+        if value.get("infinite"):
+            return math.inf
+        return float(value["number"]) if value.get("set", True) else math.nan
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return math.nan
+
+
+def _to_str(value: Any) -> Union[str, None]:
+    if value is None:
+        return None
+    if isinstance(value, list):
+        return ",".join(value)
+    return str(value)
+
+
+class Column:
+    """A typed column of a `JobTable`.
+
+    Numeric values (including the `number` of Slurm number objects) are stored in a
+    float array, missing values are NaN. Strings and lists of strings are dictionary
+    encoded: the column stores integer codes into the list of `categories`, missing
+    values have the code -1.
+    """
+
+    __slots__ = ("kind", "data", "categories")
+
+    def __init__(self, kind: str, data: Any, categories: List[str] = None):
+        self.kind = kind
+        self.data = data
+        self.categories = categories
+
+    @classmethod
+    def build(cls, kind: str, values: Iterable[Any], use_numpy: bool) -> "Column":
+        if kind in CATEGORICAL:
+            mapping: Dict[str, int] = dict()
+            codes = array("l")
+            for value in values:
+                value = _to_str(value)
+                if value is None:
+                    codes.append(-1)
+                else:
+                    codes.append(mapping.setdefault(value, len(mapping)))
+            data = np.array(codes, dtype=np.int64) if use_numpy else codes
+            return cls(kind, data, list(mapping))
+        data = array("d", map(_to_float, values))
+        if use_numpy:
+            data = np.frombuffer(data, dtype=np.float64)
+        return cls(kind, data)
+
+    @property
+    def categorical(self) -> bool:
+        return self.categories is not None
+
+    def __len__(self) -> int:
+        return len(self.data)
+
+    def code(self, value: Any) -> int:
+        """Return the code of a categorical value (-2 if it does not occur)."""
+        if value is None:
+            return -1
+        try:
+            return self.categories.index(_to_str(value))
+        except ValueError:
+            return -2
+
+    def take(self, indices: Any) -> "Column":
+        if np is not None and isinstance(self.data, np.ndarray):
+            data = self.data[indices]
+        else:
+            data = array(self.data.typecode, (self.data[i] for i in indices))
+        return Column(self.kind, data, self.categories)
+
+    def values(self) -> List[Any]:
+        """Return the decoded values of the column as a list."""
+        if self.categories is not None:
+            lookup = self.categories + [None]
+            return [lookup[c] for c in self.data.tolist()]
+        return [None if math.isnan(x) else x for x in self.data.tolist()]
+
+
+class JobTable:
+    """Columnar snapshot of jobs built directly from the squeue/sacct JSON output.
+
+    Each field is stored as a typed column (see `Column`). Nested fields, like the
+    `time.start` field of sacct jobs, are stored under their dotted path. Filtering,
+    sorting and grouping operate on whole columns at once and use NumPy if it is
+    installed.
+
+    Examples
+    --------
+    Count the running GPU jobs per partition and user:
+
+    >>> table = JobTable.from_json(jobs, fields=["job_state", "partition",
+    ...                                           "user_name", "tres_per_node"])
+    >>> running = table.filter(job_state="RUNNING")
+    >>> gpu = running.filter(running.where("tres_per_node", "!=", None))
+    >>> gpu.group_by("partition", "user_name").count()
+    {('gpu', 'alice'): 12, ('gpu', 'bob'): 3}
+    """
+
+    def __init__(self, columns: Dict[str, Column], use_numpy: bool = None):
+        self._columns = columns
+        self._numpy = (np is not None) if use_numpy is None else use_numpy
+        lengths = {len(c) for c in columns.values()}
+        if len(lengths) > 1:
+            raise ValueError("All columns must have the same length")
+        self._length = lengths.pop() if lengths else 0
+
+    @classmethod
+    def from_json(
+        cls, jobs: Jobs, fields: Sequence[str] = None, use_numpy: bool = None
+    ) -> "JobTable":
+        """Build a table from the raw job records of the squeue or sacct JSON output.
+
+        Parameters
+        ----------
+        jobs : Iterable[Dict[str, Any]]
+            The raw job records.
+        fields : Sequence[str], optional
+            The (dotted) paths of the fields to store. By default, all scalar fields,
+            number objects and lists of strings of the first job are stored.
+        use_numpy : bool, optional
+            Store the columns as NumPy arrays. Defaults to True if NumPy is
+            installed.
+        """
+        use_numpy = (np is not None) if use_numpy is None else use_numpy
+        if use_numpy and np is None:
+            raise ImportError("NumPy is not installed")
+        jobs = list(jobs)
+        if fields is None:
+            fields = _paths(jobs[0]) if jobs else list()
+        columns = dict()
+        for field in fields:
+            keys = field.split(".")
+            values = [_get(job, keys) for job in jobs]
+            kind = next((_kind(v) for v in values if v is not None), "str")
+            columns[field] = Column.build(kind, values, use_numpy)
+        return cls(columns, use_numpy)
+
+    @classmethod
+    def from_models(
+        cls, models: Iterable[Base], fields: Sequence[str] = None, **kwargs
+    ) -> "JobTable":
+        """Build a table from `Squeue` or `Sacct` objects."""
+        jobs = [model.model_dump(exclude_none=True) for model in models]
+        return cls.from_json(jobs, fields, **kwargs)
+
+    def to_records(self) -> List[Dict[str, Any]]:
+        """Return the rows as nested raw job records (the inverse of `from_json`)."""
+        records: List[Dict[str, Any]] = [dict() for _ in range(self._length)]
+        for name, column in self._columns.items():
+            *parents, key = name.split(".")
+            for record, value in zip(records, column.values()):
+                if value is None and column.kind != "number":
+                    continue
+                for parent in parents:
+                    record = record.setdefault(parent, dict())
+                record[key] = _restore(column.kind, value)
+        return records
+
+    def to_models(self, model: Type[Base] = Squeue) -> List[Base]:
+        """Convert the rows to model objects.
+
+        The table must contain all required fields of the model.
+        """
+        with gc_paused():
+            return [model(**record) for record in self.to_records()]
+
+    @property
+    def columns(self) -> List[str]:
+        return list(self._columns)
+
+    def column(self, name: str) -> Column:
+        return self._columns[name]
+
+    def __len__(self) -> int:
+        return self._length
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._columns
+
+    def __getitem__(self, name: str) -> List[Any]:
+        """Return the decoded values of a column."""
+        return self._columns[name].values()
+
+    def __repr__(self) -> str:
+        return f"JobTable({self._length} jobs, {len(self._columns)} columns)"
+
+    def _take(self, indices: Any) -> "JobTable":
+        columns = {k: c.take(indices) for k, c in self._columns.items()}
+        table = JobTable(columns, self._numpy)
+        table._length = len(indices)
+        return table
+
+    def where(self, name: str, op: str, value: Any) -> Any:
+        """Return a boolean mask comparing a column with a value.
+
+        Parameters
+        ----------
+        name : str
+            The name of the column.
+        op : str
+            The comparison operator, one of "==", "!=", "<", "<=", ">", ">=" or "in".
+            Only "==", "!=" and "in" are supported for categorical columns.
+        value : Any
+            The value to compare with. A collection of values for "in".
+        """
+        column = self._columns[name]
+        data = column.data
+        if column.categorical:
+            if op == "in":
+                codes = [column.code(v) for v in value]
+                if self._numpy:
+                    return np.isin(data, codes)
+                codes = set(codes)
+                return [c in codes for c in data]
+            if op not in ("==", "!="):
+                raise ValueError(f"Unsupported operator for categorical column: {op}")
+            value = column.code(value)
+        elif op == "in":
+            values = [_to_float(v) for v in value]
+            if self._numpy:
+                return np.isin(data, values)
+            values = set(values)
+            return [x in values for x in data]
+        elif value is None and op in ("==", "!="):
+            # Missing numeric values are stored as NaN
+            if self._numpy:
+                missing = np.isnan(data)
+                return missing if op == "==" else ~missing
+            return [math.isnan(x) == (op == "==") for x in data]
+        else:
+            value = _to_float(value)
+
+        func = OPS[op]
+        if self._numpy:
+            return func(data, value)
+        return [func(x, value) for x in data]
+
+    def mask(self, **conditions: Any) -> Any:
+        """Return a boolean mask of rows matching all conditions.
+
+        Each keyword maps a column name to a value (equality) or to a list, tuple or
+        set of values (membership).
+        """
+        result = None
+        for name, value in conditions.items():
+            if isinstance(value, (list, tuple, set, frozenset)):
+                m = self.where(name, "in", value)
+            else:
+                m = self.where(name, "==", value)
+            result = m if result is None else self._and(result, m)
+        if result is None:
+            return (
+                np.ones(self._length, dtype=bool) if self._numpy else [True] * len(self)
+            )
+        return result
+
+    def _and(self, a: Any, b: Any) -> Any:
+        if self._numpy:
+            return np.logical_and(a, b)
+        return [x and y for x, y in zip(a, b)]
+
+    def filter(self, *masks: Any, **conditions: Any) -> "JobTable":
+        """Return a table with the rows matching all masks and conditions.
+
+        Parameters
+        ----------
+        *masks : array-like of bool
+            Boolean masks, for example created with `where`.
+        **conditions : Any
+            Column conditions, see `mask`.
+
+        Examples
+        --------
+        >>> table.filter(table.where("time_limit", ">", 60), job_state="RUNNING")
+        """
+        m = self.mask(**conditions)
+        for other in masks:
+            m = self._and(m, other)
+        if self._numpy:
+            indices = np.flatnonzero(m)
+        else:
+            indices = [i for i, x in enumerate(m) if x]
+        return self._take(indices)
+
+    def count(self, *masks: Any, **conditions: Any) -> int:
+        """Return the number of rows matching all masks and conditions."""
+        m = self.mask(**conditions)
+        for other in masks:
+            m = self._and(m, other)
+        return int(np.count_nonzero(m)) if self._numpy else sum(m)
+
+    def sort(self, *names: str, descending: bool = False) -> "JobTable":
+        """Return a table sorted by one or more columns.
+
+        Categorical columns are sorted alphabetically by their values, missing values
+        are sorted first.
+        """
+        keys = [self._sort_key(name) for name in names]
+        if self._numpy:
+            # np.lexsort sorts by the last key first
+            indices = np.lexsort(keys[::-1]) if keys else np.arange(self._length)
+            if descending:
+                indices = indices[::-1]
+        else:
+            rows = list(zip(*keys)) if keys else [()] * self._length
+            indices = sorted(
+                range(self._length), key=rows.__getitem__, reverse=descending
+            )
+        return self._take(indices)
+
+    def _sort_key(self, name: str) -> Any:
+        column = self._columns[name]
+        if not column.categorical:
+            # Missing values are sorted first
+            if self._numpy:
+                return np.where(np.isnan(column.data), -np.inf, column.data)
+            return [-math.inf if math.isnan(x) else x for x in column.data]
+        order = sorted(range(len(column.categories)), key=column.categories.__getitem__)
+        ranks = [0] * len(order)
+        for rank, code in enumerate(order):
+            ranks[code] = rank + 1
+        ranks.append(0)  # Code -1 (missing) is sorted first
+        if self._numpy:
+            return np.asarray(ranks)[column.data]
+        return [ranks[c] for c in column.data]
+
+    def group_by(self, *names: str) -> "GroupBy":
+        """Group the rows by the values of one or more columns."""
+        return GroupBy(self, names)
+
+
+def _restore(kind: str, value: Any) -> Any:
+    """Convert a decoded column value back to its raw JSON representation."""
+    if kind == "number":
+        if value is None:
+            return {"set": False, "infinite": False, "number": 0}
+        if math.isinf(value):
+            return {"set": True, "infinite": True, "number": 0}
+        return {"set": True, "infinite": False, "number": int(value)}
+    if kind == "int":
+        return int(value)
+    if kind == "bool":
+        return bool(value)
+    if kind == "list":
+        return value.split(",") if value else list()
+    return value
+
+
+class GroupBy:
+    """Rows of a `JobTable` grouped by the values of one or more columns."""
+
+    def __init__(self, table: JobTable, names: Sequence[str]):
+        self._table = table
+        self._names = tuple(names)
+        self._inverse, self._keys = self._groups()
+
+    def _groups(self) -> Tuple[Any, List[tuple]]:
+        table = self._table
+        columns = [table.column(name) for name in self._names]
+        if not table._numpy:
+            groups: Dict[tuple, int] = dict()
+            rows = zip(*(c.data for c in columns)) if columns else [()] * len(table)
+            # NaN != NaN, missing numbers are grouped as None like by `np.unique`
+            rows = (tuple(None if x != x else x for x in row) for row in rows)
+            inverse = [groups.setdefault(row, len(groups)) for row in rows]
+            keys = [
+                tuple(
+                    None if x is None else _decode(c, x) for c, x in zip(columns, row)
+                )
+                for row in groups
+            ]
+            return inverse, keys
+
+        # Combine the per-column group indices to a single mixed-radix key
+        combined = np.zeros(len(table), dtype=np.int64)
+        uniques = list()
+        for column in columns:
+            values, inv = np.unique(column.data, return_inverse=True)
+            combined = combined * len(values) + inv.reshape(-1)
+            uniques.append(values)
+        keys_combined, inverse = np.unique(combined, return_inverse=True)
+        keys = list()
+        for key in keys_combined.tolist():
+            row = list()
+            for column, values in zip(reversed(columns), reversed(uniques)):
+                key, i = divmod(key, len(values))
+                row.append(_decode(column, values[i].item()))
+            keys.append(tuple(reversed(row)))
+        return inverse.reshape(-1), keys
+
+    def count(self) -> Dict[tuple, int]:
+        """Return the number of rows of each group."""
+        if self._table._numpy:
+            counts = np.bincount(self._inverse, minlength=len(self._keys))
+            return dict(zip(self._keys, counts.tolist()))
+        counts = [0] * len(self._keys)
+        for i in self._inverse:
+            counts[i] += 1
+        return dict(zip(self._keys, counts))
+
+    def sum(self, name: str) -> Dict[tuple, float]:
+        """Return the sum of a numeric column for each group, ignoring NaN."""
+        data = self._table.column(name).data
+        if self._table._numpy:
+            weights = np.where(np.isnan(data), 0.0, data)
+            sums = np.bincount(self._inverse, weights, minlength=len(self._keys))
+            return dict(zip(self._keys, sums.tolist()))
+        sums = [0.0] * len(self._keys)
+        for i, x in zip(self._inverse, data):
+            if not math.isnan(x):
+                sums[i] += x
+        return dict(zip(self._keys, sums))
+
+    def mean(self, name: str) -> Dict[tuple, float]:
+        """Return the mean of a numeric column for each group, ignoring NaN."""
+        data = self._table.column(name).data
+        sums = self.sum(name)
+        if self._table._numpy:
+            valid = (~np.isnan(data)).astype(np.float64)
+            counts = np.bincount(self._inverse, valid, minlength=len(self._keys))
+            counts = counts.tolist()
+        else:
+            counts = [0] * len(self._keys)
+            for i, x in zip(self._inverse, data):
+                if not math.isnan(x):
+                    counts[i] += 1
+        return {
+            key: sums[key] / n if n else math.nan for key, n in zip(self._keys, counts)
+        }
+
+
+def _decode(column: Column, value: Any) -> Any:
+    if column.categorical:
+        return column.categories[value] if value >= 0 else None
+    return None if math.isnan(value) else value
+
+
+def squeue_table(fields: Sequence[str] = None, **kwargs) -> JobTable:
+    """Build a `JobTable` from the squeue command.
+
+    The keyword arguments are passed to `slurmio.slurm.squeue_json`.
+    """
+    return JobTable.from_json(squeue_json(**kwargs), fields)
+
+
+def sacct_table(fields: Sequence[str] = None, **kwargs) -> JobTable:
+    """Build a `JobTable` from the sacct command.
+
+    The keyword arguments are passed to `slurmio.slurm.sacct_json`.
+    """
+    return JobTable.from_json(sacct_json(**kwargs), fields)
@@ -0,0 +1,212 @@
+# -*- coding: utf-8 -*-
+# Author: Dylan Jones
+# Date:   2026-10-17
+
+"""Compiled slurm script templates for rendering large parameter sweeps.
+
+A `SlurmTemplate` is compiled once from a `SlurmScript` whose options and commands
+contain named placeholders like `{{name}}`. The options are validated and the
+`#SBATCH` header and commands are serialized only once, the static segments and
+placeholders are then joined into a single format string. Rendering a variant is a
+single `str.format_map` call, no `SlurmScript` or `SlurmOptions` is constructed.
+
+The double braces keep shell syntax like `${VAR}` or `{1..10}` in the commands
+intact, so only the placeholders are substituted. A placeholder can have a format
+specification like in format strings, for example `{{seed:04d}}`.
+
+Examples
+--------
+>>> script = SlurmScript(job_name="run-{{i}}", mem="{{mem}}")
+>>> script.add_cmd("python run.py --seed {{i}} --out $HOME/out/{{i}}.h5")
+>>> template = SlurmTemplate(script, mem="2G")
+>>> template.fields
+('i', 'mem')
+>>> texts = template.render_many({"i": i} for i in range(1_000_000))
+>>> result = template.write_many(({"i": i} for i in range(100)), "runs/{{i}}.slurm")
+"""
+
+import re
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, Mapping, Tuple, Union
+
+from .script import SlurmScript
+from .writer import WriteResult, dump_many
+
+RE_PLACEHOLDER = re.compile(r"\{\{\s*([A-Za-z_]\w*)(:[^{}]*?)?\s*\}\}")
+
+Params = Mapping[str, Any]
+
+
+def compile_format(text: str) -> Tuple[str, Tuple[str, ...]]:
+    """Convert a text with `{{name}}` placeholders to a `str.format` string.
+
+    A placeholder can have a format specification, for example `{{i:04d}}`.
+
+    Parameters
+    ----------
+    text : str
+        The text containing the placeholders.
+
+    Returns
+    -------
+    fmt : str
+        The format string. All other braces of the text are escaped.
+    fields : Tuple[str, ...]
+        The names of the placeholders in the order of their first occurrence.
+    """
+    parts = list()
+    fields = dict()
+    pos = 0
+    for match in RE_PLACEHOLDER.finditer(text):
+        static = text[pos : match.start()]
+        parts.append(static.replace("{", "{{").replace("}", "}}"))
+        name, spec = match.group(1), match.group(2) or ""
+        parts.append("{" + name + spec + "}")
+        fields[name] = None
+        pos = match.end()
+    parts.append(text[pos:].replace("{", "{{").replace("}", "}}"))
+    return "".join(parts), tuple(fields)
+
+
+def _missing(error: KeyError) -> ValueError:
+    return ValueError(f"Missing template parameter: {error.args[0]}")
+
+
+class SlurmTemplate:
+    """A slurm script with named placeholders, compiled for fast rendering.
+
+    Parameters
+    ----------
+    script : SlurmScript or str
+        The script or the serialized content of a script. Placeholders of the form
+        `{{name}}` can be used in the option values and the commands.
+    linesep : str, optional
+        The line separator of the rendered scripts. Defaults to a newline.
+    **defaults
+        Default values of the placeholders.
+    """
+
+    def __init__(
+        self, script: Union[SlurmScript, str], linesep: str = "\n", **defaults: Any
+    ):
+        if isinstance(script, SlurmScript):
+            text = script.dumps(linesep)
+        else:
+            # Round-trip through the parser to validate the options
+            parsed = SlurmScript()
+            parsed.loads(script)
+            text = parsed.dumps(linesep)
+        self._text = text
+        self._format, self._fields = compile_format(text)
+        self._render = self._format.format_map
+        self.defaults: Dict[str, Any] = dict(defaults)
+
+    @property
+    def fields(self) -> Tuple[str, ...]:
+        """The names of the placeholders of the template."""
+        return self._fields
+
+    @property
+    def text(self) -> str:
+        """The serialized script with the placeholders."""
+        return self._text
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}(fields={self._fields})"
+
+    def render(self, params: Params = None, **kwargs: Any) -> str:
+        """Render the script for one set of parameters.
+
+        Parameters
+        ----------
+        params : Mapping[str, Any], optional
+            The values of the placeholders. Values are converted with `format`.
+        **kwargs
+            Additional values of the placeholders, overwriting `params`.
+
+        Returns
+        -------
+        str
+            The content of the rendered slurm script.
+        """
+        values = self.defaults.copy()
+        if params:
+            values.update(params)
+        values.update(kwargs)
+        try:
+            return self._render(values)
+        except KeyError as e:
+            raise _missing(e) from None
+
+    def render_many(self, params: Iterable[Params]) -> Iterator[str]:
+        """Render the script for each set of parameters.
+
+        Parameters
+        ----------
+        params : Iterable[Mapping[str, Any]]
+            The values of the placeholders of each variant.
+
+        Yields
+        ------
+        str
+            The content of the rendered slurm scripts.
+        """
+        render = self._render
+        defaults = self.defaults
+        for values in params:
+            if defaults:
+                values = {**defaults, **values}
+            try:
+                yield render(values)
+            except KeyError as e:
+                raise _missing(e) from None
+
+    def script(self, params: Params = None, **kwargs: Any) -> SlurmScript:
+        """Render the template into a new `SlurmScript`, for example to submit it."""
+        script = SlurmScript()
+        script.loads(self.render(params, **kwargs))
+        return script
+
+    def write_many(
+        self,
+        params: Iterable[Params],
+        path: Union[str, Path],
+        mkdir: bool = True,
+        manifest: Union[str, Path] = None,
+        max_workers: int = 16,
+    ) -> WriteResult:
+        """Render the script for each set of parameters and write it to disk.
+
+        Unchanged files are skipped, see `slurmio.writer.dump_many`.
+
+        Parameters
+        ----------
+        params : Iterable[Mapping[str, Any]]
+            The values of the placeholders of each variant.
+        path : str or Path
+            The path of the files, with the same `{{name}}` placeholders as the
+            template, for example `runs/{{i}}/job.slurm`.
+        mkdir : bool, optional
+            Create missing parent directories (default).
+        manifest : str or Path, optional
+            A JSON file with the content hashes of the written files.
+        max_workers : int, optional
+            Number of threads writing the files. Defaults to 16.
+
+        Returns
+        -------
+        WriteResult
+            The written files, the number of unchanged files and the bytes written.
+        """
+        path_format = compile_format(str(path))[0].format_map
+        render = self._render
+        defaults = self.defaults
+        files = dict()
+        for values in params:
+            if defaults:
+                values = {**defaults, **values}
+            try:
+                files[path_format(values)] = render(values)
+            except KeyError as e:
+                raise _missing(e) from None
+        return dump_many(files, mkdir, manifest, max_workers)
@@ -0,0 +1,886 @@
+# -*- coding: utf-8 -*-
+# Author: Dylan Jones
+# Date:   2026-10-17
+
+r"""Fake Slurm cluster for benchmarks, load tests and development without Slurm.
+
+The `FakeCluster` simulates a queue of jobs moving through the states PENDING,
+RUNNING and COMPLETED (or FAILED, TIMEOUT, CANCELLED) in real time. It produces job
+records with the schema of the squeue and sacct JSON output, so the `Squeue` and
+`Sacct` models can be built from them. The cluster can be used in two ways:
+
+- In-process as the active backend of slurmio (`FakeCluster.backend`). No process
+  is forked, useful to measure the cost of parsing and building the models.
+- As stand-in `squeue`, `sacct`, `sbatch` and `scancel` executables on the `PATH`
+  (`FakeCluster.executables`). Each call is a real subprocess, like on a cluster.
+
+The `RestReplayServer` replays recorded (or generated) slurmrestd responses over
+HTTP, so the `RestBackend` can be tested without a slurmrestd daemon.
+
+Examples
+--------
+>>> cluster = FakeCluster(jobs=100_000, latency=0.05)
+>>> with cluster.backend():
+...     jobs = slurmio.squeue(states="RUNNING")
+>>> with cluster.executables("/tmp/fake-slurm"):
+...     job = slurmio.sbatch("#!/bin/bash\nsleep 1\n")
+"""
+
+import fcntl
+import json
+import math
+import os
+import pickle
+import random
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import datetime
+from functools import lru_cache
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Sequence, Tuple, Union
+
+from .backends import Backend, Jobs, SubprocessBackend, set_backend
+from .filters import (
+    Ids,
+    Names,
+    Time,
+    _filter_jobs,
+    _job_id_matcher,
+    _parse_ranges,
+    _sacct_state,
+    _split,
+    _squeue_state,
+)
+from .rest import _minutes
+from .speedups import gc_paused
+from .utility import get_user
+
+COMMANDS = ("squeue", "sacct", "sbatch", "scancel")
+
+EXECUTABLE = """#!{python}
+import sys
+sys.path.insert(0, {root!r})
+from slurmio.testing import main
+sys.exit(main({command!r}, {state!r}, sys.argv[1:]))
+"""
+
+
+# The nested parts of the job records are cached and shared between records to keep
+# generating large queues cheap. They must not be modified.
+@lru_cache(maxsize=1 << 16)
+def _number(value: int = None) -> Dict[str, Any]:
+    if value is None:
+        return {"set": False, "infinite": False, "number": 0}
+    return {"set": True, "infinite": False, "number": value}
+
+
+@lru_cache(maxsize=None)
+def _exit_code(code: int, signaled: bool = False) -> Dict[str, Any]:
+    status = "SIGNALED" if signaled else ("ERROR" if code else "SUCCESS")
+    return {
+        "status": [status],
+        "return_code": _number(code),
+        "signal": {"id": _number(15 if signaled else None), "name": ""},
+    }
+
+
+@lru_cache(maxsize=None)
+def _tres(cpus: int, memory: int) -> List[Dict[str, Any]]:
+    return [
+        {"type": "cpu", "name": "", "id": 1, "count": cpus},
+        {"type": "mem", "name": "", "id": 2, "count": memory},
+        {"type": "node", "name": "", "id": 4, "count": 1},
+    ]
+
+
+def _state_reason(job: "FakeJob", start: Union[float, None]) -> str:
+    if start is not None:
+        return "None"
+    return job.reason or "Priority"
+
+
+def _timestamp(value: Time) -> float:
+    if isinstance(value, datetime):
+        return value.timestamp()
+    return datetime.fromisoformat(value).timestamp()
+
+
+@dataclass
+class FakeJob:
+    """A simulated job. Times are Unix timestamps, durations are seconds."""
+
+    job_id: int
+    name: str
+    user: str
+    partition: str
+    account: str
+    qos: str
+    submit: float
+    pending: float
+    runtime: float
+    time_limit: int = 60
+    exit_code: int = 0
+    cancelled: float = None
+    array_job_id: int = 0
+    array_task_id: int = None
+    cpus: int = 1
+    memory: int = 1024
+    node: str = "node001"
+    cwd: str = "/tmp"
+    script: str = ""
+    reason: str = None
+
+    @property
+    def start(self) -> float:
+        return self.submit + self.pending
+
+    @property
+    def end(self) -> float:
+        return self.start + min(self.runtime, 60 * self.time_limit)
+
+    def status(self, now: float) -> Tuple[str, Union[float, None], Union[float, None]]:
+        """Return the state, start and end time of the job at the given time."""
+        start, end = self.start, self.end
+        if self.cancelled is not None and self.cancelled <= now:
+            if self.cancelled < end:
+                started = start if start < self.cancelled else None
+                return "CANCELLED", started, self.cancelled
+        if now < start:
+            return "PENDING", None, None
+        if now < end:
+            return "RUNNING", start, None
+        if self.runtime > 60 * self.time_limit:
+            return "TIMEOUT", start, end
+        return ("FAILED" if self.exit_code else "COMPLETED"), start, end
+
+    @property
+    def output(self) -> str:
+        if self.array_task_id is not None:
+            return f"{self.cwd}/slurm-{self.array_job_id}_{self.array_task_id}.out"
+        return f"{self.cwd}/slurm-{self.job_id}.out"
+
+
+class FakeCluster(Backend):
+    """Simulated Slurm cluster implementing the backend interface.
+
+    Parameters
+    ----------
+    jobs : int, optional
+        The number of jobs initially in the queue (pending or running).
+    finished : int, optional
+        The number of finished jobs initially in the accounting history. They ended
+        during the last day.
+    users : Sequence[str], optional
+        The users owning the generated jobs. Defaults to the current user.
+    partitions : Sequence[str], optional
+        The partitions of the generated jobs.
+    latency : float, optional
+        Seconds each command takes to respond, in addition to the actual work.
+    pending : float, optional
+        Mean time in seconds a job stays pending. Defaults to 30 seconds.
+    runtime : float, optional
+        Mean time in seconds a job runs. Defaults to 5 minutes.
+    fail_rate : float, optional
+        Fraction of the jobs failing with a non-zero exit code.
+    nodes : int, optional
+        The number of nodes the jobs are distributed on.
+    name : str, optional
+        The name of the cluster.
+    seed : int, optional
+        Seed of the random generator for reproducible queues.
+    """
+
+    def __init__(
+        self,
+        jobs: int = 0,
+        finished: int = 0,
+        users: Sequence[str] = None,
+        partitions: Sequence[str] = ("cpu", "gpu"),
+        latency: float = 0.0,
+        pending: float = 30.0,
+        runtime: float = 300.0,
+        fail_rate: float = 0.05,
+        nodes: int = 64,
+        name: str = "fake",
+        seed: int = None,
+    ):
+        self.users = list(users) if users else [get_user()]
+        self.partitions = list(partitions)
+        self.latency = latency
+        self.pending = pending
+        self.runtime = runtime
+        self.fail_rate = fail_rate
+        self.nodes = nodes
+        self.name = name
+        self.jobs: Dict[int, FakeJob] = dict()
+        self._next_id = 1000
+        self._rng = random.Random(seed)
+        self._lock = threading.RLock()
+        self.populate(jobs, finished)
+
+    def __len__(self) -> int:
+        return len(self.jobs)
+
+    def __getstate__(self) -> Dict[str, Any]:
+        state = self.__dict__.copy()
+        del state["_lock"]
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self.__dict__.update(state)
+        self._lock = threading.RLock()
+
+    # -- Simulation ----------------------------------------------------------------
+
+    def _new_job(
+        self, submit: float, pending: float, runtime: float, **kwargs
+    ) -> FakeJob:
+        rng = self._rng
+        job_id = self._next_id
+        self._next_id += 1
+        values = dict(
+            job_id=job_id,
+            name=f"job{job_id}",
+            user=rng.choice(self.users),
+            partition=rng.choice(self.partitions),
+            account="account",
+            qos="normal",
+            submit=submit,
+            pending=pending,
+            runtime=runtime,
+            time_limit=max(1, int(2 * (runtime + 60) / 60)),
+            exit_code=1 if rng.random() < self.fail_rate else 0,
+            node=f"node{job_id % self.nodes:03d}",
+        )
+        values.update(kwargs)
+        job = FakeJob(**values)
+        self.jobs[job.job_id] = job
+        return job
+
+    def populate(self, jobs: int = 0, finished: int = 0) -> None:
+        """Add queued (pending or running) and finished jobs to the cluster."""
+        rng = self._rng
+        now = time.time()
+        with self._lock:
+            for _ in range(jobs):
+                waited = rng.uniform(0, 2 * self.pending)
+                if rng.random() < 0.3:
+                    # Still pending for some time
+                    pending = waited + rng.expovariate(1 / self.pending)
+                    runtime = rng.expovariate(1 / self.runtime)
+                else:
+                    # Started already, still running for some time
+                    pending = waited * rng.random()
+                    running = waited - pending
+                    runtime = running + rng.expovariate(1 / self.runtime)
+                self._new_job(now - waited, pending, runtime)
+            for _ in range(finished):
+                end = now - rng.uniform(1, 86400)
+                pending = rng.expovariate(1 / self.pending)
+                runtime = rng.expovariate(1 / self.runtime)
+                self._new_job(end - runtime - pending, pending, runtime)
+
+    def submit(
+        self, script: str, cwd: str = None, args: Sequence[str] = None
+    ) -> FakeJob:
+        """Submit a job script, return the (first) submitted job.
+
+        The `--job-name`, `--partition`, `--account`, `--qos`, `--time`, `--array`,
+        `--hold` and `--dependency` options of the script or the command line `args`
+        are respected. Held jobs stay pending until they are cancelled. Dependencies
+        are resolved at submission, so cancelling a dependency later has no effect.
+        """
+        options = dict()
+        for line in script.splitlines()[1:]:
+            line = line.strip()
+            if line and not line.startswith("#"):
+                break
+            if line.startswith("#SBATCH"):
+                arg = line[len("#SBATCH") :].strip().lstrip("-")
+                key, _, value = arg.replace(" ", "=", 1).partition("=")
+                options[key.replace("-", "_")] = value.strip()
+        for arg in args or ():
+            key, _, value = arg.lstrip("-").partition("=")
+            options[key.replace("-", "_")] = value
+        kwargs = dict(script=script, cwd=cwd or os.getcwd())
+        for key in ("partition", "account", "qos"):
+            if key in options:
+                kwargs[key] = options[key]
+        if "job_name" in options:
+            kwargs["name"] = options["job_name"]
+        if "time" in options:
+            kwargs["time_limit"] = _minutes(options["time"])
+
+        rng = self._rng
+        now = time.time()
+        with self._lock:
+            delay = 0.0
+            if "dependency" in options:
+                delay, kwargs["reason"] = self._dependency(options["dependency"], now)
+            if "hold" in options:
+                delay, kwargs["reason"] = math.inf, "JobHeldUser"
+            if "array" not in options:
+                pending = delay + rng.expovariate(1 / self.pending)
+                runtime = rng.expovariate(1 / self.runtime)
+                return self._new_job(now, pending, runtime, **kwargs)
+            indices = sorted(_parse_ranges(options["array"].split("%")[0]))
+            first = None
+            for task in indices:
+                pending = delay + rng.expovariate(1 / self.pending)
+                runtime = rng.expovariate(1 / self.runtime)
+                array_job_id = first.job_id if first else self._next_id
+                job = self._new_job(
+                    now,
+                    pending,
+                    runtime,
+                    array_job_id=array_job_id,
+                    array_task_id=task,
+                    **kwargs,
+                )
+                first = first or job
+            return first
+
+    def _dependency(self, dependency: str, now: float) -> Tuple[float, str]:
+        """Return the time until the dependencies are satisfied and the reason.
+
+        Supports the `afterok`, `afterany`, `afternotok` and `aftercorr` (treated
+        like `afterok`) dependencies. The time is infinite if they never will be.
+        """
+        start = now
+        for part in dependency.split(","):
+            kind, *ids = part.split(":")
+            for job_id in ids:
+                job_id = int(job_id)
+                tasks = [self.jobs[job_id]] if job_id in self.jobs else []
+                tasks += [
+                    job
+                    for job in self.jobs.values()
+                    if job.array_job_id == job_id and job.job_id != job_id
+                ]
+                if not tasks:
+                    raise ValueError(f"Invalid dependency {part}")
+                for job in tasks:
+                    state, _, end = job.status(math.inf)
+                    end = job.cancelled if state == "CANCELLED" else end
+                    if end is None or math.isinf(end):
+                        return math.inf, "Dependency"
+                    ok = state == "COMPLETED"
+                    if (kind == "afternotok" and ok) or (
+                        kind in ("afterok", "aftercorr") and not ok
+                    ):
+                        return math.inf, "DependencyNeverSatisfied"
+                    start = max(start, end)
+        return start - now, "Dependency"
+
+    def cancel(self, job_ids: Sequence[str] = None, **filters) -> List[int]:
+        """Cancel the queued jobs matching the ids and filters, return their ids."""
+        now = time.time()
+        with self._lock:
+            jobs = self.squeue(
+                user=filters.get("user"),
+                states=filters.get("state"),
+                partition=filters.get("partition"),
+                name=filters.get("job_name"),
+                account=filters.get("account"),
+                qos=filters.get("qos"),
+                _latency=False,
+            )
+            if job_ids:
+                match = _job_id_matcher([str(x) for x in job_ids])
+                jobs = [job for job in jobs if match(job)]
+            for job in jobs:
+                self.jobs[job["job_id"]].cancelled = now
+        return [job["job_id"] for job in jobs]
+
+    # -- Job records ---------------------------------------------------------------
+
+    def squeue_record(self, job: FakeJob, now: float = None) -> Dict[str, Any]:
+        """Return the squeue JSON record of a job."""
+        state, start, end = job.status(time.time() if now is None else now)
+        node = job.node if start is not None else ""
+        return {
+            "account": job.account,
+            "accrue_time": _number(int(job.submit)),
+            "array_job_id": _number(job.array_job_id),
+            "array_task_id": _number(job.array_task_id),
+            "array_task_string": "",
+            "batch_flag": True,
+            "batch_host": node,
+            "cluster": self.name,
+            "command": f"{job.cwd}/job.sh",
+            "cpus": _number(job.cpus),
+            "cpus_per_task": _number(1),
+            "current_working_directory": job.cwd,
+            "derived_exit_code": _exit_code(0),
+            "eligible_time": _number(int(job.submit)),
+            "end_time": _number(int(end or 0)),
+            "exit_code": _exit_code(job.exit_code if end else 0),
+            "flags": [],
+            "group_id": 1000,
+            "group_name": job.user,
+            "job_id": job.job_id,
+            "job_state": [state],
+            "memory_per_node": _number(job.memory),
+            "name": job.name,
+            "node_count": _number(1),
+            "nodes": node,
+            "partition": job.partition,
+            "priority": _number(1000),
+            "qos": job.qos,
+            "standard_error": job.output,
+            "standard_input": "/dev/null",
+            "standard_output": job.output,
+            "start_time": _number(int(start or 0)),
+            "state_reason": _state_reason(job, start),
+            "submit_time": _number(int(job.submit)),
+            "tasks": _number(1),
+            "time_limit": _number(job.time_limit),
+            "user_id": 1000,
+            "user_name": job.user,
+        }
+
+    def sacct_record(self, job: FakeJob, now: float = None) -> Dict[str, Any]:
+        """Return the sacct JSON record of a job."""
+        now = time.time() if now is None else now
+        state, start, end = job.status(now)
+        elapsed = int((end or now) - start) if start is not None else 0
+        zero = {"seconds": 0, "microseconds": 0}
+        return {
+            "account": job.account,
+            "comment": {"administrator": "", "job": "", "system": ""},
+            "allocation_nodes": 1 if start is not None else 0,
+            "array": {
+                "job_id": job.array_job_id,
+                "limits": {"max": {"running": {"tasks": 0}}},
+                "task_id": _number(job.array_task_id),
+                "task": "",
+            },
+            "association": {
+                "account": job.account,
+                "cluster": self.name,
+                "partition": job.partition,
+                "user": job.user,
+            },
+            "block": "",
+            "cluster": self.name,
+            "constraints": "",
+            "container": "",
+            "derived_exit_code": _exit_code(0),
+            "time": {
+                "elapsed": elapsed,
+                "eligible": int(job.submit),
+                "end": int(end or 0),
+                "start": int(start or 0),
+                "submission": int(job.submit),
+                "suspended": 0,
+                "system": zero,
+                "limit": _number(job.time_limit),
+                "total": {"seconds": elapsed, "microseconds": 0},
+                "user": {"seconds": elapsed, "microseconds": 0},
+            },
+            "exit_code": _exit_code(
+                job.exit_code if end else 0, signaled=state == "CANCELLED"
+            ),
+            "extra": "",
+            "failed_node": "",
+            "flags": ["STARTED_ON_SUBMIT"],
+            "group": job.user,
+            "het": {"job_id": 0, "job_offset": _number()},
+            "job_id": job.job_id,
+            "name": job.name,
+            "licenses": "",
+            "mcs": {"label": ""},
+            "nodes": job.node if start is not None else "None assigned",
+            "partition": job.partition,
+            "hold": job.reason == "JobHeldUser",
+            "priority": _number(1000),
+            "qos": job.qos,
+            "required": {"CPUs": job.cpus, "memory_per_node": _number(job.memory)},
+            "kill_request_user": job.user if state == "CANCELLED" else "",
+            "reservation": {"id": 0, "name": ""},
+            "script": job.script,
+            "state": {"current": [state], "reason": "None"},
+            "steps": [],
+            "submit_line": "sbatch job.sh",
+            "tres": {
+                "requested": _tres(job.cpus, job.memory),
+                "allocated": _tres(job.cpus, job.memory) if start is not None else [],
+            },
+            "used_gres": "",
+            "user": job.user,
+            "wckey": {"wckey": "", "flags": []},
+            "working_directory": job.cwd,
+        }
+
+    # -- Backend interface ---------------------------------------------------------
+
+    def _sleep(self) -> None:
+        if self.latency:
+            time.sleep(self.latency)
+
+    def squeue(self, nodelist: Names = None, _latency: bool = True, **filters) -> Jobs:
+        if _latency:
+            self._sleep()
+        now = time.time()
+        with self._lock:
+            jobs = list(self.jobs.values())
+        nodes = set(_split(nodelist)) if nodelist else None
+        records = list()
+        with gc_paused():
+            for job in jobs:
+                if job.cancelled is not None and job.cancelled <= now:
+                    continue
+                if now >= job.end or (nodes is not None and job.node not in nodes):
+                    continue
+                records.append(self.squeue_record(job, now))
+        return _filter_jobs(records, "user_name", _squeue_state, **filters)
+
+    def sacct(
+        self,
+        user: Names = None,
+        job_id: Ids = None,
+        states: Names = None,
+        partition: Names = None,
+        name: Names = None,
+        account: Names = None,
+        qos: Names = None,
+        nodelist: Names = None,
+        start: Time = None,
+        end: Time = None,
+        all_users: bool = False,
+    ) -> Jobs:
+        self._sleep()
+        now = time.time()
+        t0 = _timestamp(start) if start is not None else None
+        t1 = _timestamp(end) if end is not None else now
+        if not user and not all_users and not job_id:
+            user = get_user()
+        nodes = set(_split(nodelist)) if nodelist else None
+        with self._lock:
+            jobs = list(self.jobs.values())
+        records = list()
+        with gc_paused():
+            for job in jobs:
+                if job.submit > t1 or (nodes is not None and job.node not in nodes):
+                    continue
+                if t0 is not None:
+                    _, _, job_end = job.status(now)
+                    if job_end is not None and job_end < t0:
+                        continue
+                records.append(self.sacct_record(job, now))
+        filters = dict(user=user, job_id=job_id, states=states, partition=partition)
+        filters.update(name=name, account=account, qos=qos)
+        return _filter_jobs(records, "user", _sacct_state, **filters)
+
+    def sbatch(
+        self, script: str = None, file: Path = None, args: Sequence[str] = None
+    ) -> Tuple[int, str]:
+        self._sleep()
+        cwd = None
+        if file is not None:
+            script = Path(file).read_text()
+            cwd = str(Path(file).parent.absolute())
+        return self.submit(script, cwd, args).job_id, self.name
+
+    def scancel(
+        self, job_ids: Sequence[str] = None, max_workers: int = 1, **filters
+    ) -> str:
+        self._sleep()
+        self.cancel(job_ids, **filters)
+        return ""
+
+    # -- Installation --------------------------------------------------------------
+
+    @contextmanager
+    def backend(self) -> Iterator["FakeCluster"]:
+        """Use the cluster as the active backend of slurmio inside the context."""
+        previous = set_backend(self)
+        try:
+            yield self
+        finally:
+            set_backend(previous)
+
+    def save(self, path: Union[str, Path]) -> None:
+        """Save the state of the cluster to a file (written atomically)."""
+        path = Path(path)
+        tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+        with self._lock, open(tmp, "wb") as fh:
+            pickle.dump(self, fh, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: Union[str, Path]) -> "FakeCluster":
+        """Load the state of a cluster saved with `save`."""
+        with open(path, "rb") as fh:
+            return pickle.load(fh)
+
+    @contextmanager
+    def executables(
+        self, directory: Union[str, Path], backend: Backend = None
+    ) -> Iterator[Path]:
+        """Install stand-in Slurm executables and put them on the `PATH`.
+
+        Inside the context the squeue, sacct, sbatch and scancel commands run by the
+        subprocess backend are served by this cluster. Jobs submitted or cancelled
+        via the executables are synchronized back to the cluster on exit.
+
+        Parameters
+        ----------
+        directory : str or Path
+            The directory where the executables and the state file are written.
+        backend : Backend, optional
+            The backend activated inside the context. Defaults to the subprocess
+            backend.
+        """
+        directory = Path(directory).absolute()
+        directory.mkdir(parents=True, exist_ok=True)
+        state = directory / "cluster.pickle"
+        self.save(state)
+        root = str(Path(__file__).absolute().parent.parent)
+        for command in COMMANDS:
+            file = directory / command
+            code = EXECUTABLE.format(
+                python=sys.executable, root=root, command=command, state=str(state)
+            )
+            file.write_text(code)
+            file.chmod(0o755)
+        path = os.environ.get("PATH", "")
+        os.environ["PATH"] = str(directory) + os.pathsep + path
+        previous = set_backend(backend or SubprocessBackend())
+        try:
+            yield directory
+        finally:
+            set_backend(previous)
+            os.environ["PATH"] = path
+            with self._lock:
+                loaded = self.load(state)
+                self.jobs, self._next_id = loaded.jobs, loaded._next_id
+
+
+class RestReplayServer:
+    """Stub of slurmrestd replaying recorded JSON responses over HTTP/1.1.
+
+    Each route (`"<METHOD> <path>"` without the query string) maps to a recorded
+    response or a list of responses, which are replayed in order (the last one is
+    repeated). The connections are kept alive like by slurmrestd, so the connection
+    reuse of the `RestBackend` can be checked via `connections`. All requests are
+    recorded in `requests`.
+
+    Parameters
+    ----------
+    responses : Mapping[str, Any]
+        The recorded responses of the routes, for example
+        `{"GET /slurm/v0.0.40/jobs": {"jobs": [...]}}`.
+
+    Examples
+    --------
+    >>> with RestReplayServer.load("recorded.json") as server:
+    ...     backend = RestBackend(server.url, token="token")
+    ...     jobs = backend.squeue(user="user")
+    >>> server.connections
+    1
+    """
+
+    def __init__(self, responses: Dict[str, Any]):
+        self.responses = {
+            route: list(value) if isinstance(value, list) else [value]
+            for route, value in responses.items()
+        }
+        self.requests: List[Tuple[str, str, str, Any]] = list()
+        self.connections = 0
+        self._server: ThreadingHTTPServer = None
+        self._thread: threading.Thread = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def load(cls, path: Union[str, Path]) -> "RestReplayServer":
+        """Create a server replaying the responses recorded in a JSON file."""
+        with open(path, "r") as fh:
+            return cls(json.load(fh))
+
+    @classmethod
+    def from_cluster(
+        cls, cluster: FakeCluster, version: str = "v0.0.40"
+    ) -> "RestReplayServer":
+        """Record the responses of slurmrestd for the current state of a cluster."""
+        now = time.time()
+        squeue = cluster.squeue(_latency=False)
+        with cluster._lock:
+            sacct = [cluster.sacct_record(job, now) for job in cluster.jobs.values()]
+            next_id = cluster._next_id
+        return cls(
+            {
+                f"GET /slurm/{version}/jobs": {"jobs": squeue, "errors": []},
+                f"GET /slurmdb/{version}/jobs": {"jobs": sacct, "errors": []},
+                f"POST /slurm/{version}/job/submit": {"job_id": next_id, "errors": []},
+                f"DELETE /slurm/{version}/jobs": {"status": [], "errors": []},
+            }
+        )
+
+    def save(self, path: Union[str, Path]) -> None:
+        """Save the recorded responses to a JSON file."""
+        with open(path, "w") as fh:
+            json.dump(self.responses, fh)
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def _respond(self, method: str, target: str, body: bytes) -> Tuple[int, bytes]:
+        path, _, query = target.partition("?")
+        data = json.loads(body) if body else None
+        with self._lock:
+            self.requests.append((method, path, query, data))
+            replies = self.responses.get(f"{method} {path}")
+            if not replies:
+                error = {
+                    "errors": [{"error": f"No recorded response: {method} {path}"}]
+                }
+                return 404, json.dumps(error).encode()
+            reply = replies.pop(0) if len(replies) > 1 else replies[0]
+        return 200, json.dumps(reply).encode()
+
+    def start(self) -> "RestReplayServer":
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def setup(self) -> None:
+                super().setup()
+                with stub._lock:
+                    stub.connections += 1
+
+            def _handle(self) -> None:
+                length = int(self.headers.get("Content-Length") or 0)
+                body = self.rfile.read(length) if length else b""
+                status, out = stub._respond(self.command, self.path, body)
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(out)))
+                self.end_headers()
+                self.wfile.write(out)
+
+            def do_GET(self) -> None:  # noqa: N802
+                self._handle()
+
+            def do_POST(self) -> None:  # noqa: N802
+                self._handle()
+
+            def do_DELETE(self) -> None:  # noqa: N802
+                self._handle()
+
+            def log_message(self, *args: Any) -> None:
+                pass
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self) -> "RestReplayServer":
+        return self.start()
+
+    def __exit__(self, *args: Any) -> None:
+        self.stop()
+
+
+def _parse_args(args: Sequence[str]) -> Tuple[Dict[str, str], List[str]]:
+    """Parse `--flag=value`, `--flag value` and positional command line arguments."""
+    flags, positional = dict(), list()
+    args = list(args)
+    while args:
+        arg = args.pop(0)
+        if arg.startswith("--"):
+            key, sep, value = arg[2:].partition("=")
+            if not sep and key not in ("json", "parsable", "allusers", "hold"):
+                value = args.pop(0) if args else ""
+            flags[key] = value
+        else:
+            positional.append(arg)
+    return flags, positional
+
+
+@contextmanager
+def _locked(state: str) -> Iterator[None]:
+    with open(state + ".lock", "w") as fh:
+        fcntl.flock(fh, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(fh, fcntl.LOCK_UN)
+
+
+def main(command: str, state: str, args: Sequence[str]) -> int:
+    """Entry point of the stand-in Slurm executables."""
+    flags, positional = _parse_args(args)
+    common = dict(
+        user=flags.get("user"),
+        job_id=flags.get("jobs"),
+        partition=flags.get("partition"),
+        name=flags.get("name"),
+        account=flags.get("account"),
+        qos=flags.get("qos"),
+        nodelist=flags.get("nodelist"),
+    )
+    try:
+        if command == "squeue":
+            cluster = FakeCluster.load(state)
+            jobs = cluster.squeue(states=flags.get("states"), **common)
+            print(json.dumps({"jobs": jobs, "errors": [], "warnings": []}))
+        elif command == "sacct":
+            cluster = FakeCluster.load(state)
+            jobs = cluster.sacct(
+                states=flags.get("state"),
+                start=flags.get("starttime"),
+                end=flags.get("endtime"),
+                all_users="allusers" in flags,
+                **common,
+            )
+            print(json.dumps({"jobs": jobs, "errors": [], "warnings": []}))
+        elif command == "sbatch":
+            with _locked(state):
+                cluster = FakeCluster.load(state)
+                options = [f"--{k}={v}" for k, v in flags.items() if k != "parsable"]
+                if positional:
+                    file = Path(positional[0])
+                    job_id, name = cluster.sbatch(file=file, args=options)
+                else:
+                    script = sys.stdin.read()
+                    job_id, name = cluster.sbatch(script=script, args=options)
+                cluster.save(state)
+            if "parsable" in flags:
+                print(f"{job_id};{name}")
+            else:
+                print(f"Submitted batch job {job_id}")
+        elif command == "scancel":
+            filters = {
+                "job_name": flags.get("name"),
+                "state": flags.get("state"),
+                "partition": flags.get("partition"),
+                "user": flags.get("user"),
+                "account": flags.get("account"),
+                "qos": flags.get("qos"),
+            }
+            with _locked(state):
+                cluster = FakeCluster.load(state)
+                cluster.scancel(positional, **filters)
+                cluster.save(state)
+        else:
+            raise ValueError(f"Unknown command: {command}")
+    except Exception as e:
+        print(f"{command}: error: {e}", file=sys.stderr)
+        return 1
+    return 0
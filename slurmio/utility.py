@@ -2,9 +2,18 @@
 # Author: Dylan Jones
 # Date:   2024-08-17
 
+import codecs
+import functools
 import getpass
-from subprocess import PIPE, Popen, SubprocessError
-from typing import List
+import os
+import shutil
+import tempfile
+import threading
+from subprocess import PIPE, Popen, SubprocessError, TimeoutExpired
+from time import monotonic, perf_counter, sleep
+from typing import Iterator, List
+
+from . import metrics
 
 
 def get_user() -> str:
@@ -12,8 +21,34 @@ def get_user() -> str:
     return getpass.getuser()
 
 
+@functools.lru_cache(maxsize=None)
+def _which(name: str, path: str) -> str:
+    return shutil.which(name, path=path)
+
+
+def which(name: str) -> str:
+    """Return the full path of an executable or None if it is not found.
+
+    The lookup is cached for the current value of the `PATH` environment variable,
+    so the Slurm commands are only resolved once instead of on every call.
+    """
+    return _which(name, os.environ.get("PATH", os.defpath))
+
+
+def _resolve(cmd: List[str]) -> List[str]:
+    path = which(cmd[0])
+    if path is None:
+        raise Exception("Command not found: " + " ".join(cmd))
+    return [path] + list(cmd[1:])
+
+
 def run(
-    cmd: List[str], stdout: int = PIPE, stderr: int = PIPE, shell: bool = None
+    cmd: List[str],
+    stdout: int = PIPE,
+    stderr: int = PIPE,
+    shell: bool = None,
+    input: str = None,
+    timeout: float = None,
 ) -> str:
     """Run a command and return the output or raise an exception if it fails.
 
@@ -27,6 +62,10 @@ def run(
         Standard error stream. Defaults to PIPE.
     shell : bool, optional
         Whether to use the shell as the program to execute. Defaults to None.
+    input : str, optional
+        Data sent to the standard input of the command.
+    timeout : float, optional
+        Maximal time in seconds the command may run before it is killed.
 
     Returns
     -------
@@ -39,17 +78,120 @@ def run(
         If the command is not found.
     SubprocessError
         If the command fails.
+    TimeoutExpired
+        If the command did not finish within the timeout.
     """
-    try:
-        process = Popen(cmd, shell=shell, stdout=stdout, stderr=stderr)
-    except FileNotFoundError:
-        raise Exception("Command not found: " + " ".join(cmd))
-    out, err = process.communicate()
+    with metrics.phase("subprocess", cmd[0].split()[0]) as rec:
+        args = cmd if shell else _resolve(cmd)
+        stdin = PIPE if input is not None else None
+        try:
+            process = Popen(
+                args, shell=shell, stdin=stdin, stdout=stdout, stderr=stderr
+            )
+        except FileNotFoundError:
+            raise Exception("Command not found: " + " ".join(cmd))
+        data = input.encode("utf-8") if input is not None else None
+        try:
+            out, err = process.communicate(data, timeout)
+        except TimeoutExpired:
+            process.kill()
+            process.communicate()
+            raise
     if process.returncode:
         raise SubprocessError(err.decode("utf-8"))
+    rec.bytes += len(out)
     return out.decode("utf-8")
 
 
+def iter_output(cmd: List[str], chunk_size: int = 1 << 16) -> Iterator[str]:
+    """Run a command and yield its output incrementally.
+
+    Parameters
+    ----------
+    cmd : List[str]
+        The command to run as a list of strings.
+    chunk_size : int, optional
+        Maximal number of bytes read at once. Defaults to 64 KiB.
+
+    Yields
+    ------
+    str
+        The chunks of the output of the command as soon as they are available.
+
+    Raises
+    ------
+    Exception
+        If the command is not found.
+    SubprocessError
+        If the command fails. Raised after all output has been yielded.
+    """
+    # The time spent waiting for output is added to the running call if there is
+    # one. Otherwise, the command is recorded as a call of its own.
+    rec = metrics.current()
+    standalone = rec is None
+    if standalone:
+        rec = metrics.CallRecord(cmd[0])
+    elapsed = 0.0
+    # The error stream is buffered in a file so a full pipe can't block the command
+    with tempfile.TemporaryFile() as errfile:
+        t0 = perf_counter()
+        try:
+            process = Popen(_resolve(cmd), stdout=PIPE, stderr=errfile)
+        except FileNotFoundError:
+            raise Exception("Command not found: " + " ".join(cmd))
+        elapsed += perf_counter() - t0
+        try:
+            decoder = codecs.getincrementaldecoder("utf-8")()
+            while True:
+                t0 = perf_counter()
+                data = process.stdout.read1(chunk_size)
+                elapsed += perf_counter() - t0
+                if not data:
+                    break
+                rec.bytes += len(data)
+                yield decoder.decode(data)
+            yield decoder.decode(b"", final=True)
+            process.wait()
+        finally:
+            if process.poll() is None:
+                process.kill()
+                process.wait()
+            process.stdout.close()
+            rec.add("subprocess", elapsed)
+            if standalone:
+                rec.duration = perf_counter() - rec._t0
+                metrics.registry.record(rec)
+        if process.returncode:
+            errfile.seek(0)
+            raise SubprocessError(errfile.read().decode("utf-8"))
+
+
+class RateLimiter:
+    """Thread-safe limiter spacing out calls to a maximal rate.
+
+    Parameters
+    ----------
+    rate : float
+        Maximal number of calls per second.
+    """
+
+    def __init__(self, rate: float):
+        if rate <= 0:
+            raise ValueError(f"Rate must be positive, got {rate}")
+        self.interval = 1.0 / rate
+        self._lock = threading.Lock()
+        self._next = monotonic()
+
+    def acquire(self) -> None:
+        """Block until the next call is allowed."""
+        with self._lock:
+            now = monotonic()
+            t = max(self._next, now)
+            self._next = t + self.interval
+        if t > now:
+            sleep(t - now)
+
+
 def padstr(s: str, w: int, align: str = ">", placeholder: str = "...") -> str:
     """Pad or truncate a string to a specified width.
 
@@ -0,0 +1,162 @@
+# -*- coding: utf-8 -*-
+# Author: Dylan Jones
+# Date:   2026-10-17
+
+"""Shared waiter resolving submitted job ids with batched, backed-off queries."""
+
+import threading
+from time import monotonic
+from typing import Any, Callable, Dict, List
+
+Jobs = List[Dict[str, Any]]
+
+
+class _Pending:
+    __slots__ = ("event", "job", "error", "waiters")
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.waiters: int = 0
+        self.job: Dict[str, Any] = None
+        self.error: BaseException = None
+
+
+class JobWaiter:
+    """Wait for submitted jobs to show up in the queue.
+
+    All pending job ids are resolved by a single background thread, which queries
+    them with one batched call per poll. The poll interval starts at `initial_delay`
+    and grows exponentially up to `max_delay` while jobs are still missing. It is
+    reset whenever a new job id is registered.
+
+    Failed queries are retried with the same backoff. The pending waiters only fail
+    after `retries` consecutive failed queries, or when their timeout expires.
+
+    Parameters
+    ----------
+    fetch : Callable[[List[str]], List[Dict[str, Any]]]
+        Function returning the raw job records for a list of job ids.
+    match : Callable[[Dict[str, Any], str], bool]
+        Function checking whether a raw job record belongs to a job id.
+    initial_delay : float, optional
+        Initial poll interval in seconds. Defaults to 0.05.
+    max_delay : float, optional
+        Maximal poll interval in seconds. Defaults to 2.
+    factor : float, optional
+        Factor the poll interval is multiplied with after each poll. Defaults to 2.
+    retries : int, optional
+        Number of consecutive failed queries after which the pending waiters fail
+        with the error of the last query. Defaults to 5.
+    """
+
+    def __init__(
+        self,
+        fetch: Callable[[List[str]], Jobs],
+        match: Callable[[Dict[str, Any], str], bool],
+        initial_delay: float = 0.05,
+        max_delay: float = 2.0,
+        factor: float = 2.0,
+        retries: int = 5,
+    ):
+        self._fetch = fetch
+        self._match = match
+        self.initial_delay = initial_delay
+        self.max_delay = max_delay
+        self.factor = factor
+        self.retries = retries
+        self._errors: int = 0
+        self._last_error: BaseException = None
+        self._cond = threading.Condition()
+        self._pending: Dict[str, _Pending] = dict()
+        self._thread: threading.Thread = None
+        self._next_poll: float = 0.0
+        self._delay: float = initial_delay
+
+    def _register(self, job_id: str) -> _Pending:
+        with self._cond:
+            pending = self._pending.get(job_id)
+            if pending is None:
+                pending = _Pending()
+                self._pending[job_id] = pending
+            pending.waiters += 1
+            self._delay = self.initial_delay
+            self._next_poll = min(self._next_poll, monotonic() + self._delay)
+            if self._thread is None or not self._thread.is_alive():
+                self._next_poll = monotonic() + self._delay
+                self._thread = threading.Thread(target=self._run, daemon=True)
+                self._thread.start()
+            self._cond.notify_all()
+        return pending
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while self._pending:
+                    remaining = self._next_poll - monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                if not self._pending:
+                    self._thread = None
+                    return
+                ids = list(self._pending)
+
+            try:
+                jobs = self._fetch(ids)
+                error = None
+            except Exception as e:
+                jobs, error = list(), e
+
+            with self._cond:
+                if error is not None:
+                    self._errors += 1
+                    self._last_error = error
+                    if self._errors < self.retries:
+                        # Transient failure, retry with the backoff
+                        self._delay = min(self._delay * self.factor, self.max_delay)
+                        self._next_poll = monotonic() + self._delay
+                        continue
+                self._errors = 0
+                for job_id in ids:
+                    pending = self._pending.get(job_id)
+                    if pending is None:
+                        continue  # Waiter timed out in the meantime
+                    if error is not None:
+                        pending.error = error
+                    else:
+                        pending.job = next(
+                            (job for job in jobs if self._match(job, job_id)), None
+                        )
+                    if pending.error is not None or pending.job is not None:
+                        del self._pending[job_id]
+                        pending.event.set()
+                self._delay = min(self._delay * self.factor, self.max_delay)
+                self._next_poll = monotonic() + self._delay
+
+    def wait(self, job_id: Any, timeout: float = None) -> Dict[str, Any]:
+        """Block until the job shows up and return its raw job record.
+
+        Parameters
+        ----------
+        job_id : int or str
+            The id of the job to wait for.
+        timeout : float, optional
+            Maximal time to wait in seconds. Waits forever by default.
+
+        Raises
+        ------
+        TimeoutError
+            If the job did not show up in time.
+        """
+        job_id = str(job_id)
+        pending = self._register(job_id)
+        if not pending.event.wait(timeout):
+            with self._cond:
+                pending.waiters -= 1
+                if not pending.waiters and self._pending.get(job_id) is pending:
+                    del self._pending[job_id]
+                error = self._last_error if self._errors else None
+            raise TimeoutError(f"Job {job_id} did not show up in the queue") from error
+        if pending.error is not None:
+            raise pending.error
+        return pending.job
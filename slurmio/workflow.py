@@ -0,0 +1,461 @@
+# -*- coding: utf-8 -*-
+# Author: Dylan Jones
+# Date:   2026-10-17
+
+"""Submission of job pipelines as a directed acyclic graph of slurm scripts.
+
+The nodes of a `Workflow` are `SlurmScript`s and the edges the Slurm dependencies
+between them. The workflow is submitted in topological waves: all nodes of a wave
+are submitted concurrently and the job ids returned by sbatch are wired into the
+`--dependency` option of the next waves. The status of the whole workflow is
+tracked with one batched squeue query (and one sacct query for jobs which left the
+queue) per poll.
+
+Examples
+--------
+>>> wf = Workflow()
+>>> wf.add("prepare", SlurmScript(job_name="prepare"))
+>>> wf.add("run", SlurmScript(job_name="run", array="0-9"), after="prepare")
+>>> wf.add("collect", SlurmScript(job_name="collect"), after={"run": "afterany"})
+>>> wf.submit()
+>>> wf.wait()
+{'prepare': 'COMPLETED', 'run': 'COMPLETED', 'collect': 'COMPLETED'}
+"""
+
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Mapping, Sequence, Set, Union
+
+from .backends import get_backend
+from .events import FINAL_STATES, _first
+from .filters import _match_job_id, _sacct_state, _squeue_state
+from .script import SlurmScript
+from .slurm import scancel_many
+
+DEPENDENCY_TYPES = ("afterok", "afterany", "aftercorr")
+
+Parents = Union[str, Sequence[str], Mapping[str, str]]
+
+
+@dataclass
+class WorkflowNode:
+    """A job of a workflow.
+
+    Attributes
+    ----------
+    name : str
+        The unique name of the node in the workflow.
+    script : SlurmScript
+        The script submitted for the node.
+    after : Dict[str, str]
+        The names of the parent nodes mapped to the dependency type.
+    job_id : int
+        The id of the last submitted job of the node.
+    state : str
+        The last known state of the job.
+    reason : str
+        The last known reason why the job is pending.
+    """
+
+    name: str
+    script: SlurmScript
+    after: Dict[str, str] = field(default_factory=dict)
+    job_id: int = None
+    state: str = None
+    reason: str = None
+
+    @property
+    def submitted(self) -> bool:
+        return self.job_id is not None
+
+    @property
+    def finished(self) -> bool:
+        return self.state in FINAL_STATES
+
+    @property
+    def completed(self) -> bool:
+        return self.state == "COMPLETED"
+
+    @property
+    def blocked(self) -> bool:
+        """True if the job waits for a dependency which will never be satisfied."""
+        return self.reason == "DependencyNeverSatisfied"
+
+    @property
+    def live(self) -> bool:
+        """True if the job is submitted and can still run."""
+        return self.submitted and not self.finished and not self.blocked
+
+
+def _aggregate(states: List[str]) -> str:
+    """Combine the states of the tasks of an array job to the state of the node."""
+    live = [s for s in states if s not in FINAL_STATES]
+    if live:
+        return "RUNNING" if "RUNNING" in live else live[0]
+    failed = [s for s in states if s != "COMPLETED"]
+    return failed[0] if failed else "COMPLETED"
+
+
+class Workflow:
+    """Directed acyclic graph of slurm scripts submitted with dependencies.
+
+    Parameters
+    ----------
+    name : str, optional
+        The name of the workflow.
+    """
+
+    def __init__(self, name: str = None):
+        self.name = name
+        self.nodes: Dict[str, WorkflowNode] = dict()
+
+    def __len__(self) -> int:
+        return len(self.nodes)
+
+    def __getitem__(self, name: str) -> WorkflowNode:
+        return self.nodes[name]
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.nodes
+
+    def __repr__(self) -> str:
+        return f"<{self.__class__.__name__}({self.name or ''}, {len(self)} nodes)>"
+
+    # -- Graph ---------------------------------------------------------------------
+
+    def add(
+        self, name: str, script: SlurmScript, after: Parents = None
+    ) -> WorkflowNode:
+        """Add a node to the workflow.
+
+        Parameters
+        ----------
+        name : str
+            The unique name of the node.
+        script : SlurmScript
+            The script submitted for the node.
+        after : str or Sequence[str] or Mapping[str, str], optional
+            The parent nodes. Names without a dependency type depend on the parents
+            with `afterok`. A mapping assigns the dependency type (`afterok`,
+            `afterany` or `aftercorr`) per parent.
+
+        Returns
+        -------
+        WorkflowNode
+            The new node.
+        """
+        if name in self.nodes:
+            raise ValueError(f"Node {name!r} already exists")
+        node = WorkflowNode(name, script)
+        self.nodes[name] = node
+        if isinstance(after, str):
+            after = [after]
+        if after is not None and not isinstance(after, Mapping):
+            after = {parent: "afterok" for parent in after}
+        for parent, kind in (after or dict()).items():
+            self.add_edge(parent, name, kind)
+        return node
+
+    def add_edge(self, parent: str, child: str, kind: str = "afterok") -> None:
+        """Let the node `child` depend on the node `parent`."""
+        if kind not in DEPENDENCY_TYPES:
+            raise ValueError(f"Unknown dependency type {kind!r}: {DEPENDENCY_TYPES}")
+        for name in (parent, child):
+            if name not in self.nodes:
+                raise KeyError(f"Unknown node {name!r}")
+        self.nodes[child].after[parent] = kind
+
+    def children(self, name: str) -> List[str]:
+        return [n.name for n in self.nodes.values() if name in n.after]
+
+    def waves(self) -> List[List[str]]:
+        """Return the names of the nodes grouped into topological waves.
+
+        The nodes of a wave only depend on nodes of earlier waves.
+
+        Raises
+        ------
+        ValueError
+            If the graph contains a cycle.
+        """
+        indegree = {name: len(node.after) for name, node in self.nodes.items()}
+        children: Dict[str, List[str]] = {name: [] for name in self.nodes}
+        for node in self.nodes.values():
+            for parent in node.after:
+                children[parent].append(node.name)
+        wave = [name for name, n in indegree.items() if n == 0]
+        waves = list()
+        while wave:
+            waves.append(wave)
+            following = list()
+            for name in wave:
+                for child in children[name]:
+                    indegree[child] -= 1
+                    if indegree[child] == 0:
+                        following.append(child)
+            wave = following
+        if sum(len(w) for w in waves) != len(self.nodes):
+            cyclic = [name for name, n in indegree.items() if n > 0]
+            raise ValueError(f"The workflow contains a cycle: {cyclic}")
+        return waves
+
+    # -- Submission ----------------------------------------------------------------
+
+    def _dependency(self, node: WorkflowNode) -> str:
+        """Build the `--dependency` option of a node from the ids of its parents."""
+        groups: Dict[str, List[str]] = dict()
+        for parent, kind in node.after.items():
+            parent = self.nodes[parent]
+            if parent.completed or (kind == "afterany" and parent.finished):
+                continue  # Satisfied by a previous run
+            groups.setdefault(kind, []).append(str(parent.job_id))
+        return ",".join(f"{kind}:{':'.join(ids)}" for kind, ids in groups.items())
+
+    def _submit(self, node: WorkflowNode) -> None:
+        dependency = self._dependency(node)
+        job = node.script.sbatch(wait=False, dependency=dependency or None)
+        node.job_id, node.state, node.reason = job.job_id, "PENDING", None
+
+    def submit(self, max_workers: int = 8) -> Dict[str, int]:
+        """Submit all nodes, which are not completed or still queued.
+
+        A new workflow is submitted completely. After a failure, calling `submit`
+        again resumes the workflow: only the unfinished nodes are submitted again,
+        depending on the jobs still in the queue. Queued descendants of resubmitted
+        nodes are cancelled and submitted again as well, so that their dependencies
+        refer to the new jobs.
+
+        Parameters
+        ----------
+        max_workers : int, optional
+            Maximal number of concurrent sbatch calls per wave. Defaults to 8.
+
+        Returns
+        -------
+        Dict[str, int]
+            The job ids of the submitted nodes.
+
+        Raises
+        ------
+        Exception
+            If the submission of a node failed. The nodes submitted so far keep
+            their job ids, so the workflow can be resumed.
+        """
+        waves = self.waves()
+        if any(node.submitted for node in self.nodes.values()):
+            self.poll()
+        pending = set()
+        for wave in waves:
+            for name in wave:
+                node = self.nodes[name]
+                if node.completed:
+                    continue
+                if not node.live or any(p in pending for p in node.after):
+                    pending.add(name)
+        queued = [
+            self.nodes[name].job_id
+            for name in pending
+            if self.nodes[name].submitted and not self.nodes[name].finished
+        ]
+        if queued:
+            scancel_many(queued)
+        submitted = dict()
+        with ThreadPoolExecutor(max_workers) as executor:
+            for wave in waves:
+                nodes = [self.nodes[name] for name in wave if name in pending]
+                futures = [(n, executor.submit(self._submit, n)) for n in nodes]
+                errors = list()
+                for node, future in futures:
+                    try:
+                        future.result()
+                        submitted[node.name] = node.job_id
+                    except Exception as e:
+                        errors.append(f"{node.name}: {e}")
+                if errors:
+                    raise Exception("Submission failed for " + "; ".join(errors))
+        return submitted
+
+    # -- Status --------------------------------------------------------------------
+
+    def poll(self) -> Dict[str, str]:
+        """Update the states of all submitted nodes and return them.
+
+        The queued jobs are fetched with a single squeue query, the jobs which left
+        the queue with a single sacct query.
+        """
+        nodes = [n for n in self.nodes.values() if n.submitted and not n.finished]
+        if nodes:
+            backend = get_backend()
+            ids = [str(n.job_id) for n in nodes]
+            queued = backend.squeue(job_id=ids)
+            missing = list()
+            for node in nodes:
+                jobs = [job for job in queued if _match_job_id(job, str(node.job_id))]
+                if jobs:
+                    node.state = _aggregate([_first(_squeue_state(j)) for j in jobs])
+                    reasons = [j.get("state_reason") for j in jobs]
+                    node.reason = next((r for r in reasons if r != "None"), None)
+                else:
+                    missing.append(node)
+            if missing:
+                ids = [str(n.job_id) for n in missing]
+                records = backend.sacct(job_id=ids)
+                for node in missing:
+                    jobs = [j for j in records if _match_job_id(j, str(node.job_id))]
+                    if jobs:
+                        node.state = _aggregate([_first(_sacct_state(j)) for j in jobs])
+                        node.reason = None
+        return self.status()
+
+    def status(self) -> Dict[str, str]:
+        """Return the last known states of the nodes (None if not submitted)."""
+        return {name: node.state for name, node in self.nodes.items()}
+
+    def _settled(self) -> Dict[str, bool]:
+        """Return for each node if it cannot make progress anymore.
+
+        Nodes which were never submitted (for example after a failed submission)
+        are settled as soon as all of their parents are, nothing submits them while
+        waiting. Queued nodes are settled if they can never start, see `_stuck`.
+        """
+        stuck = self._stuck()
+        settled = dict()
+        for wave in self.waves():
+            for name in wave:
+                node = self.nodes[name]
+                if node.submitted:
+                    settled[name] = node.finished or name in stuck
+                else:
+                    settled[name] = all(settled[parent] for parent in node.after)
+        return settled
+
+    def _stuck(self) -> Set[str]:
+        """Return the names of the queued nodes which can never start.
+
+        A node is stuck if it is blocked or if the dependency on one of its parents
+        can not be satisfied anymore: the parent failed under `afterok` or
+        `aftercorr`, or it will never run itself (it is stuck or not submitted).
+        Slurm only marks the direct children of a failed job as blocked, so this is
+        propagated down the graph.
+        """
+        never = set()
+        stuck = set()
+        for wave in self.waves():
+            for name in wave:
+                node = self.nodes[name]
+                if not node.submitted:
+                    never.add(name)
+                    continue
+                if node.finished:
+                    continue
+                for parent, kind in node.after.items():
+                    p = self.nodes[parent]
+                    failed = p.finished and not p.completed and kind != "afterany"
+                    if parent in never or failed:
+                        break
+                else:
+                    if not node.blocked:
+                        continue
+                never.add(name)
+                stuck.add(name)
+        return stuck
+
+    @property
+    def done(self) -> bool:
+        """True if no node of the workflow can make progress anymore."""
+        return all(self._settled().values())
+
+    @property
+    def completed(self) -> bool:
+        return all(n.completed for n in self.nodes.values())
+
+    def failed(self) -> List[str]:
+        """Return the names of the failed nodes and the nodes which can never start."""
+        stuck = self._stuck()
+        return [
+            n.name
+            for n in self.nodes.values()
+            if (n.finished and not n.completed) or n.name in stuck
+        ]
+
+    def wait(
+        self, interval: float = 5.0, max_interval: float = 60.0, timeout: float = None
+    ) -> Dict[str, str]:
+        """Poll the workflow until no node can make progress anymore.
+
+        Parameters
+        ----------
+        interval : float, optional
+            The initial poll interval in seconds. It doubles after every poll
+            without state changes up to `max_interval`.
+        max_interval : float, optional
+            The maximal poll interval in seconds. Defaults to 60.
+        timeout : float, optional
+            Maximal time to wait in seconds.
+
+        Returns
+        -------
+        Dict[str, str]
+            The final states of the nodes. Nodes which were never submitted have
+            the state None, call `submit` again to resume them.
+
+        Raises
+        ------
+        TimeoutError
+            If the workflow did not finish in time.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        delay = interval
+        status = self.poll()
+        while not self.done:
+            if deadline is not None and time.monotonic() + delay > deadline:
+                raise TimeoutError(f"Workflow did not finish: {status}")
+            time.sleep(delay)
+            previous, status = status, self.poll()
+            delay = interval if status != previous else min(2 * delay, max_interval)
+        return status
+
+    # -- Persistence ---------------------------------------------------------------
+
+    def to_dict(self) -> Dict[str, Any]:
+        nodes = list()
+        for node in self.nodes.values():
+            nodes.append(
+                {
+                    "name": node.name,
+                    "script": node.script.dumps(),
+                    "after": node.after,
+                    "job_id": node.job_id,
+                    "state": node.state,
+                    "reason": node.reason,
+                }
+            )
+        return {"name": self.name, "nodes": nodes}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "Workflow":
+        self = cls(data.get("name"))
+        for item in data["nodes"]:
+            script = SlurmScript()
+            script.loads(item["script"])
+            node = WorkflowNode(item["name"], script, dict(item["after"]))
+            node.job_id, node.state = item.get("job_id"), item.get("state")
+            node.reason = item.get("reason")
+            self.nodes[node.name] = node
+        return self
+
+    def save(self, file: Union[str, Path]) -> None:
+        """Save the workflow and the job ids of its nodes (written atomically)."""
+        file = Path(file)
+        tmp = file.with_name(f".{file.name}.{os.getpid()}.tmp")
+        tmp.write_text(json.dumps(self.to_dict(), indent=2))
+        os.replace(tmp, file)
+
+    @classmethod
+    def load(cls, file: Union[str, Path]) -> "Workflow":
+        """Load a workflow saved with `save`, for example to resume it."""
+        return cls.from_dict(json.loads(Path(file).read_text()))
@@ -0,0 +1,239 @@
+# -*- coding: utf-8 -*-
+# Author: Dylan Jones
+# Date:   2026-10-17
+
+"""Batched, atomic and change-aware writing of many slurm scripts.
+
+Regenerating a tree of scripts usually changes only a few of them. `dump_many`
+renders each script and compares it with the file on disk before writing, so
+unchanged files cost a single `stat` (plus one read if the size matches). With a
+manifest, which stores the content hash, size and modification time of each file
+written before, unchanged files are skipped after the `stat` alone.
+
+Changed files are written to a temporary file in the same directory and renamed,
+readers (or sbatch) never see a partially written script. Missing directories are
+only created when writing into them fails, each directory at most once. The file
+operations are spread over a thread pool, which hides the metadata latency of
+parallel file systems like Lustre or GPFS.
+
+Examples
+--------
+>>> scripts = {f"runs/{i}/job.slurm": make_script(i) for i in range(100_000)}
+>>> result = dump_many(scripts, manifest="runs/.manifest.json")
+>>> print(result)
+Wrote 12 files (4.1 KB), 99988 unchanged in 1.52s
+"""
+
+import hashlib
+import json
+import os
+import stat
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Mapping, Tuple, Union
+
+from .metrics import _format_bytes
+from .script import SlurmScript
+
+PathLike = Union[str, Path]
+Content = Union[SlurmScript, str]
+Files = Union[Mapping[PathLike, Content], Iterable[Union[SlurmScript, Tuple]]]
+
+# Content hash, size and modification time (ns) of a written file
+Entry = Tuple[str, int, int]
+
+
+def content_hash(data: bytes) -> str:
+    """Return the hash of the content of a file used by the manifest."""
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+@dataclass
+class WriteResult:
+    """Summary of a bulk write."""
+
+    written: List[Path] = field(default_factory=list)
+    skipped: int = 0
+    bytes: int = 0
+    errors: List[Tuple[str, str]] = field(default_factory=list)
+    elapsed: float = 0.0
+
+    @property
+    def files(self) -> int:
+        return len(self.written)
+
+    def __str__(self) -> str:
+        s = f"Wrote {self.files} files ({_format_bytes(self.bytes)})"
+        if self.skipped:
+            s += f", {self.skipped} unchanged"
+        if self.errors:
+            s += f", {len(self.errors)} errors"
+        return s + f" in {self.elapsed:.2f}s"
+
+
+def _items(files: Files) -> Iterator[Tuple[str, Content]]:
+    if isinstance(files, Mapping):
+        files = files.items()
+    for item in files:
+        if isinstance(item, SlurmScript):
+            if item.file is None:
+                raise ValueError("SlurmScript has no file to write to")
+            yield str(item.file), item
+        else:
+            path, content = item
+            yield str(path), content
+
+
+def _unchanged(
+    path: str, data: bytes, digest: str, entry: Entry
+) -> Tuple[bool, os.stat_result]:
+    """Check if a file already has the given content.
+
+    Returns if the file is unchanged and its stat result (None if missing).
+    """
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return False, None
+    if st.st_size != len(data):
+        return False, st
+    if entry is not None and tuple(entry) == (digest, st.st_size, st.st_mtime_ns):
+        return True, st
+    with open(path, "rb") as fh:
+        return fh.read() == data, st
+
+
+class _Writer:
+    def __init__(self, mkdir: bool, linesep: str, manifest: Dict[str, Entry]):
+        self.mkdir = mkdir
+        self.linesep = linesep
+        self.manifest = manifest
+        self._created = set()
+        self._lock = threading.Lock()
+
+    def _makedirs(self, directory: str) -> None:
+        with self._lock:
+            if directory in self._created:
+                return
+        # Safe to run concurrently, only the bookkeeping needs the lock
+        os.makedirs(directory, exist_ok=True)
+        with self._lock:
+            self._created.add(directory)
+
+    def _open_tmp(self, path: str) -> Tuple[str, int]:
+        directory, name = os.path.split(path)
+        tmp = os.path.join(directory, f".{name}.{os.getpid()}.{threading.get_ident()}")
+        flags = os.O_WRONLY | os.O_CREAT | os.O_TRUNC
+        try:
+            return tmp, os.open(tmp, flags, 0o666)
+        except FileNotFoundError:
+            if not self.mkdir or not directory:
+                raise
+            self._makedirs(directory)
+            return tmp, os.open(tmp, flags, 0o666)
+
+    def __call__(self, item: Tuple[str, Content]) -> Tuple:
+        path, content = item
+        try:
+            if isinstance(content, SlurmScript):
+                content = content.dumps(self.linesep)
+            data = content.encode()
+            digest = content_hash(data) if self.manifest is not None else None
+            entry = self.manifest.get(path) if self.manifest is not None else None
+            unchanged, st = _unchanged(path, data, digest, entry)
+            mtime = st.st_mtime_ns if st is not None else None
+            if not unchanged:
+                tmp, fd = self._open_tmp(path)
+                try:
+                    if st is not None:
+                        # Keep the mode of the replaced file, like `SlurmScript.dump`
+                        os.fchmod(fd, stat.S_IMODE(st.st_mode))
+                    with os.fdopen(fd, "wb") as fh:
+                        fh.write(data)
+                    os.replace(tmp, path)
+                except BaseException:
+                    os.unlink(tmp)
+                    raise
+                if digest is not None:
+                    mtime = os.stat(path).st_mtime_ns
+            entry = (digest, len(data), mtime) if digest is not None else None
+            return path, not unchanged, len(data), entry, None
+        except (OSError, ValueError) as e:
+            return path, False, 0, None, e
+
+
+def _load_manifest(path: Path) -> Dict[str, Entry]:
+    try:
+        with open(path, "r") as fh:
+            return json.load(fh)
+    except (FileNotFoundError, ValueError):
+        return dict()
+
+
+def _save_manifest(path: Path, manifest: Dict[str, Entry]) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    with open(tmp, "w") as fh:
+        json.dump(manifest, fh, separators=(",", ":"))
+    os.replace(tmp, path)
+
+
+def dump_many(
+    files: Files,
+    mkdir: bool = True,
+    manifest: PathLike = None,
+    max_workers: int = 16,
+    linesep: str = "\n",
+) -> WriteResult:
+    """Write many slurm scripts, skipping files whose content did not change.
+
+    Parameters
+    ----------
+    files : Mapping or Iterable
+        The scripts to write. Either a mapping of paths to a `SlurmScript` or the
+        rendered content (for example of a `SlurmTemplate`), an iterable of
+        `(path, script)` pairs or an iterable of `SlurmScript` objects with a file.
+    mkdir : bool, optional
+        Create missing parent directories (default).
+    manifest : str or Path, optional
+        A JSON file storing the content hash, size and modification time of the
+        written files. Files matching their manifest entry are skipped without
+        reading them. The manifest is created if it does not exist.
+    max_workers : int, optional
+        Number of threads writing the files. Defaults to 16.
+    linesep : str, optional
+        The line separator used to serialize `SlurmScript` objects.
+
+    Returns
+    -------
+    WriteResult
+        The written files, the number of unchanged files and the bytes written.
+    """
+    t0 = time.monotonic()
+    entries = _load_manifest(Path(manifest)) if manifest is not None else None
+    items = [(os.path.abspath(path), content) for path, content in _items(files)]
+    writer = _Writer(mkdir, linesep, entries)
+    result = WriteResult()
+    if max_workers > 1 and len(items) > 1:
+        with ThreadPoolExecutor(max_workers) as executor:
+            results = list(executor.map(writer, items))
+    else:
+        results = list(map(writer, items))
+    for path, written, size, entry, error in results:
+        if error is not None:
+            result.errors.append((path, str(error)))
+            continue
+        if written:
+            result.written.append(Path(path))
+            result.bytes += size
+        else:
+            result.skipped += 1
+        if entries is not None:
+            entries[path] = entry
+    if manifest is not None:
+        _save_manifest(Path(manifest), entries)
+    result.elapsed = time.monotonic() - t0
+    return result